@@ -1,6 +1,6 @@
 import os
 import logging
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
@@ -8,6 +8,7 @@ from flask_cors import CORS
 from flask_socketio import SocketIO
 from datetime import datetime, timedelta
 import redis
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import blueprints
 from routes.auth import auth_bp
@@ -15,18 +16,33 @@ from routes.health import health_bp
 from routes.emergency import emergency_bp
 from routes.communication import communication_bp
 from routes.admin import admin_bp
+from routes.batch import batch_bp
+from routes.media import media_bp
+from routes.webhooks import webhooks_bp
 from models.database import db
 from config import Config
+from utils.compression import init_compression
+from utils.json_provider import init_json_provider
+from utils.sqlite import configure_sqlite, init_sqlite_pragmas
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    init_json_provider(app)
+
+    # Client address from X-Forwarded-For, as set by our own proxies only
+    proxies = app.config.get('TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
 
     # Initialize extensions
+    configure_sqlite(app)
     db.init_app(app)
+    init_sqlite_pragmas(app)
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
     CORS(app)
+    init_compression(app)
     socketio = SocketIO(app, cors_allowed_origins="*")
 
     # Redis for caching and real-time features
@@ -41,22 +57,103 @@ def create_app():
         print(f"Redis connection failed: {e}")
         app.redis = None
 
+    # Request tracing (first, so the root span covers the other hooks)
+    from services.tracing import Tracer
+    app.tracer = Tracer()
+    app.tracer.init_app(app)
+
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(health_bp, url_prefix='/api/health')
     app.register_blueprint(emergency_bp, url_prefix='/api/emergency')
     app.register_blueprint(communication_bp, url_prefix='/api/communication')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
+    app.register_blueprint(media_bp, url_prefix='/uploads')
+    app.register_blueprint(webhooks_bp, url_prefix='/api/webhooks')
 
     # Health prediction AI service
     from services.ai_prediction import HealthPredictionService
     app.health_predictor = HealthPredictionService()
 
-    # Communication services
+    # Communication services (sends are logged to CommunicationLog write-behind)
+    from services.communication_logger import CommunicationLogger
     from services.whatsapp_service import WhatsAppService
     from services.sms_service import SMSService
+    from services.provider_health import ProviderHealth
+    app.communication_logger = CommunicationLogger()
+    app.communication_logger.init_app(app)
+    app.provider_health = ProviderHealth()
+    app.provider_health.init_app(app)
     app.whatsapp = WhatsAppService()
+    app.whatsapp.init_app(app)
     app.sms = SMSService()
+    app.sms.init_app(app)
+
+    # Delivery-status callbacks are applied to CommunicationLog in batches
+    from services.delivery_status import DeliveryStatusQueue
+    app.delivery_status = DeliveryStatusQueue()
+    app.delivery_status.init_app(app)
+
+    # Serialized, group-committing writer for SQLite deployments
+    from services.db_writer import DatabaseWriter
+    app.db_writer = DatabaseWriter()
+    app.db_writer.init_app(app)
+
+    # Read replica routing for @read_only views
+    from services.replica_router import ReplicaRouter
+    app.replica_router = ReplicaRouter()
+    app.replica_router.init_app(app)
+
+    # Change counters for ETag validators on read endpoints
+    from services.change_tracker import ChangeTracker
+    app.change_tracker = ChangeTracker()
+    app.change_tracker.init_app(app)
+
+    # Urgency-ordered queue of unclaimed emergency alerts
+    from services.triage import TriageQueue
+    app.triage = TriageQueue()
+    app.triage.init_app(app)
+
+    # Streaming percentiles for emergency response times
+    from services.response_sla import ResponseSLA
+    app.response_sla = ResponseSLA()
+    app.response_sla.init_app(app)
+
+    # Columnar snapshot of health records for admin analytics
+    from services.analytics_snapshot import AnalyticsSnapshot
+    app.analytics = AnalyticsSnapshot()
+    app.analytics.init_app(app)
+
+    # Per-worker appointment slot index for conflict checks and availability
+    from services.schedule_index import ScheduleIndex
+    app.schedule_index = ScheduleIndex()
+    app.schedule_index.init_app(app)
+
+    # Content-addressed upload storage
+    from services.media_storage import MediaStorage
+    app.media_storage = MediaStorage()
+    app.media_storage.init_app(app)
+
+    # Per-endpoint SQL query budgets and the slow-query log
+    from services.query_monitor import QueryMonitor
+    app.query_monitor = QueryMonitor()
+    app.query_monitor.init_app(app)
+
+    # Admin-triggered CPU/allocation profiling
+    from services.profiler import Profiler
+    app.profiler = Profiler()
+    app.profiler.init_app(app)
+
+    # Rate limiting for SMS-sending and password-checking endpoints
+    from services.rate_limiter import RateLimiter
+    app.rate_limiter = RateLimiter()
+    app.rate_limiter.init_app(app)
+
+    # Background dependency checks for the readiness probe
+    from services.health_probe import HealthProber
+    app.health_prober = HealthProber()
+    app.health_prober.init_app(app)
 
     @app.route('/')
     def index():
@@ -70,31 +167,21 @@ def create_app():
                 'health': '/api/health/*',
                 'emergency': '/api/emergency/*',
                 'communication': '/api/communication/*',
-                'admin': '/api/admin/*'
+                'admin': '/api/admin/*',
+                'batch': '/api/batch'
             }
         })
 
+    # Probes answer from the prober's cached checks; no dependency calls here
+    @app.route('/api/health-check/live')
+    def liveness():
+        return Response(b'{"status": "alive"}', 200, mimetype='application/json')
+
+    @app.route('/api/health-check/ready')
     @app.route('/api/health-check')
-    def health_check():
-        try:
-            # Test database connection
-            db.session.execute('SELECT 1')
-
-            # Test Redis connection
-            redis_status = 'connected' if app.redis and app.redis.ping() else 'disconnected'
-
-            return jsonify({
-                'status': 'healthy',
-                'database': 'connected',
-                'redis': redis_status,
-                'timestamp': datetime.utcnow().isoformat()
-            }), 200
-        except Exception as e:
-            return jsonify({
-                'status': 'unhealthy',
-                'error': str(e),
-                'timestamp': datetime.utcnow().isoformat()
-            }), 500
+    def readiness():
+        body, status = app.health_prober.readiness()
+        return Response(body, status, mimetype='application/json')
 
     # Error handlers
     @app.errorhandler(404)
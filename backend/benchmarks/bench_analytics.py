@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Compare an ORM cohort query (load HealthRecord objects, filter and group in
+Python) with the same query on the columnar analytics snapshot.
+
+    python benchmarks/bench_analytics.py [rows]
+"""
+
+import os
+import sys
+import time
+import random
+import tracemalloc
+from datetime import datetime, timedelta, date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, User, HealthRecord
+from services.analytics_snapshot import AnalyticsSnapshot
+
+DISTRICTS = ['Pune', 'Nashik', 'Satara', 'Sangli', 'Kolhapur', 'Solapur']
+
+def build_app(rows, patients=2000):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [{
+            'id': f'patient-{i}',
+            'phone_number': f'9{i:09d}',
+            'full_name': 'Bench',
+            'password_hash': 'x',
+            'role': 'patient',
+            'gender': rng.choice(['male', 'female']),
+            'district': rng.choice(DISTRICTS),
+            'village': f'village-{i % 200}',
+            'date_of_birth': date(1940, 1, 1) + timedelta(days=rng.randrange(25000))
+        } for i in range(patients)])
+
+        start = datetime.utcnow()
+        batch = []
+        for i in range(rows):
+            batch.append({
+                'id': f'rec-{i}',
+                'patient_id': f'patient-{rng.randrange(patients)}',
+                'blood_pressure_systolic': rng.randint(100, 180),
+                'blood_pressure_diastolic': rng.randint(60, 110),
+                'heart_rate': rng.randint(55, 120),
+                'temperature': round(rng.uniform(97, 103), 1),
+                'weight': rng.randint(40, 90),
+                'risk_level': rng.choice(['low', 'medium', 'high']),
+                'risk_score': rng.random(),
+                'recorded_at': start - timedelta(minutes=i),
+                'synced_at': start - timedelta(minutes=i)
+            })
+            if len(batch) == 10000:
+                db.session.execute(HealthRecord.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(HealthRecord.__table__.insert(), batch)
+        db.session.commit()
+
+    return app
+
+def orm_query():
+    """Average systolic BP of high-risk patients aged 40-60, by district"""
+    today = date.today()
+    totals = {}
+    for record, user in db.session.query(HealthRecord, User).join(User, User.id == HealthRecord.patient_id):
+        age = (record.recorded_at.date() - user.date_of_birth).days / 365.25
+        if record.risk_level == 'high' and 40 <= age <= 60 and record.blood_pressure_systolic is not None:
+            total = totals.setdefault(user.district, [0, 0])
+            total[0] += record.blood_pressure_systolic
+            total[1] += 1
+    return {district: s / n for district, (s, n) in totals.items()}
+
+def snapshot_query(snapshot):
+    return snapshot.query(
+        filters={'risk_level': 'high', 'age_min': 40, 'age_max': 60},
+        group_by='district',
+        metrics=['count', 'avg:systolic']
+    )
+
+def measure(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    app = build_app(rows)
+
+    with app.app_context():
+        snapshot = AnalyticsSnapshot()
+        snapshot.init_app(app)
+        snapshot.refresh_seconds = float('inf')
+
+        started = time.perf_counter()
+        snapshot.refresh()
+        load_time = time.perf_counter() - started
+
+        orm_time = measure(orm_query)
+        fast_time = measure(snapshot_query, snapshot)
+
+        db.session.expunge_all()
+        tracemalloc.start()
+        orm_query()
+        _, orm_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"{rows} health records")
+    print(f"  snapshot load:          {load_time * 1000:8.1f} ms  size {snapshot.nbytes() / 1024 / 1024:6.1f} MiB")
+    print(f"  ORM cohort query:       {orm_time * 1000:8.1f} ms  peak {orm_peak / 1024 / 1024:6.1f} MiB")
+    print(f"  snapshot cohort query:  {fast_time * 1000:8.1f} ms")
+    print(f"  speedup {orm_time / fast_time:.0f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare the ORM + to_dict() + stdlib json list path with the column-projected
+rows + orjson path used by the list endpoints.
+
+    python benchmarks/bench_serialization.py [rows]
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, User, HealthRecord
+from utils.fields import select_columns, serialize_rows
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def build_app(rows):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        patient = User(phone_number='9000000000', full_name='Bench', password_hash='x')
+        db.session.add(patient)
+        db.session.flush()
+        patient_id = patient.id
+
+        start = datetime.utcnow()
+        db.session.execute(HealthRecord.__table__.insert(), [{
+            'id': f'rec-{i}',
+            'patient_id': patient_id,
+            'blood_pressure_systolic': 110 + i % 40,
+            'blood_pressure_diastolic': 70 + i % 20,
+            'heart_rate': 60 + i % 50,
+            'temperature': 97.0 + (i % 40) / 10,
+            'weight': 50 + i % 30,
+            'symptoms': 'cough, fever' if i % 3 else None,
+            'notes': 'routine visit ' * 5,
+            'risk_level': ('low', 'medium', 'high')[i % 3],
+            'risk_score': (i % 100) / 100,
+            'recorded_at': start - timedelta(minutes=i)
+        } for i in range(rows)])
+        db.session.commit()
+
+    return app, patient_id
+
+def orm_path(patient_id):
+    records = HealthRecord.query.filter_by(patient_id=patient_id).order_by(
+        HealthRecord.recorded_at.desc()
+    ).all()
+    return json.dumps({'records': [record.to_dict() for record in records]})
+
+def projected_path(patient_id):
+    rows = db.session.execute(
+        db.select(*select_columns(HealthRecord, None)).where(
+            HealthRecord.patient_id == patient_id
+        ).order_by(HealthRecord.recorded_at.desc())
+    ).all()
+    body = {'records': serialize_rows(HealthRecord, rows, None)}
+    return orjson.dumps(body) if orjson else json.dumps(body)
+
+def measure(fn, patient_id, repeat=5):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn(patient_id)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    fn(patient_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    app, patient_id = build_app(rows)
+
+    with app.app_context():
+        orm_time, orm_peak = measure(orm_path, patient_id)
+        fast_time, fast_peak = measure(projected_path, patient_id)
+
+    print(f"{rows} health records (orjson {'on' if orjson else 'off'})")
+    print(f"  ORM + to_dict + json:    {orm_time * 1000:8.1f} ms  peak {orm_peak / 1024 / 1024:6.1f} MiB")
+    print(f"  projected rows + orjson: {fast_time * 1000:8.1f} ms  peak {fast_peak / 1024 / 1024:6.1f} MiB")
+    print(f"  speedup {orm_time / fast_time:.1f}x, memory {orm_peak / fast_peak:.1f}x smaller")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Concurrent small writes on an on-disk SQLite database: default settings with
+a commit per request, WAL + tuned pragmas with a commit per request, and WAL
+with the group-committing DatabaseWriter. Reader threads query alongside.
+
+    python benchmarks/bench_sqlite_writes.py [writer_threads] [writes_per_thread]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, User, HealthRecord
+from services.db_writer import DatabaseWriter
+from utils.sqlite import configure_sqlite, init_sqlite_pragmas
+
+READERS = 4
+
+def build_app(path, production, writer):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}',
+        SQLITE_PRODUCTION=production,
+        SQLITE_WRITER_ENABLED=writer,
+        SQLITE_BUSY_TIMEOUT=15
+    )
+    if not production:
+        # Stock pysqlite: rollback journal, 5 second lock wait
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'check_same_thread': False}}
+    configure_sqlite(app)
+    db.init_app(app)
+    init_sqlite_pragmas(app)
+
+    app.db_writer = DatabaseWriter()
+    app.db_writer.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id='patient-1', phone_number='9000000000', full_name='Bench', password_hash='x'))
+        db.session.commit()
+    return app
+
+def insert_record(i):
+    db.session.execute(HealthRecord.__table__.insert().values(
+        id=f'rec-{i}', patient_id='patient-1', heart_rate=70 + i % 30, temperature=98.6
+    ))
+    db.session.execute(db.update(User).where(User.id == 'patient-1').values(last_login=db.func.current_timestamp()))
+
+def run(label, production, writer, threads, per_thread):
+    directory = tempfile.mkdtemp(dir=os.environ.get('BENCH_DIR'))
+    app = build_app(os.path.join(directory, 'bench.db'), production, writer)
+    errors, latencies, reads = [], [], [0]
+    stop = threading.Event()
+
+    def write_loop(worker):
+        with app.app_context():
+            for n in range(per_thread):
+                started = time.perf_counter()
+                try:
+                    app.db_writer.submit(insert_record, worker * per_thread + n)
+                except Exception as e:
+                    errors.append(str(e).splitlines()[0])
+                latencies.append(time.perf_counter() - started)
+                db.session.remove()
+
+    def read_loop():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    db.session.execute(db.select(db.func.count(HealthRecord.id))).scalar()
+                    reads[0] += 1
+                except Exception as e:
+                    errors.append(str(e).splitlines()[0])
+                db.session.remove()
+
+    readers = [threading.Thread(target=read_loop) for _ in range(READERS)]
+    writers = [threading.Thread(target=write_loop, args=(i,)) for i in range(threads)]
+    for thread in readers:
+        thread.start()
+    started = time.perf_counter()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    with app.app_context():
+        stored = db.session.execute(db.select(db.func.count(HealthRecord.id))).scalar()
+        db.engine.dispose()
+    shutil.rmtree(directory)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+    print(f"  {label:<34} {stored / elapsed:8.0f} writes/s  p95 {p95:7.1f} ms  "
+          f"reads {reads[0] / elapsed:7.0f}/s  errors {len(errors)}")
+    if errors:
+        print(f"    e.g. {errors[0]}")
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print(f"{threads} writer threads x {per_thread} writes, {READERS} reader threads")
+    run('default journal, commit per write', False, False, threads, per_thread)
+    run('WAL + pragmas, commit per write', True, False, threads, per_thread)
+    run('WAL + group-commit writer', True, True, threads, per_thread)
+
+if __name__ == '__main__':
+    main()
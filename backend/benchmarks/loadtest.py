@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: simulated patients and ASHA workers against the real
+app, with WhatsApp and Twilio replaced by local stubs (provider_stubs.py).
+
+    python benchmarks/loadtest.py [--levels 5,10,20,40,80] [--stage-seconds 30]
+                                  [--workers 1] [--threads 8] [--fake-redis]
+                                  [--provider-latency-ms 150] [--provider-error-rate 0.02]
+                                  [--target http://host:port] [--json report.json]
+
+The app is started in a subprocess (gunicorn with --workers/--threads when
+gunicorn is installed, else one threaded Werkzeug process) on a throwaway
+SQLite database unless --database-url is given; --target tests a server
+you started yourself (point its WHATSAPP_API_URL/TWILIO_API_URL at the stubs
+to keep real providers out of it). Rate limits are switched off in the
+spawned server, since every simulated user comes from one IP.
+
+Users register and log in first, then each stage runs `level` concurrent
+users for --stage-seconds. Every stage reports throughput, error rate and
+p50/p95/p99 latency per endpoint. The saturation point is the first stage
+where throughput grows less than --min-gain over the previous one, p95 goes
+over --p95-slo-ms or errors go over --max-error-rate; the stage before it is
+the capacity of that worker configuration.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+from collections import defaultdict
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from provider_stubs import start_stubs, stub_env
+
+# (weight, action) per role; actions are methods of VirtualUser
+PATIENT_ACTIONS = [
+    (40, 'submit_record'),
+    (30, 'poll_dashboard'),
+    (15, 'list_records'),
+    (8, 'login'),
+    (5, 'list_alerts'),
+    (2, 'raise_alert'),
+]
+ASHA_ACTIONS = [
+    (30, 'caseload'),
+    (25, 'poll_dashboard'),
+    (15, 'trends'),
+    (15, 'triage'),
+    (10, 'list_alerts'),
+    (3, 'login'),
+    (2, 'broadcast'),
+]
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values), math.ceil(fraction * len(values))) - 1)]
+
+class Recorder:
+    """Latency samples and status counts per endpoint for one stage"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        everything = []
+        for endpoint, samples in sorted(self.latencies.items()):
+            samples.sort()
+            everything.extend(samples)
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'rps': round(len(samples) / elapsed, 1),
+                'errors': self.errors[endpoint],
+                'p50_ms': round(percentile(samples, 0.50) * 1000, 1),
+                'p95_ms': round(percentile(samples, 0.95) * 1000, 1),
+                'p99_ms': round(percentile(samples, 0.99) * 1000, 1)
+            }
+        everything.sort()
+        total = len(everything)
+        return {
+            'requests': total,
+            'rps': round(total / elapsed, 1) if elapsed else 0.0,
+            'error_rate': round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            'p50_ms': round(percentile(everything, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(everything, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(everything, 0.99) * 1000, 1),
+            'endpoints': endpoints
+        }
+
+class VirtualUser:
+    """One simulated patient or ASHA worker with its own HTTP session"""
+
+    def __init__(self, base_url, role, phone, village, timeout):
+        self.base_url = base_url
+        self.role = role
+        self.phone = phone
+        self.village = village
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.user_id = None
+        self.recorder = None
+
+    def call(self, label, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        if self.recorder:
+            self.recorder.record(label, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    def register(self):
+        response = self.call('POST /api/auth/register', 'POST', '/api/auth/register', json={
+            'phone_number': self.phone,
+            'password': 'loadtest-password',
+            'full_name': f'Load {self.role} {self.phone[-4:]}',
+            'role': self.role,
+            'village': self.village,
+            'district': f'District {self.village.split()[-1][:1]}',
+            'emergency_contact': '9' + self.phone[1:][::-1]
+        })
+        if response is not None:
+            self._authenticate(response.json())
+        return response is not None
+
+    def login(self):
+        response = self.call('POST /api/auth/login', 'POST', '/api/auth/login', json={
+            'phone_number': self.phone, 'password': 'loadtest-password'
+        })
+        if response is not None:
+            self._authenticate(response.json())
+
+    def _authenticate(self, payload):
+        self.user_id = payload['user']['id']
+        self.session.headers['Authorization'] = f"Bearer {payload['access_token']}"
+
+    def submit_record(self):
+        self.call('POST /api/health/records', 'POST', '/api/health/records', json={
+            'blood_pressure_systolic': random.randint(100, 170),
+            'blood_pressure_diastolic': random.randint(60, 105),
+            'heart_rate': random.randint(55, 120),
+            'temperature': round(random.uniform(97.0, 103.0), 1),
+            'weight': round(random.uniform(40, 90), 1),
+            'oxygen_saturation': random.randint(88, 100),
+            'location_lat': 12.9 + random.uniform(-1, 1),
+            'location_lng': 77.6 + random.uniform(-1, 1)
+        })
+
+    def poll_dashboard(self):
+        self.call('GET /api/health/dashboard/stats', 'GET', '/api/health/dashboard/stats')
+
+    def list_records(self):
+        self.call('GET /api/health/records', 'GET', '/api/health/records')
+
+    def list_alerts(self):
+        self.call('GET /api/emergency/alerts', 'GET', '/api/emergency/alerts')
+
+    def raise_alert(self):
+        self.call('POST /api/emergency/alert', 'POST', '/api/emergency/alert', json={
+            'alert_type': 'medical',
+            'severity': random.choice(['low', 'medium', 'high', 'critical']),
+            'description': 'Load test alert',
+            'location_lat': 12.9 + random.uniform(-1, 1),
+            'location_lng': 77.6 + random.uniform(-1, 1)
+        })
+
+    def caseload(self):
+        self.call('GET /api/health/caseload', 'GET', '/api/health/caseload', params={'village': self.village})
+
+    def trends(self):
+        self.call('GET /api/health/trends', 'GET', '/api/health/trends',
+                  params={'area_type': 'village', 'area': self.village})
+
+    def triage(self):
+        self.call('GET /api/emergency/triage', 'GET', '/api/emergency/triage')
+
+    def broadcast(self):
+        self.call('POST /api/communication/broadcast', 'POST', '/api/communication/broadcast',
+                  json={'message': 'Load test: vaccination camp tomorrow at the health centre'})
+
+    def run(self, recorder, stop, think_seconds):
+        self.recorder = recorder
+        actions = PATIENT_ACTIONS if self.role == 'patient' else ASHA_ACTIONS
+        names = [name for _, name in actions]
+        weights = [weight for weight, _ in actions]
+        while not stop.is_set():
+            getattr(self, random.choices(names, weights)[0])()
+            if think_seconds:
+                stop.wait(random.expovariate(1 / think_seconds))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url + '/', timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f'Server at {url} did not come up within {timeout} s')
+
+def start_server(args, env):
+    """Spawn the app under test; returns (process, base_url)"""
+    port = free_port()
+    command = [sys.executable, os.path.abspath(__file__), 'serve', '--port', str(port),
+               '--workers', str(args.workers), '--threads', str(args.threads)]
+    if args.fake_redis:
+        command.append('--fake-redis')
+    process = subprocess.Popen(command, cwd=BACKEND, env=env,
+                               stdout=subprocess.DEVNULL if not args.server_output else None,
+                               stderr=subprocess.DEVNULL if not args.server_output else None)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_for(url)
+    except SystemExit:
+        process.kill()
+        raise
+    return process, url
+
+def serve(argv):
+    """Run the app for the harness (child process)"""
+    parser = argparse.ArgumentParser(prog='loadtest.py serve')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--fake-redis', action='store_true')
+    args = parser.parse_args(argv)
+
+    def build():
+        if args.fake_redis:
+            import redis
+            import fakeredis
+            server = fakeredis.FakeServer()
+            redis.Redis = lambda *a, **k: fakeredis.FakeRedis(server=server, decode_responses=True)
+        # app.py by path: the legacy app/ package shadows it on import
+        import importlib.util
+        spec = importlib.util.spec_from_file_location('app_main', os.path.join(BACKEND, 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        from models import db
+        app, socketio = module.create_app()
+        with app.app_context():
+            db.create_all()
+        return app
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+
+    if BaseApplication is None:
+        if args.workers > 1:
+            print('gunicorn is not installed; running one threaded Werkzeug process', file=sys.stderr)
+        from werkzeug.serving import make_server
+        make_server('127.0.0.1', args.port, build(), threaded=True).serve_forever()
+        return
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'127.0.0.1:{args.port}')
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', 120)
+            self.cfg.set('accesslog', None)
+
+        def load(self):
+            return build()
+
+    Server().run()
+
+def create_users(base_url, args):
+    """Register and log in the simulated population; returns the users"""
+    run_id = random.randint(100, 999)
+    users = []
+    villages = max(1, args.asha)
+    for index in range(args.asha):
+        users.append(VirtualUser(base_url, 'asha', f'8{run_id}{index:06d}', f'Village {index % villages}', args.timeout))
+    for index in range(args.patients):
+        users.append(VirtualUser(base_url, 'patient', f'9{run_id}{index:06d}', f'Village {index % villages}', args.timeout))
+
+    recorder = Recorder()
+    pending = list(users)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                user = pending.pop()
+            user.recorder = recorder
+            user.register()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(min(16, len(users)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registered = [user for user in users if user.user_id]
+    return registered, recorder.summary(time.perf_counter() - started)
+
+def run_stage(users, level, args):
+    """`level` concurrent users for --stage-seconds"""
+    recorder = Recorder()
+    stop = threading.Event()
+    # Keep the stage's role mix close to the population's
+    active = random.sample(users, min(level, len(users)))
+    threads = [threading.Thread(target=user.run, args=(recorder, stop, args.think_ms / 1000)) for user in active]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.stage_seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    summary = recorder.summary(time.perf_counter() - started)
+    summary['concurrency'] = len(active)
+    return summary
+
+def saturation(stages, args):
+    """Index of the first saturated stage, or None"""
+    for index, stage in enumerate(stages):
+        if stage['p95_ms'] > args.p95_slo_ms or stage['error_rate'] > args.max_error_rate:
+            return index
+        if index and stage['rps'] < stages[index - 1]['rps'] * (1 + args.min_gain):
+            return index
+    return None
+
+def print_stage(title, summary):
+    print(f"\n{title}: {summary['rps']} req/s, {summary['error_rate'] * 100:.1f}% errors, "
+          f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms")
+    print(f"  {'endpoint':<36} {'req/s':>7} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, row in summary['endpoints'].items():
+        print(f"  {endpoint:<36} {row['rps']:>7} {row['errors']:>7} {row['p50_ms']:>8} "
+              f"{row['p95_ms']:>8} {row['p99_ms']:>8}")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        return serve(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description='End-to-end load test with provider stubs')
+    parser.add_argument('--levels', default='5,10,20,40,80', help='concurrent users per stage')
+    parser.add_argument('--stage-seconds', type=float, default=30)
+    parser.add_argument('--think-ms', type=float, default=500, help='mean pause between a user\'s requests')
+    parser.add_argument('--patients', type=int, default=None, help='default: the highest level')
+    parser.add_argument('--asha', type=int, default=None, help='default: one per 10 patients')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--fake-redis', action='store_true', help='in-process Redis per server worker')
+    parser.add_argument('--database-url', help='default: a throwaway SQLite file')
+    parser.add_argument('--target', help='test an already running server instead of spawning one')
+    parser.add_argument('--server-output', action='store_true', help="show the spawned server's output")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--provider-latency-ms', type=float, default=150)
+    parser.add_argument('--provider-jitter-ms', type=float, default=50)
+    parser.add_argument('--provider-error-rate', type=float, default=0.0)
+    parser.add_argument('--provider-throttle-rate', type=float, default=0.0)
+    parser.add_argument('--p95-slo-ms', type=float, default=1000)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--min-gain', type=float, default=0.10, help='throughput growth that still counts as scaling')
+    parser.add_argument('--json', help='write the full report here')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(',')]
+    args.patients = args.patients or max(levels)
+    args.asha = args.asha if args.asha is not None else max(1, args.patients // 10)
+
+    whatsapp, twilio = start_stubs(args.provider_latency_ms, args.provider_jitter_ms,
+                                   args.provider_error_rate, args.provider_throttle_rate)
+    process = None
+    database = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+    else:
+        env = dict(os.environ, **stub_env(whatsapp, twilio), RATE_LIMIT_ENABLED='0', TRACING_ENABLED='0')
+        if args.database_url:
+            env['DATABASE_URL'] = args.database_url
+        else:
+            database = os.path.join(BACKEND, 'instance', f'loadtest-{os.getpid()}.db')
+            os.makedirs(os.path.dirname(database), exist_ok=True)
+            env['DATABASE_URL'] = f'sqlite:///{database}'
+        process, base_url = start_server(args, env)
+
+    report = {'config': vars(args), 'stages': []}
+    try:
+        print(f"Load test against {base_url}: {args.workers} worker(s) x {args.threads} thread(s), "
+              f"provider latency {args.provider_latency_ms} ms, error rate {args.provider_error_rate}")
+        users, setup = create_users(base_url, args)
+        report['setup'] = setup
+        print_stage(f'Setup ({len(users)} users registered)', setup)
+
+        for level in levels:
+            summary = run_stage(users, level, args)
+            report['stages'].append(summary)
+            print_stage(f'{summary["concurrency"]} concurrent users', summary)
+
+        index = saturation(report['stages'], args)
+        if index is None:
+            print(f"\nNo saturation up to {levels[-1]} users; raise --levels to find the limit")
+        else:
+            capacity = report['stages'][index - 1] if index else None
+            report['saturation'] = {'stage': index, 'concurrency': report['stages'][index]['concurrency'],
+                                    'capacity_rps': capacity['rps'] if capacity else None}
+            print(f"\nSaturated at {report['stages'][index]['concurrency']} users"
+                  + (f"; capacity about {capacity['rps']} req/s at {capacity['concurrency']} users" if capacity else ''))
+        report['providers'] = {'whatsapp': whatsapp.hits, 'twilio': twilio.hits}
+        print(f"Provider stubs: whatsapp {whatsapp.hits}, twilio {twilio.hits}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        whatsapp.stop()
+        twilio.stop()
+        if database:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(database + suffix):
+                    os.remove(database + suffix)
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(report, out, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the WhatsApp Cloud API and Twilio's Messages API, with
+configurable latency and failure rates, for load tests and offline runs.
+
+    python benchmarks/provider_stubs.py [--latency-ms 150] [--jitter-ms 50]
+                                        [--error-rate 0.02] [--throttle-rate 0.01]
+
+Point the app at them with WHATSAPP_API_URL and TWILIO_API_URL (plus any
+WHATSAPP_ACCESS_TOKEN/WHATSAPP_PHONE_ID and TWILIO_* credentials, which the
+stubs accept without checking).
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WHATSAPP_PATH = re.compile(r'^(/v[\d.]+)?/[^/]+/messages$')
+TWILIO_PATH = re.compile(r'^/2010-04-01/Accounts/([^/]+)/Messages\.json$')
+
+class ProviderStub:
+    """One stub provider on its own port
+
+    Each request waits latency_ms (+/- jitter_ms, uniformly), then fails with
+    a 500 at error_rate, with a 429 at throttle_rate, and otherwise answers
+    the way the real API does for an accepted message.
+    """
+
+    def __init__(self, provider, latency_ms=100, jitter_ms=0, error_rate=0.0, throttle_rate=0.0,
+                 host='127.0.0.1', port=0):
+        if provider not in ('whatsapp', 'twilio'):
+            raise ValueError('provider must be whatsapp or twilio')
+        self.provider = provider
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.hits = {'accepted': 0, 'errors': 0, 'throttled': 0, 'not_found': 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f'{self.provider}-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, outcome):
+        with self._lock:
+            self.hits[outcome] += 1
+
+    def _respond(self, path, body):
+        """(status, payload) for one request"""
+        if self.provider == 'whatsapp':
+            match = WHATSAPP_PATH.match(path)
+        else:
+            match = TWILIO_PATH.match(path)
+        if not match:
+            self._count('not_found')
+            return 404, {'error': 'unknown path'}
+
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, delay) / 1000)
+
+        roll = random.random()
+        if roll < self.error_rate:
+            self._count('errors')
+            return 500, {'error': {'message': 'Stub provider error', 'code': 1}}
+        if roll < self.error_rate + self.throttle_rate:
+            self._count('throttled')
+            if self.provider == 'twilio':
+                return 429, {'code': 20429, 'message': 'Too Many Requests', 'status': 429}
+            return 429, {'error': {'message': 'Rate limit hit', 'code': 130429}}
+
+        self._count('accepted')
+        if self.provider == 'whatsapp':
+            return 200, {
+                'messaging_product': 'whatsapp',
+                'contacts': [{'input': body.get('to'), 'wa_id': body.get('to')}],
+                'messages': [{'id': f'wamid.{uuid.uuid4().hex}'}]
+            }
+        now = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
+        return 201, {
+            'sid': f'SM{uuid.uuid4().hex}',
+            'account_sid': match.group(1),
+            'to': body.get('To'),
+            'from': body.get('From'),
+            'body': body.get('Body'),
+            'status': 'queued',
+            'num_segments': '1',
+            'direction': 'outbound-api',
+            'date_created': now,
+            'date_updated': now
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length).decode('utf-8', 'replace') if length else ''
+                if 'json' in (self.headers.get('Content-Type') or ''):
+                    body = json.loads(raw or '{}')
+                else:
+                    body = {key: values[0] for key, values in parse_qs(raw).items()}
+
+                status, payload = stub._respond(self.path.split('?', 1)[0], body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def start_stubs(latency_ms=100, jitter_ms=0, error_rate=0.0, throttle_rate=0.0, host='127.0.0.1',
+                whatsapp_port=0, twilio_port=0):
+    """Start both stubs; returns (whatsapp, twilio)"""
+    options = dict(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate,
+                   throttle_rate=throttle_rate, host=host)
+    whatsapp = ProviderStub('whatsapp', port=whatsapp_port, **options).start()
+    twilio = ProviderStub('twilio', port=twilio_port, **options).start()
+    return whatsapp, twilio
+
+def stub_env(whatsapp, twilio):
+    """Environment pointing the app's WhatsApp and SMS services at the stubs"""
+    return {
+        'WHATSAPP_API_URL': whatsapp.url,
+        'WHATSAPP_ACCESS_TOKEN': 'stub-token',
+        'WHATSAPP_PHONE_ID': 'stub-phone-id',
+        'TWILIO_API_URL': twilio.url,
+        'TWILIO_ACCOUNT_SID': 'AC' + '0' * 32,
+        'TWILIO_AUTH_TOKEN': 'stub-token',
+        'TWILIO_PHONE_NUMBER': '+15005550006'
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--whatsapp-port', type=int, default=8701)
+    parser.add_argument('--twilio-port', type=int, default=8702)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    whatsapp, twilio = start_stubs(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate,
+                                   args.host, args.whatsapp_port, args.twilio_port)
+    for name, value in stub_env(whatsapp, twilio).items():
+        print(f'{name}={value}')
+    try:
+        while True:
+            time.sleep(10)
+            print(f'whatsapp {whatsapp.hits}  twilio {twilio.hits}')
+    except KeyboardInterrupt:
+        whatsapp.stop()
+        twilio.stop()
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,23 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///aarogya_sahayak.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Read Replica Config: @read_only views read from here when it is fresh enough
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_MAX_LAG_SECONDS = 5.0  # fall back to the primary beyond this
+    REPLICA_LAG_CHECK_SECONDS = 5.0
+    REPLICA_STICKY_SECONDS = 10  # users read from the primary this long after a write
+
+    # SQLite Production Config (ignored for other databases)
+    SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION', '1') == '1'  # WAL, busy timeout, tuned pragmas
+    SQLITE_BUSY_TIMEOUT = 15  # seconds to wait for the write lock
+    SQLITE_SYNCHRONOUS = 'FULL'  # fsync every commit; group commit keeps this affordable
+    SQLITE_CACHE_KB = 20000
+    SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+    SQLITE_WRITER_ENABLED = True  # route hot writes through one group-committing thread
+    SQLITE_WRITER_MAX_BATCH = 64  # writes per commit
+    SQLITE_WRITER_TIMEOUT = 20  # seconds a request waits for its write before giving up
+
     # JWT Config
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
@@ -20,16 +37,32 @@ class Config:
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
+    UPLOAD_IMAGE_VARIANTS = {'thumb': 128, 'medium': 512}  # name -> max side in px
+    UPLOAD_VARIANT_WORKERS = 1
+    UPLOAD_CACHE_MAX_AGE = 365 * 24 * 3600  # uploads are content-addressed
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE') == '1'  # behind nginx/apache
 
     # WhatsApp API Config
     WHATSAPP_API_URL = os.environ.get('WHATSAPP_API_URL') or 'https://graph.facebook.com/v18.0'
     WHATSAPP_ACCESS_TOKEN = os.environ.get('WHATSAPP_ACCESS_TOKEN')
     WHATSAPP_PHONE_ID = os.environ.get('WHATSAPP_PHONE_ID')
+    WHATSAPP_VERIFY_TOKEN = os.environ.get('WHATSAPP_VERIFY_TOKEN')  # webhook subscription; unset refuses it
+    WHATSAPP_APP_SECRET = os.environ.get('WHATSAPP_APP_SECRET')  # webhook signatures; unset refuses callbacks
+
+    WHATSAPP_TIMEOUT = (3, 5)  # connect, read seconds
 
     # SMS API Config (Twilio)
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
-    TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
+    TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')  # also signs status callbacks
     TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
+    TWILIO_API_URL = os.environ.get('TWILIO_API_URL')  # benchmarks only: replaces https://api.twilio.com with a local stub
+    SMS_TIMEOUT = 5  # seconds
+
+    # Provider Health Config (circuit breakers)
+    PROVIDER_FAILURE_THRESHOLD = 5  # consecutive failures before the circuit opens
+    PROVIDER_RESET_TIMEOUT = 30  # seconds before a half-open probe
+    PROVIDER_MAX_RETRIES = 1
+    PROVIDER_BACKOFF_BASE = 0.2  # seconds, jittered
 
     # AI/ML Config
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
@@ -38,6 +71,102 @@ class Config:
     EMERGENCY_HOTLINE = '108'  # India Emergency Number
     AMBULANCE_API_URL = os.environ.get('AMBULANCE_API_URL')
 
+    # Vitals Rollup Config (trend charts)
+    ROLLUP_UTC_OFFSET_MINUTES = 330  # day/week buckets follow IST
+    ROLLUP_FEVER_THRESHOLD = 100.4  # degrees F, as used by the risk model
+    ROLLUP_DEFAULT_RANGE = {'hour': timedelta(hours=48), 'day': timedelta(days=90), 'week': timedelta(weeks=52)}
+    ROLLUP_MAX_POINTS = 1000
+
+    # Geo Heatmap Config (web-mercator tiles)
+    GEO_ZOOM_LEVELS = [6, 8, 10, 12]  # state .. village scale
+    GEO_MAX_CELLS = 5000  # per tile request
+
+    # Analytics Snapshot Config (columnar copy of health records)
+    ANALYTICS_SNAPSHOT_DIR = os.environ.get('ANALYTICS_SNAPSHOT_DIR')  # shared .npy files; unset = per process
+    ANALYTICS_REFRESH_SECONDS = 60
+    ANALYTICS_OVERLAP_SECONDS = 120  # re-read window for late-committing transactions
+    ANALYTICS_CHUNK_SIZE = 10000
+
+    # Emergency Triage Config: head start (seconds of waiting) per severity
+    TRIAGE_SEVERITY_BOOST = {'critical': 3600, 'high': 1800, 'medium': 600, 'low': 0}
+    TRIAGE_RESYNC_INTERVAL = 30  # seconds between queue repairs from the database
+
+    # Emergency SLA Analytics Config (quantile sketches)
+    SLA_RELATIVE_ACCURACY = 0.01  # percentiles within 1% of the true value
+    SLA_BUCKET_SECONDS = 3600  # window granularity
+    SLA_RETENTION_DAYS = 90
+    SLA_FLUSH_INTERVAL = 10.0  # seconds between merges into Redis
+    SLA_WINDOWS = {'1h': 3600, '24h': 24 * 3600, '7d': 7 * 24 * 3600, '30d': 30 * 24 * 3600}
+
+    # Notification Outbox Config
+    OUTBOX_BATCH_SIZE = 50
+    OUTBOX_LEASE_SECONDS = 60  # per message, renewed before each send; must cover one send with retries and failover
+    OUTBOX_BACKOFF_BASE = 5  # seconds, doubled per attempt
+    OUTBOX_BACKOFF_MAX = 900
+    OUTBOX_POLL_INTERVAL = 1.0
+    OUTBOX_FAILOVER_MIN_PRIORITY = 2  # high/critical alerts: a failed send is retried at once on the other channel
+
+    # Communication Log Config (write-behind buffer)
+    LOG_FLUSH_SIZE = 500  # rows per bulk insert
+    LOG_FLUSH_INTERVAL = 2.0  # seconds
+    LOG_MAX_BUFFER = 50000
+
+    # Tracing Config (spans in Zipkin v2 JSON)
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', '1') == '1'
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))  # traceparent-sampled requests always record
+    TRACE_SERVICE_NAME = 'aarogya-sahayak'
+    TRACE_EXPORT_PATH = os.environ.get('TRACE_EXPORT_PATH')  # JSON lines; instance/traces.jsonl when nothing is set
+    TRACE_EXPORT_URL = os.environ.get('TRACE_EXPORT_URL')  # e.g. http://zipkin:9411/api/v2/spans
+    TRACE_EXPORT_MAX_BYTES = 50 * 1024 * 1024  # file is rotated to .1 past this
+    TRACE_FLUSH_INTERVAL = 2.0  # seconds
+    TRACE_MAX_BUFFER = 10000  # spans; newer ones are dropped past this
+    TRACE_SQL_MAX_LENGTH = 500  # characters of each statement kept
+
+    # Query Budget Config (see services/query_monitor.py and @query_budget)
+    QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', '1') == '1'
+    QUERY_BUDGET_DEFAULT = 20  # statements per request for views without @query_budget
+    QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT') == '1' or None  # raise; None = only when app.testing
+    SLOW_QUERY_MS = 200
+    SLOW_QUERY_EXPLAIN = True  # attach the plan of slow SELECTs
+    SLOW_QUERY_LOG_SIZE = 200  # entries kept
+    SLOW_QUERY_LOG_VALUES = os.environ.get('SLOW_QUERY_LOG_VALUES') == '1'  # else only parameter types/lengths
+    SLOW_QUERY_PARAM_LENGTH = 100  # characters kept per parameter value
+
+    # Health Probe Config (liveness/readiness)
+    PROBE_INTERVAL = 5.0  # seconds between background dependency checks
+    PROBE_FAILURE_THRESHOLD = 2  # failed database checks in a row before readiness fails
+    PROBE_TIMEOUT = 2.0  # connect/statement timeout per dependency check
+    PROBE_STALE_SECONDS = 30  # readiness fails once no check has completed for this long
+
+    # Profiling Config (admin-triggered; see services/profiler.py)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '1') == '1'
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')  # instance/profiles when unset
+    PROFILE_DIR_MAX_BYTES = 100 * 1024 * 1024  # oldest profiles are deleted past this
+    PROFILE_TOKEN_TTL = 300  # seconds an X-Profile token stays valid
+    PROFILE_MAX_SAMPLE_SECONDS = 60
+    PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+    PROFILE_TRACEMALLOC_FRAMES = 10
+    PROFILE_TOP_ALLOCATIONS = 50  # lines kept in each allocation report
+
+    # Delivery Status Webhook Config
+    STATUS_FLUSH_SIZE = 1000  # updates per batch
+    STATUS_FLUSH_INTERVAL = 1.0  # seconds
+    STATUS_MAX_RETRIES = 10  # retries for a log row that isn't written yet (backoff from LOG_FLUSH_INTERVAL)
+    STATUS_MAX_RETRY_DELAY = 60  # seconds
+
+    # Appointment Scheduling Config
+    CLINIC_TIMEZONE = os.environ.get('CLINIC_TIMEZONE') or 'Asia/Kolkata'  # times are stored in UTC, shown in this
+    APPOINTMENT_MAX_DURATION_MINUTES = 480
+    ASHA_WORKING_HOURS = (9, 17)  # local clinic hours used for availability
+
+    # Appointment Reminder Config
+    REMINDER_LEAD_HOURS = 24  # remind appointments starting within this window
+    REMINDER_BATCH_SIZE = 500
+    REMINDER_LEASE_SECONDS = 300  # margin on top of the sends' own time
+    REMINDER_SEND_SECONDS = 2.0  # worst-case time per reminder per channel; scales the batch lease
+    REMINDER_POLL_INTERVAL = 30
+    REMINDER_CHANNELS = ['sms']  # sms, whatsapp
+
     # Multilingual Config
     LANGUAGES = ['en', 'hi', 'bn', 'te', 'ta']  # English, Hindi, Bengali, Telugu, Tamil
 
@@ -46,5 +175,27 @@ class Config:
     RISK_THRESHOLD_HIGH = 0.8
     RISK_THRESHOLD_MEDIUM = 0.5
 
+    # Rate Limiting Config: endpoint -> {key kind: (requests, seconds)}
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted;
+    # 0 = the socket address is the client (never trust the header directly)
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT') or 0)
+    RATE_LIMITS = {
+        'verify_phone': {'phone': (3, 300), 'ip': (10, 300)},
+        'login': {'phone': (5, 300), 'ip': (30, 60)},
+        'verify_otp': {'phone': (5, 300), 'ip': (30, 300)},  # a 6-digit OTP must not be guessable
+        'sms_send': {'user': (30, 3600), 'recipient': (5, 3600)},
+    }
+
+    # Response Compression Config
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)  # bytes
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+
+    # Request Batching Config
+    BATCH_MAX_REQUESTS = 20
+    BATCH_MAX_WORKERS = 4
+    BATCH_PARALLEL_READS = True
+
     # Logging Config
     LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
@@ -4,5 +4,9 @@ from .health import HealthRecord
 from .appointment import Appointment
 from .emergency import EmergencyAlert
 from .communication import CommunicationLog
+from .outbox import OutboxMessage
+from .patient_summary import PatientSummary
+from .rollup import VitalsRollup
+from .geo_cell import GeoCell
 
-__all__ = ['db', 'User', 'HealthRecord', 'Appointment', 'EmergencyAlert', 'CommunicationLog']
+__all__ = ['db', 'User', 'HealthRecord', 'Appointment', 'EmergencyAlert', 'CommunicationLog', 'OutboxMessage', 'PatientSummary', 'VitalsRollup', 'GeoCell']
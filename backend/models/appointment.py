@@ -12,20 +12,29 @@ class Appointment(db.Model):
     # Appointment Details
     appointment_date = db.Column(db.DateTime, nullable=False, index=True)
     appointment_type = db.Column(db.String(50), nullable=False)  # checkup, vaccination, emergency
+    duration_minutes = db.Column(db.Integer, nullable=False, default=30)
     status = db.Column(db.String(20), default='scheduled')  # scheduled, completed, cancelled
 
     # Location and Notes
     location = db.Column(db.String(255), nullable=True)
     notes = db.Column(db.Text, nullable=True)
     reminder_sent = db.Column(db.Boolean, default=False)
+    reminder_locked_until = db.Column(db.DateTime, nullable=True)  # scheduler lease
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_appointments_reminder_due', 'reminder_sent', 'appointment_date'),
+        db.Index('ix_appointments_worker_schedule', 'asha_worker_id', 'appointment_date'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
             'patient_id': self.patient_id,
+            'asha_worker_id': self.asha_worker_id,
             'appointment_date': self.appointment_date.isoformat(),
+            'duration_minutes': self.duration_minutes,
             'appointment_type': self.appointment_type,
             'status': self.status,
             'location': self.location,
@@ -1,3 +1,37 @@
+from flask import request, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
 
-db = SQLAlchemy()
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """Session that reads from the replica bind inside @read_only requests
+
+    Only when the request opted in ('db.replica' in its WSGI environ, set by
+    utils.replica; per request, so batch sub-requests don't share it) and
+    the session hasn't written yet: once it flushes or runs a DML statement
+    every later query goes to the primary, so a request always reads its
+    own writes.
+    """
+
+    wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and getattr(clause, 'is_dml', False):
+            self.mark_written()
+        elif bind is None and not self.wrote and not self._flushing and has_request_context() \
+                and request.environ.get('db.replica') and REPLICA_BIND in self._db.engines:
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def mark_written(self):
+        self.wrote = True
+        if has_request_context():
+            request.environ['db.wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.mark_written()
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
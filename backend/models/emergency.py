@@ -19,25 +19,30 @@ class EmergencyAlert(db.Model):
     address = db.Column(db.String(255), nullable=True)
 
     # Response
-    status = db.Column(db.String(20), default='active')  # active, responded, resolved
+    status = db.Column(db.String(20), default='active', index=True)  # active, responded, resolved
     responder_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
     response_time = db.Column(db.DateTime, nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     resolved_at = db.Column(db.DateTime, nullable=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'patient_id': self.patient_id,
-            'alert_type': self.alert_type,
-            'severity': self.severity,
-            'description': self.description,
-            'location': {
-                'lat': self.location_lat,
-                'lng': self.location_lng,
-                'address': self.address
-            },
-            'status': self.status,
-            'created_at': self.created_at.isoformat()
-        }
+    # API field -> (source columns, getter); see utils/fields.py for ?fields= support
+    API_FIELDS = {
+        'id': (['id'], lambda r: r.id),
+        'patient_id': (['patient_id'], lambda r: r.patient_id),
+        'alert_type': (['alert_type'], lambda r: r.alert_type),
+        'severity': (['severity'], lambda r: r.severity),
+        'description': (['description'], lambda r: r.description),
+        'location': (['location_lat', 'location_lng', 'address'], lambda r: {
+            'lat': r.location_lat,
+            'lng': r.location_lng,
+            'address': r.address
+        }),
+        'status': (['status'], lambda r: r.status),
+        'responder_id': (['responder_id'], lambda r: r.responder_id),
+        'response_time': (['response_time'], lambda r: r.response_time.isoformat() if r.response_time else None),
+        'created_at': (['created_at'], lambda r: r.created_at.isoformat())
+    }
+
+    def to_dict(self, fields=None):
+        return {name: self.API_FIELDS[name][1](self) for name in fields or self.API_FIELDS}
@@ -0,0 +1,36 @@
+from datetime import datetime
+from .database import db
+
+class GeoCell(db.Model):
+    """Aggregates for one web-mercator map tile (quadkey) at one zoom level"""
+    __tablename__ = 'geo_cells'
+
+    quadkey = db.Column(db.String(24), primary_key=True)  # length == zoom
+    zoom = db.Column(db.Integer, nullable=False)
+    tile_x = db.Column(db.Integer, nullable=False)
+    tile_y = db.Column(db.Integer, nullable=False)
+
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+    high_risk_count = db.Column(db.Integer, nullable=False, default=0)
+    fever_count = db.Column(db.Integer, nullable=False, default=0)
+    alert_count = db.Column(db.Integer, nullable=False, default=0)
+    active_alert_count = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_geo_cells_viewport', 'zoom', 'tile_x', 'tile_y'),
+    )
+
+    def to_dict(self):
+        return {
+            'quadkey': self.quadkey,
+            'zoom': self.zoom,
+            'x': self.tile_x,
+            'y': self.tile_y,
+            'record_count': self.record_count,
+            'high_risk_count': self.high_risk_count,
+            'fever_count': self.fever_count,
+            'alert_count': self.alert_count,
+            'active_alert_count': self.active_alert_count
+        }
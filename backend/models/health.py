@@ -31,19 +31,24 @@ class HealthRecord(db.Model):
 
     # Metadata
     recorded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # when the server received it
     location_lat = db.Column(db.Float, nullable=True)
     location_lng = db.Column(db.Float, nullable=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'patient_id': self.patient_id,
-            'blood_pressure': f"{self.blood_pressure_systolic}/{self.blood_pressure_diastolic}" if self.blood_pressure_systolic else None,
-            'heart_rate': self.heart_rate,
-            'temperature': self.temperature,
-            'weight': self.weight,
-            'symptoms': self.symptoms,
-            'risk_level': self.risk_level,
-            'risk_score': self.risk_score,
-            'recorded_at': self.recorded_at.isoformat() if self.recorded_at else None
-        }
+    # API field -> (source columns, getter); see utils/fields.py for ?fields= support
+    API_FIELDS = {
+        'id': (['id'], lambda r: r.id),
+        'patient_id': (['patient_id'], lambda r: r.patient_id),
+        'blood_pressure': (['blood_pressure_systolic', 'blood_pressure_diastolic'],
+                           lambda r: f"{r.blood_pressure_systolic}/{r.blood_pressure_diastolic}" if r.blood_pressure_systolic else None),
+        'heart_rate': (['heart_rate'], lambda r: r.heart_rate),
+        'temperature': (['temperature'], lambda r: r.temperature),
+        'weight': (['weight'], lambda r: r.weight),
+        'symptoms': (['symptoms'], lambda r: r.symptoms),
+        'risk_level': (['risk_level'], lambda r: r.risk_level),
+        'risk_score': (['risk_score'], lambda r: r.risk_score),
+        'recorded_at': (['recorded_at'], lambda r: r.recorded_at.isoformat() if r.recorded_at else None)
+    }
+
+    def to_dict(self, fields=None):
+        return {name: self.API_FIELDS[name][1](self) for name in fields or self.API_FIELDS}
@@ -0,0 +1,47 @@
+from datetime import datetime
+import uuid
+from .database import db
+
+class OutboxMessage(db.Model):
+    """Notification written in the same transaction as the event that caused it"""
+    __tablename__ = 'outbox_messages'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    # Delivery
+    channel = db.Column(db.String(20), nullable=False)  # sms, whatsapp
+    recipient = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=0)  # higher is sent first
+
+    # Source event
+    source_type = db.Column(db.String(50), nullable=True)  # emergency_alert
+    source_id = db.Column(db.String(36), nullable=True)
+    traceparent = db.Column(db.String(55), nullable=True)  # trace of the request that queued it
+
+    # Dispatch state
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processing, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=8)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_outbox_due', 'status', 'priority', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'channel': self.channel,
+            'recipient': self.recipient,
+            'priority': self.priority,
+            'status': self.status,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
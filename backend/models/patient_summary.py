@@ -0,0 +1,55 @@
+from datetime import datetime
+from .database import db
+
+class PatientSummary(db.Model):
+    """Latest vitals and risk per patient, kept in step with health_records"""
+    __tablename__ = 'patient_summary'
+
+    patient_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Latest record
+    latest_record_id = db.Column(db.String(36), nullable=True)
+    latest_recorded_at = db.Column(db.DateTime, nullable=True)
+    blood_pressure_systolic = db.Column(db.Integer, nullable=True)
+    blood_pressure_diastolic = db.Column(db.Integer, nullable=True)
+    heart_rate = db.Column(db.Integer, nullable=True)
+    temperature = db.Column(db.Float, nullable=True)
+    weight = db.Column(db.Float, nullable=True)
+    oxygen_saturation = db.Column(db.Float, nullable=True)
+    symptoms = db.Column(db.Text, nullable=True)
+    risk_score = db.Column(db.Float, nullable=True)
+    risk_level = db.Column(db.String(10), nullable=True, index=True)
+
+    # Latest record entered by someone else (ASHA visit)
+    last_visit_at = db.Column(db.DateTime, nullable=True)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def recent_vitals(self):
+        """Latest record in the same shape as HealthRecord.to_dict()"""
+        if not self.latest_record_id:
+            return None
+        return {
+            'id': self.latest_record_id,
+            'patient_id': self.patient_id,
+            'blood_pressure': f"{self.blood_pressure_systolic}/{self.blood_pressure_diastolic}" if self.blood_pressure_systolic else None,
+            'heart_rate': self.heart_rate,
+            'temperature': self.temperature,
+            'weight': self.weight,
+            'symptoms': self.symptoms,
+            'risk_level': self.risk_level,
+            'risk_score': self.risk_score,
+            'recorded_at': self.latest_recorded_at.isoformat() if self.latest_recorded_at else None
+        }
+
+    def to_dict(self):
+        return {
+            'patient_id': self.patient_id,
+            'record_count': self.record_count,
+            'recent_vitals': self.recent_vitals(),
+            'risk_level': self.risk_level or 'unknown',
+            'risk_score': self.risk_score,
+            'last_visit_at': self.last_visit_at.isoformat() if self.last_visit_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,38 @@
+from datetime import datetime
+from .database import db
+
+class VitalsRollup(db.Model):
+    """Additive vitals/risk totals per area and time bucket, for trend charts"""
+    __tablename__ = 'vitals_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day, week
+    area_type = db.Column(db.String(10), nullable=False)  # village, district
+    area = db.Column(db.String(100), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)  # local time (ROLLUP_UTC_OFFSET_MINUTES)
+
+    # Sums and counts only, so late records can be added to any past bucket
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+    bp_count = db.Column(db.Integer, nullable=False, default=0)
+    systolic_sum = db.Column(db.Float, nullable=False, default=0)
+    diastolic_sum = db.Column(db.Float, nullable=False, default=0)
+    temperature_count = db.Column(db.Integer, nullable=False, default=0)
+    fever_count = db.Column(db.Integer, nullable=False, default=0)
+    risk_count = db.Column(db.Integer, nullable=False, default=0)
+    high_risk_count = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'area_type', 'area', 'bucket_start', name='uq_vitals_rollup_bucket'),
+    )
+
+    def to_dict(self):
+        return {
+            'bucket_start': self.bucket_start.isoformat(),
+            'record_count': self.record_count,
+            'avg_systolic': round(self.systolic_sum / self.bp_count, 1) if self.bp_count else None,
+            'avg_diastolic': round(self.diastolic_sum / self.bp_count, 1) if self.bp_count else None,
+            'fever_rate': round(self.fever_count / self.temperature_count, 3) if self.temperature_count else None,
+            'high_risk_share': round(self.high_risk_count / self.risk_count, 3) if self.risk_count else None
+        }
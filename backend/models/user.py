@@ -19,8 +19,8 @@ class User(db.Model):
 
     # Role and Location
     role = db.Column(db.String(20), nullable=False, default='patient')  # patient, asha, admin
-    village = db.Column(db.String(100), nullable=True)
-    district = db.Column(db.String(100), nullable=True)
+    village = db.Column(db.String(100), nullable=True, index=True)
+    district = db.Column(db.String(100), nullable=True, index=True)
     state = db.Column(db.String(100), nullable=True)
     pincode = db.Column(db.String(10), nullable=True)
 
@@ -36,9 +36,12 @@ class User(db.Model):
     last_login = db.Column(db.DateTime, nullable=True)
 
     # Relationships
-    health_records = db.relationship('HealthRecord', backref='patient', lazy='dynamic')
-    appointments = db.relationship('Appointment', backref='patient', lazy='dynamic')
-    emergency_alerts = db.relationship('EmergencyAlert', backref='patient', lazy='dynamic')
+    health_records = db.relationship('HealthRecord', backref='patient', lazy='dynamic',
+                                     foreign_keys='HealthRecord.patient_id')
+    appointments = db.relationship('Appointment', backref='patient', lazy='dynamic',
+                                   foreign_keys='Appointment.patient_id')
+    emergency_alerts = db.relationship('EmergencyAlert', backref='patient', lazy='dynamic',
+                                       foreign_keys='EmergencyAlert.patient_id')
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -46,17 +49,21 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'phone_number': self.phone_number,
-            'email': self.email,
-            'full_name': self.full_name,
-            'role': self.role,
-            'village': self.village,
-            'district': self.district,
-            'preferred_language': self.preferred_language,
-            'profile_photo': self.profile_photo,
-            'is_verified': self.is_verified,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    # API field -> (source columns, getter); see utils/fields.py for ?fields= support
+    API_FIELDS = {
+        'id': (['id'], lambda r: r.id),
+        'phone_number': (['phone_number'], lambda r: r.phone_number),
+        'email': (['email'], lambda r: r.email),
+        'full_name': (['full_name'], lambda r: r.full_name),
+        'role': (['role'], lambda r: r.role),
+        'village': (['village'], lambda r: r.village),
+        'district': (['district'], lambda r: r.district),
+        'preferred_language': (['preferred_language'], lambda r: r.preferred_language),
+        'profile_photo': (['profile_photo'], lambda r: r.profile_photo),
+        'profile_photo_thumb': (['profile_photo'], lambda r: f"{r.profile_photo}?size=thumb" if r.profile_photo else None),
+        'is_verified': (['is_verified'], lambda r: r.is_verified),
+        'created_at': (['created_at'], lambda r: r.created_at.isoformat() if r.created_at else None)
+    }
+
+    def to_dict(self, fields=None):
+        return {name: self.API_FIELDS[name][1](self) for name in fields or self.API_FIELDS}
@@ -3,5 +3,9 @@ from .health import health_bp
 from .emergency import emergency_bp
 from .communication import communication_bp
 from .admin import admin_bp
+from .batch import batch_bp
+from .media import media_bp
+from .webhooks import webhooks_bp
 
-__all__ = ['auth_bp', 'health_bp', 'emergency_bp', 'communication_bp', 'admin_bp']
+__all__ = ['auth_bp', 'health_bp', 'emergency_bp', 'communication_bp', 'admin_bp', 'batch_bp', 'media_bp',
+           'webhooks_bp']
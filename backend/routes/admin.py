@@ -1,6 +1,12 @@
-from flask import Blueprint, request, jsonify
+import os
+from flask import Blueprint, request, jsonify, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, HealthRecord
+from utils.replica import read_only
+from utils.query_budget import query_budget
+from utils.fields import parse_fields, select_columns, serialize_rows
+from services.geo_tiles import viewport_zoom, cells_in_view
+from services.analytics_snapshot import SnapshotNotReady
 from functools import wraps
 
 admin_bp = Blueprint('admin', __name__)
@@ -15,42 +21,226 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def admin_only(f):
+    """Like admin_required, without the ASHA worker exception"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user = User.query.get(get_jwt_identity())
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
 @admin_bp.route('/dashboard/stats', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 @admin_required
+@read_only
 def get_admin_dashboard_stats():
     """Get admin dashboard statistics"""
     try:
-        stats = {
-            'total_users': User.query.count(),
-            'total_patients': User.query.filter_by(role='patient').count(),
-            'total_asha_workers': User.query.filter_by(role='asha').count(),
-            'total_health_records': HealthRecord.query.count(),
-            'high_risk_patients': HealthRecord.query.filter_by(risk_level='high').count()
-        }
+        # One round trip instead of a query per count
+        count = lambda column, *where: db.select(db.func.count(column)).where(*where).scalar_subquery()
+        stats = db.session.execute(db.select(
+            count(User.id).label('total_users'),
+            count(User.id, User.role == 'patient').label('total_patients'),
+            count(User.id, User.role == 'asha').label('total_asha_workers'),
+            count(HealthRecord.id).label('total_health_records'),
+            count(HealthRecord.id, HealthRecord.risk_level == 'high').label('high_risk_patients')
+        )).one()
 
-        return jsonify(stats), 200
+        return jsonify(dict(stats._mapping)), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/users', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 @admin_required
+@read_only
 def get_users():
     """Get list of users"""
     try:
         role = request.args.get('role')
-        query = User.query
+        fields, error = parse_fields(User)
+        if error:
+            return jsonify({'error': error}), 400
+
+        query = db.select(*select_columns(User, fields))
 
         if role:
-            query = query.filter_by(role=role)
+            query = query.where(User.role == role)
+
+        users = db.session.execute(query.limit(100)).all()
+
+        return jsonify({
+            'users': serialize_rows(User, users, fields)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/providers/health', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+@admin_required
+def get_provider_health():
+    """Get circuit breaker state and latency per messaging provider"""
+    try:
+        return jsonify({
+            'providers': current_app.provider_health.snapshot()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/emergency/sla', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+@admin_required
+def get_emergency_sla():
+    """Get time-to-response and time-to-resolution percentiles for alerts"""
+    try:
+        windows = current_app.config['SLA_WINDOWS']
+        window = request.args.get('window', '24h')
+        if window not in windows:
+            return jsonify({'error': f"window must be one of: {', '.join(windows)}"}), 400
+
+        report = current_app.response_sla.report(
+            windows[window],
+            district=request.args.get('district'),
+            severity=request.args.get('severity')
+        )
+
+        return jsonify(dict(report, window=window)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/geo/tiles', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+@admin_required
+@read_only
+def get_geo_tiles():
+    """Get risk/fever/alert aggregates for map cells inside a viewport"""
+    try:
+        bbox = request.args.get('bbox', '')
+        try:
+            min_lng, min_lat, max_lng, max_lat = [float(value) for value in bbox.split(',')]
+        except ValueError:
+            return jsonify({'error': 'bbox must be min_lng,min_lat,max_lng,max_lat'}), 400
+        try:
+            zoom = viewport_zoom(int(request.args.get('zoom', 8)))
+        except ValueError:
+            return jsonify({'error': 'zoom must be an integer'}), 400
 
-        users = query.limit(100).all()
+        limit = current_app.config['GEO_MAX_CELLS']
+        cells = cells_in_view(zoom, min_lat, min_lng, max_lat, max_lng, limit + 1)
+        if len(cells) > limit:
+            return jsonify({'error': 'Too many cells in view; zoom in or use a smaller zoom level'}), 400
 
         return jsonify({
-            'users': [user.to_dict() for user in users]
+            'zoom': zoom,
+            'cells': [cell.to_dict() for cell in cells]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/analytics/query', methods=['POST'])
+@query_budget(5)
+@jwt_required()
+@admin_required
+def query_analytics():
+    """Run a cohort filter/group/aggregate query over the records snapshot"""
+    try:
+        data = request.get_json() or {}
+        result = current_app.analytics.query(
+            filters=data.get('filters'),
+            group_by=data.get('group_by'),
+            metrics=data.get('metrics') or ['count']
+        )
+        return jsonify(result), 200
+
+    except SnapshotNotReady as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiles/token', methods=['POST'])
+@jwt_required()
+@admin_only
+def create_profile_token():
+    """Issue a token that profiles requests sending it in X-Profile"""
+    try:
+        data = request.get_json(silent=True) or {}
+        token, ttl = current_app.profiler.issue_token(data.get('ttl_seconds'))
+        return jsonify({'token': token, 'header': 'X-Profile', 'expires_in': ttl}), 201
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiles/sample', methods=['POST'])
+@jwt_required()
+@admin_only
+def start_profile_sample():
+    """Sample the worker handling this request for N seconds"""
+    try:
+        data = request.get_json(silent=True) or {}
+        profile_id = current_app.profiler.start_sampling(data.get('seconds', 10))
+        return jsonify({'id': profile_id, 'pid': os.getpid()}), 202
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+@admin_only
+def list_profiles():
+    """List stored profiles, newest first"""
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        return jsonify({'profiles': current_app.profiler.list_profiles(limit)}), 200
+
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiles/files/<name>', methods=['GET'])
+@jwt_required()
+@admin_only
+def download_profile_file(name):
+    """Download one profile artifact (.pstats, .collapsed, .alloc.txt)"""
+    path = current_app.profiler.file_path(name)
+    if not path:
+        return jsonify({'error': 'Profile file not found'}), 404
+    return send_file(path, as_attachment=True, download_name=name)
+
+@admin_bp.route('/queries', methods=['GET'])
+@jwt_required()
+@admin_only
+def get_query_report():
+    """Get the slow-query log and over-budget request counts per endpoint"""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 200)
+        return jsonify({
+            'slow_queries': current_app.query_monitor.slow_queries(limit),
+            'over_budget': current_app.query_monitor.violations(),
+            'slow_query_ms': current_app.query_monitor.slow_seconds * 1000
         }), 200
 
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
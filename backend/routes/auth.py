@@ -1,11 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 from models import db, User
+from utils.replica import read_only
+from utils.query_budget import query_budget
+from utils.http_cache import make_etag, not_modified, tag_response
+from utils.rate_limit import rate_limit
 from datetime import datetime
 import re
-import os
 from werkzeug.utils import secure_filename
-import uuid
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -13,6 +15,7 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 @auth_bp.route('/register', methods=['POST'])
+@query_budget(4)
 def register():
     """Register a new user (Patient or ASHA worker)"""
     try:
@@ -56,6 +59,7 @@ def register():
         user.set_password(data['password'])
         db.session.add(user)
         db.session.commit()
+        current_app.change_tracker.bump('users:all')
 
         # Create JWT tokens
         access_token = create_access_token(identity=user.id)
@@ -65,7 +69,7 @@ def register():
         try:
             welcome_message = f"स्वागत है {user.full_name}! आरोग्य सहायक में आपका पंजीकरण सफल हुआ। आपका स्वास्थ्य हमारी प्राथमिकता है।"
             if current_app.sms:
-                current_app.sms.send_sms(user.phone_number, welcome_message)
+                current_app.sms.send_sms(user.phone_number, welcome_message, user_id=user.id)
         except Exception as e:
             print(f"Welcome SMS failed: {e}")
 
@@ -80,7 +84,22 @@ def register():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _touch_last_login(user_id, moment):
+    """Write job: record a successful login"""
+    db.session.execute(db.update(User).where(User.id == user_id).values(last_login=moment))
+
+def _log_touch_failure(future):
+    # Nobody waits on the deferred last_login write; don't let it fail silently
+    if future.exception():
+        print(f"Last login update failed: {future.exception()}")
+
+def _mark_verified(phone_number):
+    """Write job: mark a phone number's account as verified"""
+    db.session.execute(db.update(User).where(User.phone_number == phone_number).values(is_verified=True))
+
 @auth_bp.route('/login', methods=['POST'])
+@query_budget(4)
+@rate_limit('login')
 def login():
     """User login with phone number and password"""
     try:
@@ -101,9 +120,9 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 401
 
-        # Update last login
-        user.last_login = datetime.utcnow()
-        db.session.commit()
+        # Update last login; nothing below needs it, so don't wait for the write
+        touched = current_app.db_writer.defer(_touch_last_login, user.id, datetime.utcnow())
+        touched.add_done_callback(_log_touch_failure)
 
         # Create JWT tokens
         access_token = create_access_token(identity=user.id)
@@ -120,7 +139,9 @@ def login():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
+@query_budget(2)
 @jwt_required()
+@read_only
 def get_profile():
     """Get current user profile"""
     try:
@@ -130,9 +151,17 @@ def get_profile():
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        return jsonify({
+        # updated_at changes on every write to the row
+        last_modified = user.updated_at or user.created_at
+        etag = make_etag('profile', user.id, last_modified.isoformat() if last_modified else '')
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+
+        response = jsonify({
             'user': user.to_dict()
-        }), 200
+        })
+        return tag_response(response, etag, last_modified), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -157,18 +186,9 @@ def upload_profile_photo():
             return jsonify({'error': 'No file selected'}), 400
 
         if file and allowed_file(file.filename):
-            # Create uploads directory if it doesn't exist
-            upload_dir = current_app.config['UPLOAD_FOLDER']
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-
-            # Generate unique filename
+            # Stream to disk under its content hash; thumbnails follow in the background
             file_extension = file.filename.rsplit('.', 1)[1].lower()
-            filename = f"{user_id}_{uuid.uuid4().hex}.{file_extension}"
-            file_path = os.path.join(upload_dir, filename)
-
-            # Save file
-            file.save(file_path)
+            filename = current_app.media_storage.save(file, file_extension)
 
             # Update user profile photo path
             user.profile_photo = f"/uploads/{filename}"
@@ -177,7 +197,8 @@ def upload_profile_photo():
 
             return jsonify({
                 'message': 'Profile photo uploaded successfully',
-                'profile_photo': user.profile_photo
+                'profile_photo': user.profile_photo,
+                'profile_photo_thumb': f"{user.profile_photo}?size=thumb"
             }), 200
 
         return jsonify({'error': 'Invalid file type'}), 400
@@ -187,6 +208,7 @@ def upload_profile_photo():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/verify-phone', methods=['POST'])
+@rate_limit('verify_phone')
 def verify_phone():
     """Send OTP for phone verification"""
     try:
@@ -220,6 +242,7 @@ def verify_phone():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/verify-otp', methods=['POST'])
+@rate_limit('verify_otp')
 def verify_otp():
     """Verify OTP for phone verification"""
     try:
@@ -242,10 +265,7 @@ def verify_otp():
             return jsonify({'error': 'Invalid OTP'}), 400
 
         # Mark user as verified if they exist
-        user = User.query.filter_by(phone_number=phone_number).first()
-        if user:
-            user.is_verified = True
-            db.session.commit()
+        current_app.db_writer.submit(_mark_verified, phone_number)
 
         # Delete used OTP
         if current_app.redis:
@@ -0,0 +1,115 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from concurrent.futures import ThreadPoolExecutor
+
+batch_bp = Blueprint('batch', __name__)
+
+ALLOWED_METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Client headers that sub-requests may carry (conditional requests, mostly)
+FORWARDED_HEADERS = ['If-None-Match', 'If-Modified-Since']
+
+# Headers of the batch request itself that every sub-request carries
+CALLER_HEADERS = ['Authorization', 'X-Forwarded-For']
+
+def _validate(sub_requests):
+    """Return an error message for a malformed batch, or None"""
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return 'requests must be a non-empty list'
+
+    max_requests = current_app.config.get('BATCH_MAX_REQUESTS', 20)
+    if len(sub_requests) > max_requests:
+        return f'At most {max_requests} requests per batch'
+
+    for index, sub in enumerate(sub_requests):
+        if not isinstance(sub, dict) or not sub.get('path'):
+            return f'requests[{index}].path is required'
+        if not sub['path'].startswith('/api/') or sub['path'].startswith('/api/batch'):
+            return f'requests[{index}].path must be an API endpoint'
+        if sub.get('method', 'GET').upper() not in ALLOWED_METHODS:
+            return f'requests[{index}].method is not supported'
+
+    return None
+
+def _caller():
+    """Headers and WSGI environ every sub-request inherits from the batch
+
+    Sub-requests run as the same client: its token, and its address, so
+    per-IP rate limits count them like direct calls.
+    """
+    headers = {name: request.headers[name] for name in CALLER_HEADERS if name in request.headers}
+    return headers, {'REMOTE_ADDR': request.remote_addr}
+
+def _dispatch(app, sub, caller):
+    """Run one sub-request through the normal Flask dispatch path"""
+    caller_headers, environ_base = caller
+    headers = {name: sub['headers'][name] for name in FORWARDED_HEADERS
+               if name in (sub.get('headers') or {})}
+    headers.update(caller_headers)
+
+    # A fresh app context gives the sub-request its own g and db session
+    # rather than the batch request's
+    with app.app_context(), app.test_request_context(
+        sub['path'],
+        method=sub.get('method', 'GET').upper(),
+        headers=headers,
+        json=sub.get('body'),
+        environ_base=environ_base
+    ):
+        response = app.full_dispatch_request()
+
+    return {
+        'id': sub.get('id'),
+        'status': response.status_code,
+        'headers': {name: response.headers[name] for name in ('ETag', 'Last-Modified')
+                    if name in response.headers},
+        'body': response.get_json(silent=True)
+    }
+
+def _dispatch_parallel(app, subs, caller):
+    """Run independent read-only sub-requests on worker threads"""
+    max_workers = min(len(subs), current_app.config.get('BATCH_MAX_WORKERS', 4))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_dispatch, app, sub, caller) for sub in subs]
+        return [future.result() for future in futures]
+
+@batch_bp.route('', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """Run several API calls in one round trip"""
+    try:
+        data = request.get_json() or {}
+        sub_requests = data.get('requests')
+
+        error = _validate(sub_requests)
+        if error:
+            return jsonify({'error': error}), 400
+
+        app = current_app._get_current_object()
+        caller = _caller()
+        parallel = current_app.config.get('BATCH_PARALLEL_READS', True)
+
+        # Consecutive GETs run together; any write is a barrier so later
+        # sub-requests see what it committed
+        responses = []
+        pending_reads = []
+        for sub in sub_requests + [None]:
+            if sub is not None and sub.get('method', 'GET').upper() == 'GET':
+                pending_reads.append(sub)
+                continue
+
+            if len(pending_reads) > 1 and parallel:
+                responses.extend(_dispatch_parallel(app, pending_reads, caller))
+            else:
+                responses.extend(_dispatch(app, read, caller) for read in pending_reads)
+            pending_reads = []
+
+            if sub is not None:
+                responses.append(_dispatch(app, sub, caller))
+
+        return jsonify({
+            'responses': responses
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
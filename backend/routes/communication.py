@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User
+from utils.query_budget import query_budget
+from utils.rate_limit import rate_limit
 
 communication_bp = Blueprint('communication', __name__)
 
@@ -18,7 +20,7 @@ def send_whatsapp_message():
 
         success = False
         if current_app.whatsapp:
-            success = current_app.whatsapp.send_message(recipient, message)
+            success = current_app.whatsapp.send_message(recipient, message, user_id=get_jwt_identity())
 
         return jsonify({
             'message': 'WhatsApp message sent' if success else 'Message failed',
@@ -30,6 +32,7 @@ def send_whatsapp_message():
 
 @communication_bp.route('/sms/send', methods=['POST'])
 @jwt_required()
+@rate_limit('sms_send')
 def send_sms_message():
     """Send SMS message"""
     try:
@@ -42,7 +45,7 @@ def send_sms_message():
 
         success = False
         if current_app.sms:
-            success = current_app.sms.send_sms(recipient, message)
+            success = current_app.sms.send_sms(recipient, message, user_id=get_jwt_identity())
 
         return jsonify({
             'message': 'SMS sent' if success else 'SMS failed',
@@ -53,6 +56,7 @@ def send_sms_message():
         return jsonify({'error': str(e)}), 500
 
 @communication_bp.route('/broadcast', methods=['POST'])
+@query_budget(3)
 @jwt_required()
 def broadcast_message():
     """Broadcast health message to community"""
@@ -69,23 +73,23 @@ def broadcast_message():
         if not message:
             return jsonify({'error': 'Message required'}), 400
 
-        # Get patients in the area
-        patients = User.query.filter_by(
-            village=current_user.village,
-            role='patient'
-        ).all()
-
-        recipients = [p.phone_number for p in patients]
+        # Get patients in the area (phone numbers only, no User objects)
+        recipients = db.session.execute(
+            db.select(User.phone_number).where(
+                User.village == current_user.village,
+                User.role == 'patient'
+            )
+        ).scalars().all()
 
         # Send messages
         sms_results = []
         whatsapp_results = []
 
         if current_app.sms:
-            sms_results = current_app.sms.send_bulk_sms(recipients, message)
+            sms_results = current_app.sms.send_bulk_sms(recipients, message, user_id=user_id)
 
         if current_app.whatsapp:
-            whatsapp_results = current_app.whatsapp.send_bulk_message(recipients, message)
+            whatsapp_results = current_app.whatsapp.send_bulk_message(recipients, message, user_id=user_id)
 
         return jsonify({
             'message': 'Broadcast sent',
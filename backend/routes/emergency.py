@@ -1,11 +1,18 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, EmergencyAlert
+from services.outbox import enqueue, SEVERITY_PRIORITY
+from services.geo_tiles import update_cells
+from utils.replica import read_only
+from utils.query_budget import query_budget
+from utils.http_cache import make_etag, not_modified, tag_response
+from utils.fields import parse_fields, select_columns, serialize_rows
 from datetime import datetime
 
 emergency_bp = Blueprint('emergency', __name__)
 
 @emergency_bp.route('/alert', methods=['POST'])
+@query_budget(10)
 @jwt_required()
 def create_emergency_alert():
     """Create emergency alert"""
@@ -24,21 +31,25 @@ def create_emergency_alert():
         )
 
         db.session.add(alert)
-        db.session.commit()
+        db.session.flush()
 
         # Get patient information
         patient = User.query.get(user_id)
 
-        # Send emergency notifications
+        # Stage emergency notifications in the same transaction; the outbox
+        # dispatcher delivers them, so a slow provider can't delay this response
         if patient.emergency_contact:
-            try:
-                message = f"🚨 आपातकाल: {patient.full_name} को तत्काल सहायता चाहिए। स्थान: {alert.address or 'GPS shared'}"
-                if current_app.sms:
-                    current_app.sms.send_sms(patient.emergency_contact, message)
-                if current_app.whatsapp:
-                    current_app.whatsapp.send_message(patient.emergency_contact, message)
-            except Exception as e:
-                print(f"Emergency notification failed: {e}")
+            message = f"🚨 आपातकाल: {patient.full_name} को तत्काल सहायता चाहिए। स्थान: {alert.address or 'GPS shared'}"
+            priority = SEVERITY_PRIORITY.get(alert.severity, 0)
+            for channel in ('sms', 'whatsapp'):
+                enqueue(channel, patient.emergency_contact, message, priority,
+                        source_type='emergency_alert', source_id=alert.id)
+
+        update_cells(alert.location_lat, alert.location_lng, alert_count=1, active_alert_count=1)
+
+        db.session.commit()
+        current_app.triage.push(alert)
+        current_app.change_tracker.bump(f'alerts:patient:{user_id}', 'alerts:all')
 
         return jsonify({
             'message': 'Emergency alert created successfully',
@@ -50,26 +61,154 @@ def create_emergency_alert():
         return jsonify({'error': str(e)}), 500
 
 @emergency_bp.route('/alerts', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@read_only
 def get_emergency_alerts():
     """Get emergency alerts"""
     try:
         user_id = get_jwt_identity()
         current_user = User.query.get(user_id)
 
+        fields, error = parse_fields(EmergencyAlert)
+        if error:
+            return jsonify({'error': error}), 400
+
         if current_user.role == 'patient':
-            alerts = EmergencyAlert.query.filter_by(patient_id=user_id).order_by(
+            versions = current_app.change_tracker.versions(f'alerts:patient:{user_id}')
+            etag = make_etag('alerts', user_id, ','.join(fields or []), *versions) if versions else None
+        else:
+            versions = current_app.change_tracker.versions('alerts:all')
+            etag = make_etag('alerts', 'all', ','.join(fields or []), *versions) if versions else None
+
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        query = db.select(*select_columns(EmergencyAlert, fields))
+        if current_user.role == 'patient':
+            query = query.where(EmergencyAlert.patient_id == user_id).order_by(
                 EmergencyAlert.created_at.desc()
-            ).all()
+            )
         else:
             # ASHA/Admin sees all alerts
-            alerts = EmergencyAlert.query.order_by(
+            query = query.order_by(
                 EmergencyAlert.created_at.desc()
-            ).limit(50).all()
+            ).limit(50)
+
+        alerts = db.session.execute(query).all()
 
+        response = jsonify({
+            'alerts': serialize_rows(EmergencyAlert, alerts, fields)
+        })
+        return tag_response(response, etag), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _record_sla(alert, **transitions):
+    """Feed the alert's completed durations into the SLA sketches"""
+    district = db.session.execute(
+        db.select(User.district).where(User.id == alert.patient_id)
+    ).scalar()
+    current_app.response_sla.record_alert(alert, district, **transitions)
+
+def _responder():
+    """Current user if they can respond to alerts, else None"""
+    user = User.query.get(get_jwt_identity())
+    return user if user and user.role in ['asha', 'admin'] else None
+
+@emergency_bp.route('/triage', methods=['GET'])
+@query_budget(4)
+@jwt_required()
+def get_triage_queue():
+    """Get unclaimed alerts, most urgent first"""
+    try:
+        if not _responder():
+            return jsonify({'error': 'Responder access required'}), 403
+
+        limit = min(int(request.args.get('limit', 20)), 100)
+        ids = current_app.triage.peek(limit)
+        alerts = {alert.id: alert for alert in EmergencyAlert.query.filter(
+            EmergencyAlert.id.in_(ids),
+            EmergencyAlert.status == 'active'
+        )} if ids else {}
+
+        now = datetime.utcnow()
         return jsonify({
-            'alerts': [alert.to_dict() for alert in alerts]
+            'alerts': [
+                dict(alerts[alert_id].to_dict(), waiting_seconds=int((now - alerts[alert_id].created_at).total_seconds()))
+                for alert_id in ids if alert_id in alerts
+            ]
         }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@emergency_bp.route('/triage/claim', methods=['POST'])
+@query_budget(5)
+@jwt_required()
+def claim_next_alert():
+    """Assign the most urgent unclaimed alert to the current responder"""
+    try:
+        responder = _responder()
+        if not responder:
+            return jsonify({'error': 'Responder access required'}), 403
+
+        alert = current_app.triage.claim_next(responder.id)
+        if not alert:
+            return jsonify({'message': 'No alerts waiting'}), 404
+
+        current_app.change_tracker.bump(f'alerts:patient:{alert.patient_id}', 'alerts:all')
+        _record_sla(alert, responded=True)
+
+        return jsonify({
+            'message': 'Alert assigned',
+            'alert': alert.to_dict()
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@emergency_bp.route('/alerts/<alert_id>/resolve', methods=['POST'])
+@query_budget(12)
+@jwt_required()
+def resolve_alert(alert_id):
+    """Mark an alert as resolved"""
+    try:
+        responder = _responder()
+        if not responder:
+            return jsonify({'error': 'Responder access required'}), 403
+
+        alert = EmergencyAlert.query.get(alert_id)
+        if not alert:
+            return jsonify({'error': 'Alert not found'}), 404
+        if alert.responder_id and alert.responder_id != responder.id and responder.role != 'admin':
+            return jsonify({'error': 'Alert is assigned to another responder'}), 403
+
+        if alert.status == 'resolved':
+            return jsonify({'error': 'Alert is already resolved'}), 409
+
+        now = datetime.utcnow()
+        responded = not alert.responder_id
+        alert.status = 'resolved'
+        alert.resolved_at = now
+        if responded:
+            alert.responder_id = responder.id
+            alert.response_time = now
+        update_cells(alert.location_lat, alert.location_lng, active_alert_count=-1)
+        db.session.commit()
+
+        current_app.triage.remove(alert.id)
+        current_app.change_tracker.bump(f'alerts:patient:{alert.patient_id}', 'alerts:all')
+        _record_sla(alert, responded=responded, resolved=True)
+
+        return jsonify({
+            'message': 'Alert resolved',
+            'alert': alert.to_dict()
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,12 +1,55 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, HealthRecord, Appointment
-from datetime import datetime
+from models import db, User, HealthRecord, Appointment, PatientSummary, VitalsRollup
+from services.patient_summary import update_summary
+from services.rollups import update_rollups, bucket_start, GRANULARITIES, AREA_TYPES
+from services.geo_tiles import update_cells, record_deltas
+from utils.replica import read_only
+from utils.query_budget import query_budget
+from utils.http_cache import make_etag, not_modified, tag_response
+from utils.clinic_time import to_local
+from utils.fields import parse_fields, select_columns, serialize_rows
+from datetime import datetime, timedelta, time, timezone
 import json
 
 health_bp = Blueprint('health', __name__)
 
+def _save_health_record(record):
+    """Write job: insert a record and its summary, rollup and map updates"""
+    db.session.add(record)
+    db.session.flush()
+
+    # Same transaction as the record, so dashboards never see one without the other
+    update_summary(record)
+    area = db.session.execute(
+        db.select(User.village, User.district).where(User.id == record.patient_id)
+    ).one_or_none()
+    if area:
+        update_rollups(record, village=area.village, district=area.district)
+    update_cells(record.location_lat, record.location_lng, **record_deltas(record))
+
+    return record.to_dict()
+
+def _book_with_worker(appointment):
+    """Write job: insert an ASHA worker's appointment unless it overlaps another
+
+    Returns (appointment dict, None), or (None, id of the conflicting
+    appointment). The overlap check reads the database inside the write
+    transaction, so bookings for the same worker can't both pass it.
+    """
+    end = appointment.appointment_date + timedelta(minutes=appointment.duration_minutes)
+    conflict = current_app.schedule_index.find_committed_conflict(
+        appointment.asha_worker_id, appointment.appointment_date, end
+    )
+    if conflict:
+        return None, conflict
+
+    db.session.add(appointment)
+    db.session.flush()
+    return appointment.to_dict(), None
+
 @health_bp.route('/records', methods=['POST'])
+@query_budget(16)
 @jwt_required()
 def create_health_record():
     """Create a new health record"""
@@ -14,9 +57,19 @@ def create_health_record():
         user_id = get_jwt_identity()
         data = request.get_json()
 
+        # Records captured offline carry their own timestamp
+        recorded_at = None
+        if data.get('recorded_at'):
+            recorded_at = datetime.fromisoformat(data['recorded_at'])
+            if recorded_at.tzinfo:
+                recorded_at = recorded_at.astimezone(timezone.utc).replace(tzinfo=None)
+            if recorded_at > datetime.utcnow() + timedelta(minutes=5):
+                return jsonify({'error': 'recorded_at is in the future'}), 400
+
         # Create health record
         record = HealthRecord(
             patient_id=data.get('patient_id', user_id),
+            recorded_at=recorded_at,
             recorded_by=user_id,
             blood_pressure_systolic=data.get('blood_pressure_systolic'),
             blood_pressure_diastolic=data.get('blood_pressure_diastolic'),
@@ -25,13 +78,12 @@ def create_health_record():
             weight=data.get('weight'),
             height=data.get('height'),
             symptoms=data.get('symptoms'),
-            notes=data.get('notes')
+            notes=data.get('notes'),
+            location_lat=data.get('location_lat'),
+            location_lng=data.get('location_lng')
         )
 
-        db.session.add(record)
-        db.session.flush()
-
-        # AI Health Risk Prediction
+        # AI Health Risk Prediction (vitals only; runs before the write)
         try:
             if current_app.health_predictor:
                 prediction_result = current_app.health_predictor.predict_risk(record)
@@ -42,11 +94,12 @@ def create_health_record():
             print(f"AI prediction failed: {e}")
             record.risk_level = 'unknown'
 
-        db.session.commit()
+        saved = current_app.db_writer.submit(_save_health_record, record)
+        current_app.change_tracker.bump(f"records:patient:{saved['patient_id']}", 'records:all')
 
         return jsonify({
             'message': 'Health record created successfully',
-            'record': record.to_dict()
+            'record': saved
         }), 201
 
     except Exception as e:
@@ -54,7 +107,9 @@ def create_health_record():
         return jsonify({'error': str(e)}), 500
 
 @health_bp.route('/records', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@read_only
 def get_health_records():
     """Get health records for a patient"""
     try:
@@ -66,18 +121,35 @@ def get_health_records():
         if current_user.role != 'asha' and patient_id != user_id:
             return jsonify({'error': 'Access denied'}), 403
 
-        records = HealthRecord.query.filter_by(patient_id=patient_id).order_by(
-            HealthRecord.recorded_at.desc()
-        ).limit(20).all()
+        fields, error = parse_fields(HealthRecord)
+        if error:
+            return jsonify({'error': error}), 400
 
-        return jsonify({
-            'records': [record.to_dict() for record in records]
-        }), 200
+        # Answer revalidation from the change counter before touching the records
+        versions = current_app.change_tracker.versions(f'records:patient:{patient_id}')
+        etag = make_etag('records', patient_id, ','.join(fields or []), *versions) if versions else None
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        records = db.session.execute(
+            db.select(*select_columns(HealthRecord, fields)).where(
+                HealthRecord.patient_id == patient_id
+            ).order_by(
+                HealthRecord.recorded_at.desc()
+            ).limit(20)
+        ).all()
+
+        response = jsonify({
+            'records': serialize_rows(HealthRecord, records, fields)
+        })
+        return tag_response(response, etag), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @health_bp.route('/appointments', methods=['POST'])
+@query_budget(6)
 @jwt_required()
 def book_appointment():
     """Book an appointment"""
@@ -85,55 +157,234 @@ def book_appointment():
         user_id = get_jwt_identity()
         data = request.get_json()
 
+        appointment_date = datetime.fromisoformat(data['appointment_date'])
+        if appointment_date.tzinfo:
+            # Stored as naive UTC like every other timestamp
+            appointment_date = appointment_date.astimezone(timezone.utc).replace(tzinfo=None)
+
+        try:
+            duration = int(data.get('duration_minutes', 30))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'duration_minutes must be a whole number'}), 400
+        max_duration = current_app.config['APPOINTMENT_MAX_DURATION_MINUTES']
+        if not 0 < duration <= max_duration:
+            return jsonify({'error': f'duration_minutes must be between 1 and {max_duration}'}), 400
+
+        asha_worker_id = data.get('asha_worker_id')
+        if asha_worker_id:
+            # Locks the worker's row (PostgreSQL) so concurrent bookings for
+            # the same worker are checked one at a time
+            worker = User.query.filter_by(id=asha_worker_id, role='asha').with_for_update().first()
+            if not worker:
+                return jsonify({'error': 'ASHA worker not found'}), 404
+
         appointment = Appointment(
             patient_id=user_id,
-            appointment_date=datetime.fromisoformat(data['appointment_date']),
+            asha_worker_id=asha_worker_id,
+            appointment_date=appointment_date,
+            duration_minutes=duration,
             appointment_type=data['appointment_type'],
             location=data.get('location'),
             notes=data.get('notes')
         )
 
-        db.session.add(appointment)
-        db.session.commit()
+        if asha_worker_id:
+            schedule = current_app.schedule_index
+            end = appointment_date + timedelta(minutes=duration)
+            # Cheap early answer from the cached index; the write job rechecks
+            conflict = schedule.find_conflict(asha_worker_id, appointment_date, end)
+            if not conflict:
+                with schedule.worker_lock(asha_worker_id):
+                    booked, conflict = current_app.db_writer.submit(_book_with_worker, appointment)
+            if conflict:
+                db.session.rollback()
+                return jsonify({
+                    'error': 'ASHA worker already has an appointment at this time',
+                    'conflicting_appointment_id': conflict
+                }), 409
+            schedule.invalidate(asha_worker_id, appointment_date, end)
+        else:
+            db.session.add(appointment)
+            db.session.commit()
+            booked = appointment.to_dict()
 
         return jsonify({
             'message': 'Appointment booked successfully',
-            'appointment': appointment.to_dict()
+            'appointment': booked
         }), 201
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@health_bp.route('/asha/<worker_id>/availability', methods=['GET'])
+@query_budget(4)
+@jwt_required()
+def get_asha_availability(worker_id):
+    """Get free appointment slots for an ASHA worker on a given day"""
+    try:
+        # A clinic-local date; the returned slot times are UTC, as booked
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date') \
+            else to_local(datetime.utcnow(), current_app.schedule_index.timezone).date()
+        duration = timedelta(minutes=int(request.args.get('duration', 30)))
+        if duration <= timedelta(0):
+            return jsonify({'error': 'duration must be positive'}), 400
+
+        if not User.query.filter_by(id=worker_id, role='asha').first():
+            return jsonify({'error': 'ASHA worker not found'}), 404
+
+        start_hour, end_hour = current_app.config['ASHA_WORKING_HOURS']
+        slots = current_app.schedule_index.free_slots(
+            worker_id, day, duration, time(start_hour), time(end_hour)
+        )
+
+        return jsonify({
+            'asha_worker_id': worker_id,
+            'date': day.isoformat(),
+            'duration_minutes': int(duration.total_seconds() // 60),
+            'free_slots': [slot.isoformat() for slot in slots]
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@health_bp.route('/caseload', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+@read_only
+def get_caseload():
+    """Get latest vitals and risk for patients in an ASHA worker's area"""
+    try:
+        user_id = get_jwt_identity()
+        current_user = User.query.get(user_id)
+
+        if current_user.role not in ['asha', 'admin']:
+            return jsonify({'error': 'ASHA access required'}), 403
+
+        village = request.args.get('village', current_user.village)
+        district = request.args.get('district', current_user.district)
+        if not village and not district:
+            return jsonify({'error': 'village or district is required'}), 400
+
+        query = db.select(User.id, User.full_name, User.phone_number, User.village, PatientSummary).outerjoin(
+            PatientSummary, PatientSummary.patient_id == User.id
+        ).where(User.role == 'patient')
+        if village:
+            query = query.where(User.village == village)
+        if district:
+            query = query.where(User.district == district)
+        if request.args.get('risk_level'):
+            query = query.where(PatientSummary.risk_level == request.args['risk_level'])
+
+        # Highest risk first; patients without records last
+        query = query.order_by(
+            PatientSummary.risk_score.is_(None),
+            PatientSummary.risk_score.desc()
+        ).limit(min(int(request.args.get('limit', 200)), 1000))
+
+        patients = []
+        for row in db.session.execute(query):
+            summary = row.PatientSummary or PatientSummary(patient_id=row.id, record_count=0)
+            patients.append(dict(summary.to_dict(), full_name=row.full_name, phone_number=row.phone_number, village=row.village))
+
+        return jsonify({'patients': patients}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@health_bp.route('/trends', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+@read_only
+def get_trends():
+    """Get average BP, fever rate and high-risk share over time for an area"""
+    try:
+        current_user = User.query.get(get_jwt_identity())
+        if current_user.role not in ['asha', 'admin']:
+            return jsonify({'error': 'ASHA access required'}), 403
+
+        area_type = request.args.get('area_type', 'district')
+        granularity = request.args.get('granularity', 'day')
+        if area_type not in AREA_TYPES or granularity not in GRANULARITIES:
+            return jsonify({'error': f"area_type must be one of {', '.join(AREA_TYPES)}; "
+                                     f"granularity one of {', '.join(GRANULARITIES)}"}), 400
+
+        area = request.args.get('area') or getattr(current_user, area_type)
+        if not area:
+            return jsonify({'error': 'area is required'}), 400
+
+        offset = current_app.config['ROLLUP_UTC_OFFSET_MINUTES']
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') \
+            else bucket_start(datetime.utcnow(), granularity, offset)
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') \
+            else end - current_app.config['ROLLUP_DEFAULT_RANGE'][granularity]
+
+        rollups = VitalsRollup.query.filter(
+            VitalsRollup.granularity == granularity,
+            VitalsRollup.area_type == area_type,
+            VitalsRollup.area == area,
+            VitalsRollup.bucket_start >= start,
+            VitalsRollup.bucket_start <= end
+        ).order_by(VitalsRollup.bucket_start).limit(current_app.config['ROLLUP_MAX_POINTS']).all()
+
+        return jsonify({
+            'area_type': area_type,
+            'area': area,
+            'granularity': granularity,
+            'points': [rollup.to_dict() for rollup in rollups]
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @health_bp.route('/dashboard/stats', methods=['GET'])
+@query_budget(5)
 @jwt_required()
+@read_only
 def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
         user_id = get_jwt_identity()
         current_user = User.query.get(user_id)
 
+        if current_user.role == 'patient':
+            versions = current_app.change_tracker.versions(f'records:patient:{user_id}')
+            etag = make_etag('dashboard', user_id, *versions) if versions else None
+        else:
+            versions = current_app.change_tracker.versions('users:all', 'records:all')
+            etag = make_etag('dashboard', 'all', *versions) if versions else None
+
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
         if current_user.role == 'patient':
             # Patient stats
-            total_records = HealthRecord.query.filter_by(patient_id=user_id).count()
-            recent_record = HealthRecord.query.filter_by(patient_id=user_id).order_by(
-                HealthRecord.recorded_at.desc()
-            ).first()
+            summary = db.session.get(PatientSummary, user_id) or PatientSummary(patient_id=user_id, record_count=0)
 
             stats = {
-                'total_health_records': total_records,
-                'recent_vitals': recent_record.to_dict() if recent_record else None,
-                'risk_level': recent_record.risk_level if recent_record else 'unknown'
+                'total_health_records': summary.record_count,
+                'recent_vitals': summary.recent_vitals(),
+                'risk_level': summary.risk_level or 'unknown'
             }
         else:
             # ASHA/Admin stats
             stats = {
                 'total_patients': User.query.filter_by(role='patient').count(),
-                'total_records': HealthRecord.query.count(),
-                'high_risk_patients': HealthRecord.query.filter_by(risk_level='high').count()
+                'total_records': db.session.execute(
+                    db.select(db.func.coalesce(db.func.sum(PatientSummary.record_count), 0))
+                ).scalar(),
+                # High-risk records, as /api/admin/dashboard/stats counts them
+                'high_risk_patients': HealthRecord.query.filter_by(risk_level='high').count(),
+                # Patients whose latest record is high risk
+                'high_risk_patient_count': PatientSummary.query.filter_by(risk_level='high').count()
             }
 
-        return jsonify(stats), 200
+        return tag_response(jsonify(stats), etag), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,22 @@
+from flask import Blueprint, request, jsonify, current_app, send_file
+import os
+
+media_bp = Blueprint('media', __name__)
+
+@media_bp.route('/<path:filename>', methods=['GET'])
+def serve_upload(filename):
+    """Serve an uploaded file (?size=thumb|medium for image variants)"""
+    path, is_exact = current_app.media_storage.resolve(filename, request.args.get('size'))
+
+    if not path or not os.path.isfile(path):
+        return jsonify({'error': 'File not found'}), 404
+
+    # Content-addressed files never change, so exact hits can be cached for
+    # good; a variant still being generated gets a short lifetime instead
+    max_age = current_app.config['UPLOAD_CACHE_MAX_AGE'] if is_exact else 60
+
+    # conditional=True handles Range and If-None-Match; the file body goes out
+    # via X-Sendfile or the server's wsgi.file_wrapper (sendfile) when available
+    response = send_file(path, conditional=True, etag=True, max_age=max_age)
+    response.cache_control.immutable = is_exact
+    return response
@@ -0,0 +1,77 @@
+from flask import Blueprint, request, jsonify, current_app
+from services.delivery_status import (parse_whatsapp_statuses, parse_twilio_status,
+                                      whatsapp_signature, twilio_signature)
+import hmac
+
+webhooks_bp = Blueprint('webhooks', __name__)
+
+# Callbacks can mark emergency messages delivered, so unsigned ones are never
+# accepted: without the provider secret configured, every callback is refused
+
+def _signature_error(secret, setting, header, expected):
+    """Error message for a callback that fails verification, or None"""
+    if not secret:
+        print(f"Refused a delivery callback: {setting} is not set")
+        return f'{setting} is not configured'
+    if not hmac.compare_digest(expected(secret), request.headers.get(header, '')):
+        return 'Invalid signature'
+    return None
+
+def _whatsapp_signature_error():
+    return _signature_error(
+        current_app.config.get('WHATSAPP_APP_SECRET'), 'WHATSAPP_APP_SECRET', 'X-Hub-Signature-256',
+        lambda secret: whatsapp_signature(secret, request.get_data())
+    )
+
+def _twilio_signature_error():
+    return _signature_error(
+        current_app.config.get('TWILIO_AUTH_TOKEN'), 'TWILIO_AUTH_TOKEN', 'X-Twilio-Signature',
+        lambda token: twilio_signature(token, request.url, request.form)
+    )
+
+@webhooks_bp.route('/whatsapp', methods=['GET'])
+def verify_whatsapp_webhook():
+    """WhatsApp webhook subscription handshake"""
+    token = current_app.config.get('WHATSAPP_VERIFY_TOKEN')
+    challenge = request.args.get('hub.challenge', '')
+    if (token and request.args.get('hub.mode') == 'subscribe'
+            and hmac.compare_digest(request.args.get('hub.verify_token', ''), token)
+            # Meta's challenge is numeric; echo nothing else back
+            and challenge.isdigit()):
+        return challenge, 200, {'Content-Type': 'text/plain'}
+    return jsonify({'error': 'Verification failed'}), 403
+
+@webhooks_bp.route('/whatsapp', methods=['POST'])
+def whatsapp_status_callback():
+    """Queue WhatsApp delivery statuses and acknowledge immediately"""
+    try:
+        error = _whatsapp_signature_error()
+        if error:
+            return jsonify({'error': error}), 403
+
+        queued = 0
+        for external_id, status, timestamp in parse_whatsapp_statuses(request.get_json(silent=True)):
+            current_app.delivery_status.push(external_id, status, timestamp)
+            queued += 1
+
+        return jsonify({'queued': queued}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@webhooks_bp.route('/twilio', methods=['POST'])
+def twilio_status_callback():
+    """Queue a Twilio SMS status callback and acknowledge immediately"""
+    try:
+        error = _twilio_signature_error()
+        if error:
+            return jsonify({'error': error}), 403
+
+        update = parse_twilio_status(request.form)
+        if update:
+            current_app.delivery_status.push(*update)
+
+        return '', 204
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,26 @@
 from .whatsapp_service import WhatsAppService
 from .sms_service import SMSService
 from .ai_prediction import HealthPredictionService
+from .change_tracker import ChangeTracker
+from .media_storage import MediaStorage
+from .rate_limiter import RateLimiter
+from .outbox import OutboxDispatcher
+from .communication_logger import CommunicationLogger
+from .delivery_status import DeliveryStatusQueue
+from .provider_health import ProviderHealth
+from .reminders import ReminderScheduler
+from .schedule_index import ScheduleIndex
+from .triage import TriageQueue
+from .response_sla import ResponseSLA
+from .analytics_snapshot import AnalyticsSnapshot
+from .db_writer import DatabaseWriter
+from .replica_router import ReplicaRouter
+from .tracing import Tracer
+from .profiler import Profiler
+from .query_monitor import QueryMonitor
+from .health_probe import HealthProber
 
-__all__ = ['WhatsAppService', 'SMSService', 'HealthPredictionService']
+__all__ = ['WhatsAppService', 'SMSService', 'HealthPredictionService', 'ChangeTracker', 'MediaStorage',
+           'RateLimiter', 'OutboxDispatcher', 'CommunicationLogger', 'DeliveryStatusQueue',
+           'ProviderHealth', 'ReminderScheduler', 'ScheduleIndex', 'TriageQueue', 'ResponseSLA', 'AnalyticsSnapshot', 'DatabaseWriter', 'ReplicaRouter',
+           'Tracer', 'Profiler', 'QueryMonitor', 'HealthProber']
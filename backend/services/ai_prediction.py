@@ -2,6 +2,7 @@ import numpy as np
 from datetime import datetime
 import json
 import os
+from services.tracing import traced
 
 class HealthPredictionService:
     """AI-powered health risk prediction service"""
@@ -23,6 +24,7 @@ class HealthPredictionService:
         except Exception as e:
             print(f"Model loading error: {e}")
 
+    @traced('prediction.predict_risk')
     def predict_risk(self, health_record):
         """Predict health risk based on vital signs"""
         try:
@@ -0,0 +1,352 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from models import db, User, HealthRecord
+
+EPOCH = datetime(1970, 1, 1)
+
+# snapshot column -> source column, stored as float32 with NaN for missing
+NUMERIC_COLUMNS = {
+    'systolic': HealthRecord.blood_pressure_systolic,
+    'diastolic': HealthRecord.blood_pressure_diastolic,
+    'heart_rate': HealthRecord.heart_rate,
+    'temperature': HealthRecord.temperature,
+    'weight': HealthRecord.weight,
+    'oxygen_saturation': HealthRecord.oxygen_saturation,
+    'risk_score': HealthRecord.risk_score,
+}
+
+# snapshot column -> source column, dictionary-encoded to int32 (-1 = missing)
+CATEGORICAL_COLUMNS = {
+    'patient': HealthRecord.patient_id,
+    'risk_level': HealthRecord.risk_level,
+    'gender': User.gender,
+    'village': User.village,
+    'district': User.district,
+}
+
+GROUPINGS = tuple(CATEGORICAL_COLUMNS) + ('age_band', 'month')
+AGGREGATES = ('avg', 'min', 'max')
+
+class SnapshotNotReady(Exception):
+    """No snapshot has been loaded yet; the first one is being built"""
+
+def _seconds(moment):
+    return (moment - EPOCH).total_seconds() if moment else np.nan
+
+class AnalyticsSnapshot:
+    """Columnar, NumPy-backed copy of health_records for cohort analytics
+
+    Each record is one position across a set of arrays: float32 vitals (NaN
+    when missing), int32 dictionary codes for strings (patient, risk level,
+    patient gender/village/district) and epoch seconds for timestamps, about
+    60 bytes a row. Filters become boolean masks and grouped aggregates
+    np.bincount calls, so queries run over millions of rows without
+    building ORM objects.
+
+    The snapshot is refreshed incrementally on synced_at (when the server
+    received a record) rather than recorded_at, which offline-synced records
+    backdate. With ANALYTICS_SNAPSHOT_DIR set, `python -m
+    workers.analytics_snapshot` refreshes it and saves versioned .npy files
+    that web workers memory-map and share; otherwise each process refreshes
+    its own copy when it is older than ANALYTICS_REFRESH_SECONDS.
+
+    Refreshes run on a background thread, never in the request: queries
+    answer from the last snapshot while a newer one is built, and raise
+    SnapshotNotReady until the first one exists.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.directory = None
+        self.refresh_seconds = 60
+        self.overlap_seconds = 120
+        self.chunk_size = 10000
+        self.columns = {}
+        self.dictionaries = {name: [] for name in CATEGORICAL_COLUMNS}
+        self.watermark = None  # newest synced_at loaded, epoch seconds
+        self.version = None
+        self._codes = {name: {} for name in CATEGORICAL_COLUMNS}
+        self._recent = {}  # record id -> synced_at for rows inside the overlap window
+        self._refreshed_at = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.directory = app.config.get('ANALYTICS_SNAPSHOT_DIR')
+        self.refresh_seconds = app.config.get('ANALYTICS_REFRESH_SECONDS', self.refresh_seconds)
+        self.overlap_seconds = app.config.get('ANALYTICS_OVERLAP_SECONDS', self.overlap_seconds)
+        self.chunk_size = app.config.get('ANALYTICS_CHUNK_SIZE', self.chunk_size)
+
+    @property
+    def row_count(self):
+        return len(self.columns['recorded_at']) if self.columns else 0
+
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    def _encode(self, name, values):
+        mapping, dictionary = self._codes[name], self.dictionaries[name]
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = -1
+                continue
+            code = mapping.get(value)
+            if code is None:
+                code = mapping[value] = len(dictionary)
+                dictionary.append(value)
+            codes[i] = code
+        return codes
+
+    def _chunk_columns(self, rows):
+        chunk = {
+            'recorded_at': np.array([_seconds(row.recorded_at) for row in rows], dtype=np.float64),
+            'synced_at': np.array([_seconds(row.synced_at) for row in rows], dtype=np.float64),
+            'birth_day': np.array([
+                (row.date_of_birth - EPOCH.date()).days if row.date_of_birth else np.nan for row in rows
+            ], dtype=np.float32),
+        }
+        for name in NUMERIC_COLUMNS:
+            chunk[name] = np.array([np.nan if getattr(row, name) is None else getattr(row, name) for row in rows], dtype=np.float32)
+        for name in CATEGORICAL_COLUMNS:
+            chunk[name] = self._encode(name, [getattr(row, name) for row in rows])
+        return chunk
+
+    def refresh(self, full=False):
+        """Append records received since the last refresh; returns rows added"""
+        with self._lock:
+            if full:
+                self.columns, self.watermark, self._recent = {}, None, {}
+                self.dictionaries = {name: [] for name in CATEGORICAL_COLUMNS}
+                self._codes = {name: {} for name in CATEGORICAL_COLUMNS}
+
+            query = db.select(
+                HealthRecord.id, HealthRecord.recorded_at, HealthRecord.synced_at, User.date_of_birth,
+                *[column.label(name) for name, column in NUMERIC_COLUMNS.items()],
+                *[column.label(name) for name, column in CATEGORICAL_COLUMNS.items()]
+            ).join(User, User.id == HealthRecord.patient_id).order_by(HealthRecord.synced_at)
+            if self.watermark is not None:
+                # Re-read a short overlap: a transaction can commit after a
+                # later-stamped one this refresh already saw
+                since = EPOCH + timedelta(seconds=self.watermark - self.overlap_seconds)
+                query = query.where(HealthRecord.synced_at > since)
+
+            chunks, recent = [], dict(self._recent)
+            result = db.session.execute(query.execution_options(yield_per=self.chunk_size))
+            for partition in result.partitions():
+                rows = []
+                for row in partition:
+                    if row.id in recent:
+                        continue
+                    rows.append(row)
+                    recent[row.id] = _seconds(row.synced_at)
+                if rows:
+                    chunks.append(self._chunk_columns(rows))
+
+            added = sum(len(chunk['recorded_at']) for chunk in chunks)
+            if chunks:
+                parts = ([self.columns] if self.columns else []) + chunks
+                self.columns = {name: np.concatenate([part[name] for part in parts]) for name in chunks[0]}
+                self.watermark = float(np.nanmax(self.columns['synced_at']))
+            if self.watermark is not None:
+                cutoff = self.watermark - self.overlap_seconds
+                self._recent = {record_id: synced for record_id, synced in recent.items() if synced > cutoff}
+
+            self._refreshed_at = time.monotonic()
+            return added
+
+    def save(self):
+        """Write the snapshot as a new version under ANALYTICS_SNAPSHOT_DIR"""
+        with self._lock:
+            version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+            path = os.path.join(self.directory, version)
+            os.makedirs(path, exist_ok=True)
+            for name, column in self.columns.items():
+                np.save(os.path.join(path, f'{name}.npy'), column)
+            with open(os.path.join(path, 'meta.json'), 'w') as f:
+                json.dump({'dictionaries': self.dictionaries, 'watermark': self.watermark,
+                           'recent': self._recent}, f)
+
+            # Readers follow CURRENT; swap it atomically, then drop old versions
+            pointer = os.path.join(self.directory, 'CURRENT')
+            with open(pointer + '.tmp', 'w') as f:
+                f.write(version)
+            os.replace(pointer + '.tmp', pointer)
+            self.version = version
+
+        keep = sorted(name for name in os.listdir(self.directory) if name.isdigit())[-2:]
+        for name in os.listdir(self.directory):
+            if name.isdigit() and name not in keep:
+                for filename in os.listdir(os.path.join(self.directory, name)):
+                    os.remove(os.path.join(self.directory, name, filename))
+                os.rmdir(os.path.join(self.directory, name))
+        return version
+
+    def load(self):
+        """Memory-map the latest saved version; returns False if there is none"""
+        try:
+            with open(os.path.join(self.directory, 'CURRENT')) as f:
+                version = f.read().strip()
+        except OSError:
+            return False
+        if version == self.version:
+            return True
+
+        path = os.path.join(self.directory, version)
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        columns = {
+            filename[:-4]: np.load(os.path.join(path, filename), mmap_mode='r')
+            for filename in os.listdir(path) if filename.endswith('.npy')
+        }
+        with self._lock:
+            self.columns = columns
+            self.dictionaries = meta['dictionaries']
+            self._codes = {name: {value: code for code, value in enumerate(values)}
+                           for name, values in self.dictionaries.items()}
+            self.watermark = meta['watermark']
+            self._recent = meta['recent']
+            self.version = version
+            self._refreshed_at = time.monotonic()
+        return True
+
+    def _current(self):
+        """Columns to query, reloaded when stale; a stale copy is refreshed in the background"""
+        if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            # Loading a saved version only memory-maps it, so that can stay inline
+            if not (self.directory and self.load()):
+                self._refresh_in_background()
+        if not self._refreshed_at:
+            raise SnapshotNotReady('Analytics snapshot is still loading, try again shortly')
+        return self.columns
+
+    def _refresh_in_background(self):
+        # One refresh at a time; started again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run_refresh, name='analytics-snapshot', daemon=True)
+            self._thread.start()
+
+    def _run_refresh(self):
+        with self.app.app_context():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Analytics snapshot refresh error: {e}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    def _age(self, columns):
+        return (columns['recorded_at'] / 86400 - columns['birth_day']) / 365.25
+
+    def _values(self, columns, name):
+        if name == 'age':
+            return self._age(columns)
+        if name in NUMERIC_COLUMNS:
+            return columns[name]
+        raise ValueError(f'Unknown numeric column: {name}')
+
+    def _mask(self, columns, filters):
+        mask = np.ones(len(columns['recorded_at']), dtype=bool)
+        for key, value in (filters or {}).items():
+            if key in CATEGORICAL_COLUMNS:
+                values = value if isinstance(value, list) else [value]
+                codes = [self._codes[key][v] for v in values if v in self._codes[key]]
+                mask &= np.isin(columns[key], codes)
+            elif key in ('since', 'until'):
+                bound = _seconds(datetime.fromisoformat(value))
+                mask &= columns['recorded_at'] >= bound if key == 'since' else columns['recorded_at'] < bound
+            elif key.endswith('_min') or key.endswith('_max'):
+                values = self._values(columns, key[:-4])
+                # NaN compares False, so rows missing the value drop out
+                mask &= values >= value if key.endswith('_min') else values <= value
+            else:
+                raise ValueError(f'Unknown filter: {key}')
+        return mask
+
+    def _groups(self, columns, mask, group_by):
+        """(group key per selected row, label per key)"""
+        if group_by in CATEGORICAL_COLUMNS:
+            keys = columns[group_by][mask]
+            dictionary = self.dictionaries[group_by]
+            return keys, lambda key: dictionary[key] if key >= 0 else None
+        if group_by == 'age_band':
+            ages = self._age(columns)[mask]
+            keys = np.where(np.isnan(ages), -1, np.floor(ages / 10)).astype(np.int32)
+            return keys, lambda key: f'{key * 10}-{key * 10 + 9}' if key >= 0 else None
+        if group_by == 'month':
+            keys = columns['recorded_at'][mask].astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+            return keys, lambda key: str(np.datetime64(int(key), 'M'))
+        raise ValueError(f"group_by must be one of: {', '.join(GROUPINGS)}")
+
+    def query(self, filters=None, group_by=None, metrics=('count',)):
+        """Filter, optionally group, and aggregate the snapshot
+
+        filters: {categorical: value or [values], '<numeric|age>_min'/'_max':
+        number, 'since'/'until': ISO date}. metrics: 'count', 'patients'
+        (distinct), or '<avg|min|max>:<numeric|age>'.
+        """
+        if filters is not None and not isinstance(filters, dict):
+            raise ValueError('filters must be an object')
+        columns = self._current()
+        if not columns:
+            return {'total': 0, 'rows': [], 'snapshot_rows': 0}
+
+        mask = self._mask(columns, filters)
+        if group_by:
+            keys, label = self._groups(columns, mask, group_by)
+        else:
+            keys, label = np.zeros(int(mask.sum()), dtype=np.int32), None
+        groups, inverse = np.unique(keys, return_inverse=True)
+        size = len(groups)
+
+        results = {}
+        for metric in metrics:
+            if metric == 'count':
+                results[metric] = np.bincount(inverse, minlength=size)
+            elif metric == 'patients':
+                patients = columns['patient'][mask].astype(np.int64)
+                stride = len(self.dictionaries['patient']) + 1
+                pairs = np.unique(inverse.astype(np.int64) * stride + patients)
+                results[metric] = np.bincount(pairs // stride, minlength=size)
+            elif metric.partition(':')[0] in AGGREGATES:
+                aggregate, _, name = metric.partition(':')
+                values = self._values(columns, name)[mask]
+                valid = ~np.isnan(values)
+                if aggregate == 'avg':
+                    sums = np.bincount(inverse[valid], weights=values[valid], minlength=size)
+                    counts = np.bincount(inverse[valid], minlength=size)
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        results[metric] = sums / counts
+                else:
+                    out = np.full(size, np.inf if aggregate == 'min' else -np.inf)
+                    (np.minimum if aggregate == 'min' else np.maximum).at(out, inverse[valid], values[valid])
+                    results[metric] = np.where(np.isinf(out), np.nan, out)
+            else:
+                raise ValueError(f'Unknown metric: {metric}')
+
+        rows = []
+        for i, key in enumerate(groups):
+            row = {group_by: label(int(key))} if group_by else {}
+            for metric, values in results.items():
+                value = values[i].item()
+                row[metric] = None if value != value else round(value, 3)
+            rows.append(row)
+
+        return {
+            'total': int(mask.sum()),
+            'rows': rows,
+            'snapshot_rows': len(columns['recorded_at']),
+            'snapshot_as_of': (EPOCH + timedelta(seconds=self.watermark)).isoformat() if self.watermark else None
+        }
@@ -0,0 +1,56 @@
+import time
+
+class ChangeTracker:
+    """Per-resource change counters used to build cheap HTTP validators"""
+
+    KEY_PREFIX = 'ver:'
+    KEY_TTL = 7 * 24 * 3600  # idle counters are reseeded after a week
+
+    def __init__(self):
+        self.redis = None
+
+    def init_app(self, app):
+        self.redis = getattr(app, 'redis', None)
+
+    def _seed(self):
+        # Seeding with the clock means a counter lost from Redis (flush, expiry)
+        # never comes back with a value a client may already hold
+        return time.time_ns()
+
+    def bump(self, *scopes):
+        """Mark the given scopes as changed (call after the commit)"""
+        if not self.redis or not scopes:
+            return False
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for scope in scopes:
+                key = self.KEY_PREFIX + scope
+                pipe.set(key, self._seed(), nx=True)
+                pipe.incr(key)
+                pipe.expire(key, self.KEY_TTL)
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Change counter bump failed: {e}")
+            return False
+
+    def versions(self, *scopes):
+        """Return current version strings for scopes, or None if unavailable"""
+        if not self.redis or not scopes:
+            return None
+
+        keys = [self.KEY_PREFIX + scope for scope in scopes]
+        try:
+            values = self.redis.mget(keys)
+            missing = [key for key, value in zip(keys, values) if value is None]
+            if missing:
+                pipe = self.redis.pipeline(transaction=False)
+                for key in missing:
+                    pipe.set(key, self._seed(), nx=True, ex=self.KEY_TTL)
+                pipe.execute()
+                values = self.redis.mget(keys)
+            return [str(value) for value in values]
+        except Exception as e:
+            print(f"Change counter read failed: {e}")
+            return None
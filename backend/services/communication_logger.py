@@ -0,0 +1,139 @@
+import os
+import uuid
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+
+class CommunicationLogger:
+    """Write-behind buffer for CommunicationLog rows
+
+    Send paths call record(), which only appends to an in-memory buffer. A
+    background thread writes the buffer with one bulk INSERT per flush, when
+    it reaches LOG_FLUSH_SIZE rows or every LOG_FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.flush_size = 500
+        self.flush_interval = 2.0
+        self.max_buffer = 50000
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_size = app.config.get('LOG_FLUSH_SIZE', self.flush_size)
+        self.flush_interval = app.config.get('LOG_FLUSH_INTERVAL', self.flush_interval)
+        self.max_buffer = app.config.get('LOG_MAX_BUFFER', self.max_buffer)
+        atexit.register(self.flush)
+
+    def record(self, type, recipient, message, status, external_id=None, user_id=None):
+        """Queue one outbound message for logging"""
+        row = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'type': type,
+            'recipient': recipient,
+            'message': message,
+            'status': status,
+            'external_id': external_id,
+            'sent_at': datetime.utcnow()
+        }
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # The database is not keeping up; shed the oldest entries
+                self._buffer.popleft()
+            self._buffer.append(row)
+            size = len(self._buffer)
+
+        self._ensure_thread()
+        if size >= self.flush_size:
+            self._wakeup.set()
+
+    def depth(self):
+        return len(self._buffer)
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='communication-log', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows; returns the number written
+
+        When a bulk INSERT fails on its data (a constraint violation, say),
+        that batch is retried one row at a time and rows that fail on their
+        own are dropped with a log line, so one bad row can't hold up the
+        rest. When the database itself fails (unreachable, locked), the rows
+        not yet written are kept for the next flush.
+        """
+        with self._lock:
+            rows = list(self._buffer)
+            self._buffer.clear()
+
+        if not rows or not self.app:
+            return 0
+
+        from sqlalchemy.exc import OperationalError
+        from models import db
+        written = 0
+        position = 0  # rows before this one are written or dropped
+        with self.app.app_context():
+            try:
+                while position < len(rows):
+                    batch = rows[position:position + self.flush_size]
+                    try:
+                        self._insert(db, batch)
+                    except OperationalError:
+                        raise
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"Communication log batch failed, writing its rows one by one: {e}")
+                        for row in batch:
+                            try:
+                                self._insert(db, [row])
+                                written += 1
+                            except OperationalError:
+                                raise
+                            except Exception as e:
+                                db.session.rollback()
+                                print(f"Dropped communication log row {row['id']} "
+                                      f"({row['type']} to {row['recipient']}, {row['external_id']}): {e}")
+                            position += 1
+                    else:
+                        written += len(batch)
+                        position += len(batch)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Communication log flush failed: {e}")
+                self._requeue(rows[position:])
+        return written
+
+    def _insert(self, db, rows):
+        from models import CommunicationLog
+        db.session.execute(CommunicationLog.__table__.insert(), rows)
+        db.session.commit()
+
+    def _requeue(self, rows):
+        with self._lock:
+            # Keep the newest rows for the next flush, within the buffer cap
+            room = self.max_buffer - len(self._buffer)
+            if room > 0:
+                self._buffer.extendleft(reversed(rows[-room:]))
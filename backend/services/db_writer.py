@@ -0,0 +1,134 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from flask import request, has_request_context
+from services.tracing import in_current_trace
+from utils.sqlite import is_sqlite_file
+
+class DatabaseWriter:
+    """Single writer thread that group-commits small writes on SQLite
+
+    SQLite allows one writer at a time; request threads racing for the lock
+    get 'database is locked' or wait a busy timeout each. Instead, write jobs
+    are queued to one thread that takes the write lock once (BEGIN
+    IMMEDIATE), runs every queued job and commits the whole group at once; if
+    a job fails, the group is rolled back and its jobs are redone one by one,
+    so only the failing job sees the error. Reads stay on the request threads and run
+    concurrently under WAL.
+
+    A job is a callable that writes through db.session without committing
+    and returns plain data (not ORM instances, which are detached once the
+    group commits). On other databases, or with SQLITE_WRITER_ENABLED off,
+    jobs run inline in the caller's session and are committed there.
+
+    submit() gives up after SQLITE_WRITER_TIMEOUT seconds. A job still
+    waiting in the queue by then is cancelled and never runs; one already
+    running may still commit.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.max_batch = 64
+        self.timeout = 20.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = bool(app.config.get('SQLITE_PRODUCTION') and app.config.get('SQLITE_WRITER_ENABLED')
+                            and is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']))
+        self.max_batch = app.config.get('SQLITE_WRITER_MAX_BATCH', self.max_batch)
+        self.timeout = app.config.get('SQLITE_WRITER_TIMEOUT', self.timeout)
+
+    def submit(self, fn, *args, **kwargs):
+        """Run a write job, wait for its group to commit, and return its result
+
+        Raises TimeoutError if the group hasn't committed within the timeout.
+        """
+        future = self.defer(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def defer(self, fn, *args, **kwargs):
+        """Queue a write job and return a Future without waiting for it"""
+        future = Future()
+        if has_request_context():
+            request.environ['db.wrote'] = True  # read-your-writes stickiness (services/replica_router.py)
+        if not self.enabled:
+            from models import db
+            try:
+                result = fn(*args, **kwargs)
+                db.session.commit()
+                future.set_result(result)
+            except Exception as e:
+                db.session.rollback()
+                future.set_exception(e)
+            return future
+
+        self._ensure_thread()
+        self._queue.put((in_current_trace(fn, 'db_writer.job'), args, kwargs, future))
+        return future
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            # Everything queued while the last group was committing goes in this one
+            while len(jobs) < self.max_batch:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Skip jobs whose caller gave up waiting
+            jobs = [job for job in jobs if job[3].set_running_or_notify_cancel()]
+            if jobs:
+                self._commit_group(jobs)
+
+    def _commit_group(self, jobs):
+        """Run jobs in one transaction; on any failure, redo them one by one"""
+        from models import db
+        with self.app.app_context():
+            try:
+                results = self._transaction(db, jobs)
+            except Exception as e:
+                db.session.rollback()
+                if len(jobs) == 1:
+                    jobs[0][3].set_exception(e)
+                    return
+                # Isolate the failing job so it doesn't take the group down
+                for job in jobs:
+                    self._commit_group([job])
+                return
+            finally:
+                db.session.remove()
+
+        for (fn, args, kwargs, future), result in zip(jobs, results):
+            future.set_result(result)
+
+    def _transaction(self, db, jobs):
+        # Take the write lock up front; a deferred BEGIN that upgrades later
+        # can fail with SQLITE_BUSY regardless of busy_timeout
+        db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+        results = [fn(*args, **kwargs) for fn, args, kwargs, future in jobs]
+        db.session.commit()
+        return results
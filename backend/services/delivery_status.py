@@ -0,0 +1,226 @@
+import os
+import hmac
+import time
+import heapq
+import base64
+import hashlib
+import threading
+from datetime import datetime
+
+# Provider status -> CommunicationLog status
+WHATSAPP_STATUSES = {'sent': 'sent', 'delivered': 'delivered', 'read': 'read', 'failed': 'failed'}
+TWILIO_STATUSES = {'sent': 'sent', 'delivered': 'delivered', 'read': 'read',
+                   'undelivered': 'failed', 'failed': 'failed'}
+
+# Statuses a log may move to each status from; callbacks arrive out of order
+# and must never move a message backwards (e.g. delivered -> sent)
+ALLOWED_PREVIOUS = {
+    'sent': ('pending',),
+    'delivered': ('pending', 'sent'),
+    'read': ('pending', 'sent', 'delivered'),
+    'failed': ('pending', 'sent'),
+}
+STATUS_RANK = {'sent': 1, 'delivered': 2, 'read': 3, 'failed': 4}
+
+def whatsapp_signature(secret, body):
+    """X-Hub-Signature-256 value for a WhatsApp webhook body"""
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def twilio_signature(token, url, form):
+    """X-Twilio-Signature value for a status callback posted to url"""
+    signed = url + ''.join(f"{key}{form[key]}" for key in sorted(form))
+    return base64.b64encode(hmac.new(token.encode(), signed.encode(), hashlib.sha1).digest()).decode()
+
+def _timestamp(value):
+    """Provider epoch seconds as naive UTC; now if missing or malformed"""
+    try:
+        return datetime.utcfromtimestamp(int(value))
+    except (TypeError, ValueError, OverflowError, OSError):
+        # One bad timestamp must not cost the rest of the payload its statuses
+        return datetime.utcnow()
+
+def parse_whatsapp_statuses(payload):
+    """Yield (external_id, status, timestamp) from a WhatsApp webhook payload"""
+    for entry in (payload or {}).get('entry', []):
+        for change in entry.get('changes', []):
+            for item in change.get('value', {}).get('statuses', []):
+                status = WHATSAPP_STATUSES.get(item.get('status'))
+                if item.get('id') and status:
+                    yield item['id'], status, _timestamp(item.get('timestamp'))
+
+def parse_twilio_status(form):
+    """Return (external_id, status, timestamp) from a Twilio status callback, or None"""
+    status = TWILIO_STATUSES.get(form.get('MessageStatus'))
+    if form.get('MessageSid') and status:
+        return form['MessageSid'], status, datetime.utcnow()
+    return None
+
+def whatsapp_status_payload(external_id, status, timestamp=None):
+    """Minimal WhatsApp status webhook body (local stub / test payload)"""
+    return {
+        'object': 'whatsapp_business_account',
+        'entry': [{
+            'id': 'stub-waba',
+            'changes': [{
+                'field': 'messages',
+                'value': {
+                    'messaging_product': 'whatsapp',
+                    'statuses': [{
+                        'id': external_id,
+                        'status': status,
+                        'timestamp': str(int(timestamp or datetime.utcnow().timestamp())),
+                        'recipient_id': '910000000000'
+                    }]
+                }
+            }]
+        }]
+    }
+
+def twilio_status_payload(external_id, status):
+    """Minimal Twilio status callback form (local stub / test payload)"""
+    return {
+        'MessageSid': external_id,
+        'MessageStatus': status,
+        'AccountSid': 'ACstub',
+        'To': '+910000000000'
+    }
+
+class DeliveryStatusQueue:
+    """Buffers delivery callbacks and applies them to CommunicationLog in batches
+
+    Callbacks for the same message are coalesced to the most advanced status
+    before they reach the database. Each flush does one indexed lookup for the
+    batch, one executemany UPDATE per target status, and a single commit.
+
+    A callback for a message with no log row yet (its send is still in the
+    CommunicationLog write-behind buffer) or from a failed flush is set aside
+    and retried with exponential backoff, starting at the log's flush
+    interval, up to STATUS_MAX_RETRIES times.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.flush_size = 1000
+        self.flush_interval = 1.0
+        self.max_retries = 10
+        self.retry_delay = 2.0
+        self.max_retry_delay = 60.0
+        self._pending = {}  # external_id -> (status, timestamp, retries)
+        self._waiting = []  # heap of (due, external_id, status, timestamp, retries)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_size = app.config.get('STATUS_FLUSH_SIZE', self.flush_size)
+        self.flush_interval = app.config.get('STATUS_FLUSH_INTERVAL', self.flush_interval)
+        self.max_retries = app.config.get('STATUS_MAX_RETRIES', self.max_retries)
+        # A retry is pointless before the log buffer has had a chance to flush
+        self.retry_delay = max(self.flush_interval, app.config.get('LOG_FLUSH_INTERVAL', self.retry_delay))
+        self.max_retry_delay = app.config.get('STATUS_MAX_RETRY_DELAY', self.max_retry_delay)
+
+    def push(self, external_id, status, timestamp, retries=0):
+        """Queue a status update; keeps only the most advanced per message"""
+        with self._lock:
+            self._queue(external_id, status, timestamp, retries)
+            size = len(self._pending)
+
+        self._ensure_thread()
+        if size >= self.flush_size:
+            self._wakeup.set()
+
+    def _queue(self, external_id, status, timestamp, retries):
+        # Caller holds the lock
+        current = self._pending.get(external_id)
+        if not current or STATUS_RANK[status] >= STATUS_RANK[current[0]]:
+            self._pending[external_id] = (status, timestamp, retries)
+
+    def retry(self, external_id, status, timestamp, retries):
+        """Set an update aside until its backoff has passed; False once out of retries"""
+        if retries >= self.max_retries:
+            print(f"Dropped delivery status {status} for {external_id} after {retries} retries")
+            return False
+        delay = min(self.max_retry_delay, self.retry_delay * (2 ** retries))
+        with self._lock:
+            heapq.heappush(self._waiting, (time.monotonic() + delay, external_id, status, timestamp, retries + 1))
+        return True
+
+    def depth(self):
+        return len(self._pending) + len(self._waiting)
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='delivery-status', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while self.flush() >= self.flush_size:
+                pass
+
+    def flush(self):
+        """Apply up to flush_size queued updates; returns how many were taken"""
+        with self._lock:
+            now = time.monotonic()
+            while self._waiting and self._waiting[0][0] <= now:
+                _, external_id, status, timestamp, retries = heapq.heappop(self._waiting)
+                self._queue(external_id, status, timestamp, retries)
+            if not self._pending:
+                return 0
+            batch = {}
+            for external_id in list(self._pending)[:self.flush_size]:
+                batch[external_id] = self._pending.pop(external_id)
+
+        try:
+            with self.app.app_context():
+                self.apply(batch)
+        except Exception as e:
+            print(f"Delivery status flush failed: {e}")
+            for external_id, (status, timestamp, retries) in batch.items():
+                self.retry(external_id, status, timestamp, retries)
+
+        return len(batch)
+
+    def apply(self, batch):
+        from models import db, CommunicationLog
+        table = CommunicationLog.__table__
+
+        known = set(db.session.execute(
+            db.select(table.c.external_id).where(table.c.external_id.in_(list(batch)))
+        ).scalars())
+
+        by_status = {}
+        for external_id, (status, timestamp, retries) in batch.items():
+            if external_id not in known:
+                # The send may still be sitting in the write-behind log buffer
+                self.retry(external_id, status, timestamp, retries)
+                continue
+            by_status.setdefault(status, []).append({
+                'b_external_id': external_id,
+                'b_status': status,
+                'b_delivered_at': timestamp if status in ('delivered', 'read') else None
+            })
+
+        for status, rows in by_status.items():
+            db.session.execute(
+                table.update().where(
+                    table.c.external_id == db.bindparam('b_external_id'),
+                    # Plain ORs: expanding IN parameters can't be used with executemany
+                    db.or_(*[table.c.status == previous for previous in ALLOWED_PREVIOUS[status]])
+                ).values(
+                    status=db.bindparam('b_status'),
+                    delivered_at=db.func.coalesce(db.bindparam('b_delivered_at', type_=db.DateTime), table.c.delivered_at)
+                ),
+                rows
+            )
+        db.session.commit()
@@ -0,0 +1,119 @@
+import math
+from datetime import datetime
+from flask import current_app
+from models import db, HealthRecord, EmergencyAlert, GeoCell
+from utils.upsert import upsert_insert
+
+COUNTERS = ('record_count', 'high_risk_count', 'fever_count', 'alert_count', 'active_alert_count')
+MAX_LATITUDE = 85.05112878  # web mercator limit
+
+def tile_for(lat, lng, zoom):
+    """Web-mercator tile (x, y) containing a point at the given zoom"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    n = 2 ** zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def quadkey(x, y, zoom):
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return ''.join(digits)
+
+def zoom_levels():
+    return sorted(current_app.config.get('GEO_ZOOM_LEVELS', [6, 8, 10, 12]))
+
+def _cell_rows(lat, lng, deltas):
+    for zoom in zoom_levels():
+        x, y = tile_for(lat, lng, zoom)
+        row = {column: 0 for column in COUNTERS}
+        row.update(deltas, quadkey=quadkey(x, y, zoom), zoom=zoom, tile_x=x, tile_y=y)
+        yield row
+
+def update_cells(lat, lng, **deltas):
+    """Add counter deltas to the point's cell at every zoom level
+
+    Runs in the caller's transaction; one upsert per zoom level. Deltas may
+    be negative (an alert stops being active).
+    """
+    if lat is None or lng is None or not any(deltas.values()):
+        return
+    rows = list(_cell_rows(lat, lng, deltas))
+
+    insert = upsert_insert()
+    if not insert:
+        return _update_cells_portable(rows)
+
+    table = GeoCell.__table__
+    now = datetime.utcnow()
+    for row in rows:
+        stmt = insert(table).values(**row, updated_at=now)
+        updates = {column: table.c[column] + stmt.excluded[column] for column in deltas}
+        updates['updated_at'] = stmt.excluded.updated_at
+        db.session.execute(stmt.on_conflict_do_update(index_elements=['quadkey'], set_=updates))
+
+def _update_cells_portable(rows):
+    for row in rows:
+        cell = GeoCell.query.filter_by(quadkey=row['quadkey']).with_for_update().first()
+        if not cell:
+            db.session.add(GeoCell(**row))
+            db.session.flush()
+            continue
+        for column in COUNTERS:
+            setattr(cell, column, getattr(cell, column) + row[column])
+
+def record_deltas(record):
+    fever_threshold = current_app.config.get('ROLLUP_FEVER_THRESHOLD', 100.4)
+    return {
+        'record_count': 1,
+        'high_risk_count': int(record.risk_level == 'high'),
+        'fever_count': int(record.temperature is not None and record.temperature > fever_threshold)
+    }
+
+def viewport_zoom(requested):
+    """Deepest precomputed zoom level not finer than the requested one"""
+    levels = zoom_levels()
+    return max([level for level in levels if level <= requested] or [levels[0]])
+
+def cells_in_view(zoom, min_lat, min_lng, max_lat, max_lng, limit):
+    """Cells at `zoom` inside the bounding box (tile y grows southwards)"""
+    min_x, min_y = tile_for(max_lat, min_lng, zoom)
+    max_x, max_y = tile_for(min_lat, max_lng, zoom)
+    return GeoCell.query.filter(
+        GeoCell.zoom == zoom,
+        GeoCell.tile_x.between(min_x, max_x),
+        GeoCell.tile_y.between(min_y, max_y)
+    ).limit(limit).all()
+
+def rebuild_cells(batch_size=1000):
+    """Recompute every cell from health_records and emergency_alerts"""
+    totals = {}
+
+    def add(lat, lng, deltas):
+        for row in _cell_rows(lat, lng, deltas):
+            if row['quadkey'] in totals:
+                for column in COUNTERS:
+                    totals[row['quadkey']][column] += row[column]
+            else:
+                totals[row['quadkey']] = row
+
+    records = db.select(HealthRecord).where(
+        HealthRecord.location_lat.isnot(None), HealthRecord.location_lng.isnot(None)
+    ).execution_options(yield_per=batch_size)
+    for record in db.session.execute(records).scalars():
+        add(record.location_lat, record.location_lng, record_deltas(record))
+
+    alerts = db.select(EmergencyAlert.location_lat, EmergencyAlert.location_lng, EmergencyAlert.status).where(
+        EmergencyAlert.location_lat.isnot(None), EmergencyAlert.location_lng.isnot(None)
+    ).execution_options(yield_per=batch_size)
+    for lat, lng, status in db.session.execute(alerts):
+        add(lat, lng, {'alert_count': 1, 'active_alert_count': int(status != 'resolved')})
+
+    db.session.execute(db.delete(GeoCell))
+    rows = list(totals.values())
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(GeoCell.__table__.insert(), rows[start:start + batch_size])
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,224 @@
+import os
+import json
+import math
+import time
+import threading
+from datetime import datetime
+
+# Services whose backlog the readiness report shows (app attribute -> label)
+QUEUES = {
+    'db_writer': 'db_writer',
+    'communication_logger': 'communication_log',
+    'delivery_status': 'delivery_status',
+    'triage': 'triage',
+    'tracer': 'trace_export',
+}
+
+class HealthProber:
+    """Dependency checks for liveness/readiness probes, off the request path
+
+    A background thread checks the database (and replica), Redis, the
+    connection pool and queue depths every PROBE_INTERVAL seconds and keeps
+    the encoded result; probes only return it. Readiness is:
+    - 'ok' (200) when everything answered
+    - 'degraded' (200) when something the app can work around is down or
+      stretched: Redis (services fall back to per-process state), the
+      replica (reads go to the primary), an exhausted pool or stale checks
+    - 'unavailable' (503) after the primary database failed
+      PROBE_FAILURE_THRESHOLD checks in a row, so one blip doesn't take
+      every worker out of rotation at once, or when no check has completed
+      for PROBE_STALE_SECONDS
+    Liveness only says the process is serving requests.
+
+    Checks use their own connections, outside the app's pools, with
+    PROBE_TIMEOUT as connect and statement timeout, so a dead dependency
+    fails its check instead of hanging the prober.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 5.0
+        self.failure_threshold = 2
+        self.timeout = 2.0
+        self.stale_seconds = 30.0
+        self.database_failures = 0
+        self.report = None
+        self.body = None
+        self.status_code = 200
+        self._engines = {}  # url -> probe engine
+        self._redis = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('PROBE_INTERVAL', self.interval)
+        self.failure_threshold = app.config.get('PROBE_FAILURE_THRESHOLD', self.failure_threshold)
+        self.timeout = app.config.get('PROBE_TIMEOUT', self.timeout)
+        self.stale_seconds = app.config.get('PROBE_STALE_SECONDS', self.stale_seconds)
+
+    def readiness(self):
+        """(body bytes, status code) from the latest checks"""
+        self._ensure_thread()
+        if self.body is None:
+            # Cold start: check once inline rather than guess
+            with self._lock:
+                if self.body is None:
+                    self.refresh()
+        else:
+            age = time.time() - self.report['checked_at_epoch']
+            if age > self.stale_seconds:
+                # Checks that stopped completing can't vouch for anything
+                report = dict(self.report, status='unavailable', stale=True)
+                return json.dumps(report).encode(), 503
+            if age > self.interval * 3:
+                # Prober running late; say so without blocking
+                status = self.report['status'] if self.status_code == 503 else 'degraded'
+                report = dict(self.report, status=status, stale=True)
+                return json.dumps(report).encode(), self.status_code
+        return self.body, self.status_code
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Health probe failed: {e}")
+
+    def refresh(self):
+        """Run every check and publish the result"""
+        from models.database import db, REPLICA_BIND
+        with self.app.app_context():
+            checks = {'database': self._check_sql(db.engine)}
+            if REPLICA_BIND in db.engines:
+                checks['replica'] = self._check_sql(db.engines[REPLICA_BIND])
+            checks['redis'] = self._check_redis()
+            pool = self._pool(db.engine)
+            queues = self._queues(db, checks['database']['status'] == 'ok')
+
+        if checks['database']['status'] == 'ok':
+            self.database_failures = 0
+        else:
+            self.database_failures += 1
+
+        degraded = [name for name, check in checks.items() if check['status'] != 'ok' and name != 'database']
+        if pool.get('saturated'):
+            degraded.append('pool')
+        if self.database_failures >= self.failure_threshold:
+            status, code = 'unavailable', 503
+        elif degraded or self.database_failures:
+            status, code = 'degraded', 200
+        else:
+            status, code = 'ok', 200
+
+        now = time.time()
+        report = {
+            'status': status,
+            'degraded': degraded,
+            'checks': checks,
+            'pool': pool,
+            'queues': queues,
+            'pid': os.getpid(),
+            'checked_at': datetime.utcfromtimestamp(now).isoformat(),
+            'checked_at_epoch': now
+        }
+        self.report = report
+        self.body, self.status_code = json.dumps(report).encode(), code
+
+    def _probe_engine(self, engine):
+        """Unpooled engine for checks, with connect and statement timeouts"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+        key = engine.url.render_as_string(hide_password=False)
+        if key not in self._engines:
+            seconds = max(1, math.ceil(self.timeout))
+            connect_args = {
+                'postgresql': {'connect_timeout': seconds,
+                               'options': f'-c statement_timeout={int(self.timeout * 1000)}'},
+                'mysql': {'connect_timeout': seconds, 'read_timeout': seconds},
+                'sqlite': {'timeout': self.timeout},
+            }.get(engine.dialect.name, {})
+            self._engines[key] = create_engine(engine.url, poolclass=NullPool, connect_args=connect_args)
+        return self._engines[key]
+
+    def _check_sql(self, engine):
+        started = time.perf_counter()
+        try:
+            with self._probe_engine(engine).connect() as connection:
+                connection.exec_driver_sql('SELECT 1')
+            return {'status': 'ok', 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            return {'status': 'down', 'error': str(e).splitlines()[0]}
+
+    def _check_redis(self):
+        redis = getattr(self.app, 'redis', None)
+        if not redis:
+            return {'status': 'disabled'}
+        started = time.perf_counter()
+        try:
+            self._probe_redis(redis).ping()
+            return {'status': 'ok', 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            return {'status': 'down', 'error': str(e).splitlines()[0]}
+
+    def _probe_redis(self, client):
+        """Client on the app's Redis server whose socket calls time out"""
+        if self._redis is None:
+            import redis
+            pool = client.connection_pool
+            kwargs = dict(pool.connection_kwargs, socket_timeout=self.timeout, socket_connect_timeout=self.timeout)
+            self._redis = redis.client.Redis(connection_pool=redis.ConnectionPool(
+                connection_class=pool.connection_class, **kwargs
+            ))
+        return self._redis
+
+    def _pool(self, engine):
+        """Checked-out connections against the pool's capacity"""
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout') or not hasattr(pool, 'size'):
+            return {'type': type(pool).__name__}
+        size, checked_out = pool.size(), pool.checkedout()
+        max_overflow = getattr(pool, '_max_overflow', 0)
+        capacity = None if max_overflow < 0 else size + max_overflow
+        return {
+            'type': type(pool).__name__,
+            'size': size,
+            'checked_out': checked_out,
+            'overflow': pool.overflow(),
+            'capacity': capacity,
+            'saturated': capacity is not None and checked_out >= capacity
+        }
+
+    def _queues(self, db, database_up):
+        queues = {}
+        for attribute, label in QUEUES.items():
+            service = getattr(self.app, attribute, None)
+            if service is not None and hasattr(service, 'depth'):
+                try:
+                    queues[label] = service.depth()
+                except Exception:
+                    queues[label] = None
+        if database_up:
+            from models import OutboxMessage
+            try:
+                queues['outbox'] = db.session.execute(db.select(db.func.count(OutboxMessage.id)).where(
+                    OutboxMessage.status.in_(('pending', 'processing'))
+                )).scalar()
+            except Exception:
+                queues['outbox'] = None
+            finally:
+                db.session.remove()
+        return queues
@@ -0,0 +1,127 @@
+import os
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import safe_join
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+class MediaStorage:
+    """Content-addressed upload storage with background image variants"""
+
+    CHUNK_SIZE = 64 * 1024
+    IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+    def __init__(self):
+        self.upload_folder = None
+        self.variants = {}
+        self.executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.upload_folder = os.path.abspath(app.config['UPLOAD_FOLDER'])
+        self.variants = app.config.get('UPLOAD_IMAGE_VARIANTS', {})
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('UPLOAD_VARIANT_WORKERS', 1),
+            thread_name_prefix='media-variants'
+        )
+        os.makedirs(self.upload_folder, exist_ok=True)
+
+        if Image is None:
+            print("Pillow not installed - image variants disabled")
+
+    def relative_path(self, digest, extension, variant=None):
+        """Path of a stored file relative to the upload folder"""
+        name = f"{digest}_{variant}.{extension}" if variant else f"{digest}.{extension}"
+        return f"{digest[:2]}/{name}"
+
+    def save(self, file_storage, extension):
+        """Stream an upload to disk, de-duplicated by its SHA-256
+
+        Returns the path relative to the upload folder.
+        """
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.upload_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = file_storage.stream.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            relative = self.relative_path(digest.hexdigest(), extension)
+            final_path = os.path.join(self.upload_folder, relative)
+            if os.path.exists(final_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(temp_path, final_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if extension in self.IMAGE_EXTENSIONS:
+            self.schedule_variants(digest.hexdigest(), extension)
+
+        return relative
+
+    def schedule_variants(self, digest, extension):
+        """Queue thumbnail/resized variants unless they exist or are queued"""
+        if Image is None or not self.executor:
+            return
+
+        with self._lock:
+            if digest in self._pending:
+                return
+            self._pending.add(digest)
+
+        self.executor.submit(self._make_variants, digest, extension)
+
+    def _make_variants(self, digest, extension):
+        try:
+            source = os.path.join(self.upload_folder, self.relative_path(digest, extension))
+            for variant, max_side in self.variants.items():
+                target = os.path.join(self.upload_folder, self.relative_path(digest, extension, variant))
+                if os.path.exists(target):
+                    continue
+
+                with Image.open(source) as image:
+                    image.thumbnail((max_side, max_side))
+                    # Write then rename so readers never see a partial file
+                    partial = target + '.part'
+                    image.save(partial, format=image.format)
+                    os.replace(partial, target)
+        except Exception as e:
+            print(f"Image variant generation failed for {digest}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(digest)
+
+    def resolve(self, relative, variant=None):
+        """Return (absolute path, is_exact) for a stored file
+
+        is_exact is False when a requested variant is not ready yet and the
+        original is served in its place.
+        """
+        path = safe_join(self.upload_folder, relative)
+        if path is None:
+            return None, False
+
+        if not variant:
+            return path, True
+
+        if variant in self.variants:
+            name = os.path.basename(relative)
+            digest, _, extension = name.partition('.')
+            variant_path = safe_join(self.upload_folder, self.relative_path(digest, extension, variant))
+            if variant_path and os.path.exists(variant_path):
+                return variant_path, True
+        return path, False
@@ -0,0 +1,210 @@
+import time
+import random
+from datetime import datetime, timedelta
+from models import db, OutboxMessage
+from services.provider_health import FAILOVER_CHANNELS
+from services.tracing import traceparent, NOOP
+from utils.claims import claim_rows
+
+# Emergency severity -> outbox priority (higher is sent first)
+SEVERITY_PRIORITY = {'critical': 3, 'high': 2, 'medium': 1, 'low': 0}
+
+def enqueue(channel, recipient, message, priority=0, source_type=None, source_id=None):
+    """Stage a notification in the current transaction; the caller commits"""
+    entry = OutboxMessage(
+        channel=channel,
+        recipient=recipient,
+        message=message,
+        priority=priority,
+        source_type=source_type,
+        source_id=source_id,
+        traceparent=traceparent()
+    )
+    db.session.add(entry)
+    return entry
+
+class OutboxDispatcher:
+    """Drains the outbox with retries, jittered backoff and priority ordering
+
+    Several dispatchers can run side by side: rows are claimed with a lease
+    (status='processing', locked_until) before sending, and a lease that runs
+    out (dispatcher crashed mid-send) makes the row claimable again, so every
+    message is delivered at least once. Each message's lease is renewed just
+    before it is sent, so OUTBOX_LEASE_SECONDS only has to cover one send
+    (provider timeouts, retries and failover), not the whole batch; a
+    message whose lease ran out while earlier ones were sending, and that
+    another dispatcher took over, is skipped.
+    """
+
+    def __init__(self):
+        self.senders = {}
+        self.health = None
+        self.tracer = None
+        self.batch_size = 50
+        self.lease_seconds = 60
+        self.backoff_base = 5
+        self.backoff_max = 900
+        self.poll_interval = 1.0
+        self.failover_min_priority = 2
+
+    def init_app(self, app):
+        self.batch_size = app.config.get('OUTBOX_BATCH_SIZE', self.batch_size)
+        self.lease_seconds = app.config.get('OUTBOX_LEASE_SECONDS', self.lease_seconds)
+        self.backoff_base = app.config.get('OUTBOX_BACKOFF_BASE', self.backoff_base)
+        self.backoff_max = app.config.get('OUTBOX_BACKOFF_MAX', self.backoff_max)
+        self.poll_interval = app.config.get('OUTBOX_POLL_INTERVAL', self.poll_interval)
+        self.failover_min_priority = app.config.get('OUTBOX_FAILOVER_MIN_PRIORITY', self.failover_min_priority)
+
+        self.tracer = getattr(app, 'tracer', None)
+        self.health = getattr(app, 'provider_health', None)
+        if getattr(app, 'sms', None):
+            self.senders['sms'] = app.sms.send_sms
+        if getattr(app, 'whatsapp', None):
+            self.senders['whatsapp'] = app.whatsapp.send_message
+
+    def _claimable(self, now):
+        return db.or_(
+            db.and_(OutboxMessage.status == 'pending', OutboxMessage.next_attempt_at <= now),
+            db.and_(OutboxMessage.status == 'processing', OutboxMessage.locked_until < now)
+        )
+
+    def claim_batch(self, now):
+        """Lease up to batch_size due messages to this dispatcher
+
+        Returns (ids, locked_until); the lease value identifies this claim.
+        """
+        query = db.select(OutboxMessage.id).where(self._claimable(now)).order_by(
+            OutboxMessage.priority.desc(),
+            OutboxMessage.next_attempt_at
+        ).limit(self.batch_size)
+        locked_until = now + timedelta(seconds=self.lease_seconds)
+        lease = {'status': 'processing', 'locked_until': locked_until}
+
+        ids = claim_rows(OutboxMessage, query, self._claimable(now), lease)
+        db.session.commit()
+        return ids, locked_until
+
+    def renew_lease(self, entry_id, locked_until):
+        """Extend a lease this dispatcher holds; the new lease, or None if lost"""
+        renewed = datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+        result = db.session.execute(db.update(OutboxMessage).where(
+            OutboxMessage.id == entry_id,
+            OutboxMessage.status == 'processing',
+            OutboxMessage.locked_until == locked_until
+        ).values(locked_until=renewed).execution_options(synchronize_session=False))
+        db.session.commit()
+        return renewed if result.rowcount == 1 else None
+
+    def backoff(self, attempts):
+        """Seconds to wait before the next attempt (exponential, full jitter)"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def _failover_channel(self, entry):
+        """Other channel to try for a high-priority message, if it needs one"""
+        channel = FAILOVER_CHANNELS.get(entry.channel)
+        if entry.priority < self.failover_min_priority or channel not in self.senders:
+            return None
+        if self.health and not self.health.is_available(channel):
+            return None
+
+        # Only a copy already delivered on that channel makes failover
+        # redundant; one still queued may be stuck behind the same outage
+        if entry.source_id and OutboxMessage.query.filter(
+            OutboxMessage.source_type == entry.source_type,
+            OutboxMessage.source_id == entry.source_id,
+            OutboxMessage.channel == channel,
+            OutboxMessage.recipient == entry.recipient,
+            OutboxMessage.status == 'sent'
+        ).first():
+            return None
+
+        return channel
+
+    def _send(self, entry):
+        """Send via the entry's channel, failing over for critical messages"""
+        try:
+            sender = self.senders.get(entry.channel)
+            if sender and sender(entry.recipient, entry.message):
+                return True, None
+            error = f'{entry.channel} send failed'
+        except Exception as e:
+            error = str(e)
+
+        # Providers fail fast while their circuit is open, so this is quick
+        channel = self._failover_channel(entry)
+        if channel:
+            try:
+                if self.senders[channel](entry.recipient, entry.message):
+                    print(f"Outbox message {entry.id} failed over from {entry.channel} to {channel}")
+                    return True, None
+            except Exception as e:
+                error = f'{error}; {channel}: {e}'
+
+        return False, error
+
+    def _trace(self, entry):
+        # Continues the trace of the request that queued the message
+        if not self.tracer:
+            return NOOP
+        return self.tracer.continue_trace(entry.traceparent, 'outbox.send', **{
+            'outbox.id': entry.id, 'outbox.channel': entry.channel, 'outbox.attempt': entry.attempts + 1
+        })
+
+    def dispatch_once(self):
+        """Send one claimed batch; returns the number of messages processed"""
+        ids, locked_until = self.claim_batch(datetime.utcnow())
+        if not ids:
+            return 0
+
+        entries = OutboxMessage.query.filter(OutboxMessage.id.in_(ids)).order_by(
+            OutboxMessage.priority.desc(),
+            OutboxMessage.created_at
+        ).all()
+
+        processed = 0
+        for entry in entries:
+            # Earlier sends may have outlasted the batch lease; if another
+            # dispatcher re-claimed this message since, it sends it instead
+            if not self.renew_lease(entry.id, locked_until):
+                continue
+
+            with self._trace(entry) as span:
+                success, error = self._send(entry)
+                span.tag('outbox.success', success)
+
+            now = datetime.utcnow()
+            entry.attempts += 1
+            entry.locked_until = None
+            if success:
+                entry.status = 'sent'
+                entry.sent_at = now
+                entry.last_error = None
+            elif entry.attempts >= entry.max_attempts:
+                entry.status = 'failed'
+                entry.last_error = error
+            else:
+                entry.status = 'pending'
+                entry.next_attempt_at = now + timedelta(seconds=self.backoff(entry.attempts))
+                entry.last_error = error
+
+            # Commit per message so a crash mid-batch doesn't resend delivered ones
+            db.session.commit()
+            processed += 1
+
+        return processed
+
+    def run(self, stop_event=None):
+        """Dispatch until stop_event is set, sleeping when the outbox is empty"""
+        while not (stop_event and stop_event.is_set()):
+            try:
+                processed = self.dispatch_once()
+            except Exception as e:
+                print(f"Outbox dispatch error: {e}")
+                db.session.rollback()
+                processed = 0
+            finally:
+                db.session.remove()
+
+            if not processed:
+                time.sleep(self.poll_interval)
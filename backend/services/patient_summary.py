@@ -0,0 +1,94 @@
+from datetime import datetime
+from models import db, HealthRecord, PatientSummary
+from utils.upsert import upsert_insert
+
+# Columns copied from the newest record
+LATEST_COLUMNS = (
+    'latest_record_id', 'latest_recorded_at', 'blood_pressure_systolic', 'blood_pressure_diastolic',
+    'heart_rate', 'temperature', 'weight', 'oxygen_saturation', 'symptoms', 'risk_score', 'risk_level'
+)
+
+def _summary_values(record):
+    return {
+        'patient_id': record.patient_id,
+        'record_count': 1,
+        'latest_record_id': record.id,
+        'latest_recorded_at': record.recorded_at,
+        'blood_pressure_systolic': record.blood_pressure_systolic,
+        'blood_pressure_diastolic': record.blood_pressure_diastolic,
+        'heart_rate': record.heart_rate,
+        'temperature': record.temperature,
+        'weight': record.weight,
+        'oxygen_saturation': record.oxygen_saturation,
+        'symptoms': record.symptoms,
+        'risk_score': record.risk_score,
+        'risk_level': record.risk_level,
+        'last_visit_at': record.recorded_at if record.recorded_by and record.recorded_by != record.patient_id else None,
+        'updated_at': datetime.utcnow()
+    }
+
+def update_summary(record):
+    """Fold a new (flushed) health record into its patient's summary
+
+    Runs in the caller's transaction, so the summary commits or rolls back
+    with the record. One upsert statement: concurrent inserts for the same
+    patient are serialized on the summary row instead of racing a
+    read-modify-write. A record older than the current latest (entered
+    late) only bumps the count.
+    """
+    values = _summary_values(record)
+    insert = upsert_insert()
+    if not insert:
+        return _update_summary_portable(values)
+
+    table = PatientSummary.__table__
+    stmt = insert(table).values(**values)
+    new = stmt.excluded
+    is_latest = db.or_(table.c.latest_recorded_at.is_(None), table.c.latest_recorded_at <= new.latest_recorded_at)
+
+    updates = {column: db.case((is_latest, new[column]), else_=table.c[column]) for column in LATEST_COLUMNS}
+    updates['record_count'] = table.c.record_count + 1
+    updates['last_visit_at'] = db.case(
+        (db.and_(new.last_visit_at.isnot(None),
+                 db.or_(table.c.last_visit_at.is_(None), table.c.last_visit_at < new.last_visit_at)),
+         new.last_visit_at),
+        else_=table.c.last_visit_at
+    )
+    updates['updated_at'] = new.updated_at
+
+    db.session.execute(stmt.on_conflict_do_update(index_elements=['patient_id'], set_=updates))
+
+def _update_summary_portable(values):
+    summary = db.session.query(PatientSummary).filter_by(patient_id=values['patient_id']).with_for_update().first()
+    if not summary:
+        db.session.add(PatientSummary(**values))
+        return
+
+    summary.record_count += 1
+    if not summary.latest_recorded_at or summary.latest_recorded_at <= values['latest_recorded_at']:
+        for column in LATEST_COLUMNS:
+            setattr(summary, column, values[column])
+    if values['last_visit_at'] and (not summary.last_visit_at or summary.last_visit_at < values['last_visit_at']):
+        summary.last_visit_at = values['last_visit_at']
+
+def rebuild_summaries(batch_size=1000):
+    """Recompute every summary from health_records; returns the patient count"""
+    summaries = {}
+    query = db.select(HealthRecord).order_by(HealthRecord.recorded_at).execution_options(yield_per=batch_size)
+    for record in db.session.execute(query).scalars():
+        values = _summary_values(record)
+        summary = summaries.get(record.patient_id)
+        if summary is None:
+            summaries[record.patient_id] = values
+            continue
+        # Ordered by recorded_at, so each record is the newest seen so far
+        summary.update({column: values[column] for column in LATEST_COLUMNS})
+        summary['record_count'] += 1
+        summary['last_visit_at'] = values['last_visit_at'] or summary['last_visit_at']
+
+    db.session.execute(db.delete(PatientSummary))
+    rows = list(summaries.values())
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(PatientSummary.__table__.insert(), rows[start:start + batch_size])
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import time
+import uuid
+import secrets
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from flask import request
+
+PROFILE_HEADER = 'X-Profile'
+
+class Profiler:
+    """On-demand CPU and allocation profiles of live workers
+
+    Two ways in, both admin-only:
+    - a request sent with an X-Profile header carrying a token issued by
+      POST /api/admin/profiles/token runs under cProfile (and tracemalloc,
+      when no other profile holds it); any worker honours the token while it
+      lasts (Redis, per process without Redis)
+    - POST /api/admin/profiles/sample samples every thread of the worker
+      that receives it for N seconds from a background thread, writing
+      collapsed stacks (flamegraph.pl / speedscope) and the allocation
+      growth over the window
+
+    Output goes under PROFILE_DIR as <id>.json metadata plus artifact files;
+    the oldest profiles are deleted once the directory passes
+    PROFILE_DIR_MAX_BYTES. When nothing is being profiled the only cost is
+    one header lookup per request.
+    """
+
+    KEY_PREFIX = 'profile:token:'
+
+    def __init__(self):
+        self.redis = None
+        self.directory = None
+        self.max_bytes = 100 * 1024 * 1024
+        self.token_ttl = 300
+        self.max_sample_seconds = 60
+        self.sample_interval = 0.005
+        self.tracemalloc_frames = 10
+        self.top_allocations = 50
+        self._tokens = {}  # token -> expiry (monotonic), without Redis
+        self._lock = threading.Lock()
+        self._memory_lock = threading.Lock()  # tracemalloc is process-wide
+        self._sampling = None
+
+    def init_app(self, app):
+        self.redis = getattr(app, 'redis', None)
+        self.directory = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+        self.max_bytes = app.config.get('PROFILE_DIR_MAX_BYTES', self.max_bytes)
+        self.token_ttl = app.config.get('PROFILE_TOKEN_TTL', self.token_ttl)
+        self.max_sample_seconds = app.config.get('PROFILE_MAX_SAMPLE_SECONDS', self.max_sample_seconds)
+        self.sample_interval = app.config.get('PROFILE_SAMPLE_INTERVAL', self.sample_interval)
+        self.tracemalloc_frames = app.config.get('PROFILE_TRACEMALLOC_FRAMES', self.tracemalloc_frames)
+        self.top_allocations = app.config.get('PROFILE_TOP_ALLOCATIONS', self.top_allocations)
+        if not app.config.get('PROFILING_ENABLED', True):
+            return
+        app.before_request(self._start_request)
+        app.teardown_request(self._finish_request)
+
+    # Tokens
+
+    def issue_token(self, ttl=None):
+        """Token that makes requests sending it in X-Profile get profiled"""
+        ttl = int(ttl or self.token_ttl)
+        if not 0 < ttl <= 3600:
+            raise ValueError('ttl_seconds must be between 1 and 3600')
+        token = secrets.token_urlsafe(16)
+        if self.redis:
+            try:
+                self.redis.setex(self.KEY_PREFIX + token, ttl, 1)
+                return token, ttl
+            except Exception as e:
+                print(f"Profile token store failed: {e}")
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = {key: expiry for key, expiry in self._tokens.items() if expiry > now}
+            self._tokens[token] = now + ttl
+        return token, ttl
+
+    def _valid_token(self, token):
+        if self.redis:
+            try:
+                if self.redis.exists(self.KEY_PREFIX + token):
+                    return True
+            except Exception:
+                pass
+        expiry = self._tokens.get(token)
+        return bool(expiry and expiry > time.monotonic())
+
+    # Single requests
+
+    def _start_request(self):
+        token = request.headers.get(PROFILE_HEADER)
+        if not token or not self._valid_token(token):
+            return
+        memory = self._memory_lock.acquire(blocking=False)
+        if memory:
+            tracemalloc.start(self.tracemalloc_frames)
+        profile = cProfile.Profile()
+        request.environ['profile.state'] = {'profile': profile, 'memory': memory, 'started': time.perf_counter()}
+        profile.enable()
+
+    def _finish_request(self, error=None):
+        state = request.environ.pop('profile.state', None)
+        if not state:
+            return
+        state['profile'].disable()
+        elapsed = time.perf_counter() - state['started']
+        snapshot = None
+        if state['memory']:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._memory_lock.release()
+
+        try:
+            meta = self._new_profile('request', endpoint=f"{request.method} {request.path}",
+                                     duration_ms=round(elapsed * 1000, 2), error=str(error) if error else None)
+            self._write_cpu(meta, state['profile'])
+            if snapshot:
+                self._write_allocations(meta, snapshot)
+            self._save(meta)
+        except Exception as e:
+            print(f"Profile write failed: {e}")
+
+    # Worker sampling
+
+    def start_sampling(self, seconds):
+        """Sample this worker's threads for `seconds`; returns the profile id
+
+        Raises RuntimeError when a sample is already running here.
+        """
+        seconds = min(float(seconds), self.max_sample_seconds)
+        if seconds <= 0:
+            raise ValueError('seconds must be positive')
+        with self._lock:
+            if self._sampling and self._sampling.is_alive():
+                raise RuntimeError('A sample is already running on this worker')
+            meta = self._new_profile('sample', seconds=seconds, interval_ms=self.sample_interval * 1000)
+            self._sampling = threading.Thread(target=self._sample, args=(meta, seconds),
+                                              name='profile-sampler', daemon=True)
+            self._sampling.start()
+        return meta['id']
+
+    def _sample(self, meta, seconds):
+        memory = self._memory_lock.acquire(blocking=False)
+        if memory:
+            tracemalloc.start(self.tracemalloc_frames)
+            before = tracemalloc.take_snapshot()
+
+        stacks = Counter()
+        samples = 0
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own:
+                        stacks[_collapse(frame)] += 1
+                samples += 1
+                time.sleep(self.sample_interval)
+        finally:
+            after = None
+            if memory:
+                after = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                self._memory_lock.release()
+
+        try:
+            meta['samples'] = samples
+            self._write(meta, 'collapsed', 'stacks.collapsed',
+                        ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+            if after:
+                self._write_allocations(meta, after, before)
+            self._save(meta)
+        except Exception as e:
+            print(f"Profile write failed: {e}")
+
+    # Storage
+
+    def _new_profile(self, kind, **fields):
+        now = datetime.utcnow()
+        return dict(fields, id=f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}", kind=kind,
+                    pid=os.getpid(), created_at=now.isoformat(), files={})
+
+    def _path(self, name):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, name)
+
+    def _write(self, meta, key, suffix, text):
+        name = f"{meta['id']}.{suffix}"
+        with open(self._path(name), 'w', encoding='utf-8') as out:
+            out.write(text)
+        meta['files'][key] = name
+
+    def _write_cpu(self, meta, profile):
+        # Load with pstats.Stats(path) or snakeviz
+        name = f"{meta['id']}.pstats"
+        profile.dump_stats(self._path(name))
+        meta['files']['cpu'] = name
+
+    def _write_allocations(self, meta, snapshot, baseline=None):
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        if baseline:
+            stats = snapshot.compare_to(baseline, 'lineno')
+        else:
+            stats = snapshot.statistics('lineno')
+        lines = [str(stat) for stat in stats[:self.top_allocations]]
+        meta['allocated_bytes'] = sum(stat.size for stat in snapshot.statistics('filename'))
+        self._write(meta, 'allocations', 'alloc.txt', '\n'.join(lines) + '\n')
+
+    def _save(self, meta):
+        with open(self._path(f"{meta['id']}.json"), 'w', encoding='utf-8') as out:
+            json.dump(meta, out)
+        self._enforce_cap()
+
+    def _enforce_cap(self):
+        """Delete the oldest profiles until the directory fits PROFILE_DIR_MAX_BYTES"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def list_profiles(self, limit=100):
+        """Metadata of stored profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted((name for name in os.listdir(self.directory) if name.endswith('.json')), reverse=True)
+        profiles = []
+        for name in names[:limit]:
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as meta:
+                    profiles.append(json.load(meta))
+            except (OSError, ValueError):
+                continue  # deleted by the size cap meanwhile
+        return profiles
+
+    def file_path(self, name):
+        """Absolute path of a stored profile file, or None"""
+        if not self.directory or os.path.basename(name) != name:
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+def _collapse(frame):
+    """Stack of a frame as 'outer;...;inner' (Brendan Gregg's collapsed format)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
@@ -0,0 +1,148 @@
+import time
+import random
+import threading
+from collections import deque
+from services.tracing import span
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+class ProviderClientError(Exception):
+    """A request the provider rejected (bad number, 4xx): not a provider fault"""
+
+# Channel to fall back to when a provider is down, for critical messages
+FAILOVER_CHANNELS = {'whatsapp': 'sms', 'sms': 'whatsapp'}
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with latency tracking
+
+    closed -> open after failure_threshold consecutive failures; open ->
+    half_open once reset_timeout has passed, letting a single probe call
+    through; the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, latency_window=100):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.calls = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=latency_window)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency):
+        with self._lock:
+            self.calls += 1
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+            self.state = 'closed'
+            self._probe_in_flight = False
+
+    def record_failure(self, latency):
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.latencies.append(latency)
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"Circuit opened for {self.name} after {self.consecutive_failures} failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2] if latencies else None
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'calls': self.calls,
+            'failures': self.failures,
+            'latency_p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'latency_p95_ms': round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+class ProviderHealth:
+    """Circuit breakers and bounded, jittered retries for outbound providers"""
+
+    def __init__(self):
+        self.breakers = {}
+        self.failure_threshold = 5
+        self.reset_timeout = 30
+        self.max_retries = 1
+        self.backoff_base = 0.2
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.failure_threshold = app.config.get('PROVIDER_FAILURE_THRESHOLD', self.failure_threshold)
+        self.reset_timeout = app.config.get('PROVIDER_RESET_TIMEOUT', self.reset_timeout)
+        self.max_retries = app.config.get('PROVIDER_MAX_RETRIES', self.max_retries)
+        self.backoff_base = app.config.get('PROVIDER_BACKOFF_BASE', self.backoff_base)
+
+    def breaker(self, name):
+        with self._lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+            return self.breakers[name]
+
+    def is_available(self, name):
+        return self.breaker(name).state != 'open'
+
+    def call(self, name, fn, *args, **kwargs):
+        """Call a provider through its breaker, retrying transient failures
+
+        Raises CircuitOpenError without calling fn when the circuit is open.
+        ProviderClientError is passed through without retrying and does not
+        count against the provider.
+        """
+        with span(f'provider {name}', **{'provider': name}):
+            return self._call(name, fn, *args, **kwargs)
+
+    def _call(self, name, fn, *args, **kwargs):
+        breaker = self.breaker(name)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise last_error or CircuitOpenError(f"{name} circuit is open")
+
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except ProviderClientError:
+                breaker.record_success(time.perf_counter() - started)
+                raise
+            except Exception as e:
+                breaker.record_failure(time.perf_counter() - started)
+                last_error = e
+            else:
+                breaker.record_success(time.perf_counter() - started)
+                return result
+
+            if attempt < self.max_retries:
+                delay = self.backoff_base * (2 ** attempt)
+                time.sleep(random.uniform(0, delay))
+
+        raise last_error
+
+    def snapshot(self):
+        return {name: breaker.stats() for name, breaker in list(self.breakers.items())}
@@ -0,0 +1,230 @@
+import json
+import time
+import threading
+import contextvars
+from collections import deque
+from datetime import datetime
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+
+# Query count and time of the request running now
+_stats = contextvars.ContextVar('query_stats', default=None)
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more SQL statements than its endpoint's budget"""
+
+def _describe(value):
+    """A parameter's type, and length for strings, without its value"""
+    if value is None:
+        return 'None'
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__} len={len(value)}>'
+    return f'<{type(value).__name__}>'
+
+class QueryStats:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+class QueryMonitor:
+    """Per-request SQL query budgets and a slow-query log
+
+    Every statement run on a request's thread is counted and timed through
+    engine events. After the view returns, the count is checked against the
+    endpoint's budget (@query_budget, else QUERY_BUDGET_DEFAULT): over-budget
+    requests are counted per endpoint and logged, or raise
+    QueryBudgetExceeded under QUERY_BUDGET_STRICT (on by default when
+    app.testing), so a test that exercises a route fails on an N+1
+    regression. Statements run for a request on other threads (the SQLite
+    writer) are not counted against it.
+
+    Statements slower than SLOW_QUERY_MS are logged with their parameters,
+    the calling endpoint and, for SELECTs, the plan from EXPLAIN (run on a
+    separate cursor of the same connection). The log is a capped Redis list
+    shared by all workers, or a per-process deque without Redis. Parameters
+    hold health values, phone numbers and password hashes, so only their
+    types (and lengths, for strings) are logged unless
+    SLOW_QUERY_LOG_VALUES is on.
+    """
+
+    SLOW_LOG_KEY = 'queries:slow'
+    VIOLATIONS_KEY = 'queries:over_budget'
+
+    def __init__(self):
+        self.redis = None
+        self.enabled = True
+        self.strict = None  # None: strict when app.testing
+        self.default_budget = 20
+        self.slow_seconds = 0.2
+        self.explain = True
+        self.log_size = 200
+        self.log_values = False
+        self.param_length = 100
+        self._slow = deque(maxlen=self.log_size)
+        self._violations = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        from models.database import db
+        self.redis = getattr(app, 'redis', None)
+        self.enabled = app.config.get('QUERY_BUDGET_ENABLED', self.enabled)
+        self.strict = app.config.get('QUERY_BUDGET_STRICT')
+        self.default_budget = app.config.get('QUERY_BUDGET_DEFAULT', self.default_budget)
+        self.slow_seconds = app.config.get('SLOW_QUERY_MS', self.slow_seconds * 1000) / 1000
+        self.explain = app.config.get('SLOW_QUERY_EXPLAIN', self.explain)
+        self.log_size = app.config.get('SLOW_QUERY_LOG_SIZE', self.log_size)
+        self.log_values = app.config.get('SLOW_QUERY_LOG_VALUES', self.log_values)
+        self.param_length = app.config.get('SLOW_QUERY_PARAM_LENGTH', self.param_length)
+        self._slow = deque(maxlen=self.log_size)
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._check_budget)
+        app.teardown_request(self._finish_request)
+
+    # Counting
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats = _stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        if elapsed >= self.slow_seconds:
+            try:
+                self._log_slow(conn, cursor, statement, parameters, elapsed, executemany)
+            except Exception as e:
+                print(f"Slow query log failed: {e}")
+
+    def _start_request(self):
+        # Per request; batch sub-requests each get their own environ and counts
+        request.environ['query.stats'] = stats = QueryStats()
+        request.environ['query.token'] = _stats.set(stats)
+
+    def _finish_request(self, error=None):
+        token = request.environ.pop('query.token', None)
+        if token is not None:
+            _stats.reset(token)
+
+    def current(self):
+        """(count, seconds) of the request running now, or None"""
+        stats = _stats.get()
+        return (stats.count, stats.seconds) if stats else None
+
+    # Budgets
+
+    def budget_for(self, endpoint):
+        view = current_app.view_functions.get(endpoint)
+        budget = getattr(view, 'query_budget', None)
+        return self.default_budget if budget is None else budget
+
+    def _check_budget(self, response):
+        stats = request.environ.get('query.stats')
+        if not stats or not request.endpoint:
+            return response
+        budget = self.budget_for(request.endpoint)
+        if budget is None or stats.count <= budget:
+            return response
+
+        message = (f"{request.method} {request.path} ({request.endpoint}) ran {stats.count} queries "
+                   f"in {stats.seconds * 1000:.1f} ms; budget is {budget}")
+        if current_app.testing if self.strict is None else self.strict:
+            raise QueryBudgetExceeded(message)
+        print(f"Query budget exceeded: {message}")
+        self._count_violation(request.endpoint)
+        return response
+
+    def _count_violation(self, endpoint):
+        if self.redis:
+            try:
+                self.redis.hincrby(self.VIOLATIONS_KEY, endpoint, 1)
+                return
+            except Exception:
+                pass
+        with self._lock:
+            self._violations[endpoint] = self._violations.get(endpoint, 0) + 1
+
+    def violations(self):
+        """Over-budget request counts per endpoint"""
+        if self.redis:
+            try:
+                return {endpoint: int(count) for endpoint, count in self.redis.hgetall(self.VIOLATIONS_KEY).items()}
+            except Exception:
+                pass
+        return dict(self._violations)
+
+    # Slow queries
+
+    def _log_slow(self, conn, cursor, statement, parameters, elapsed, executemany):
+        entry = {
+            'at': datetime.utcnow().isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'endpoint': request.endpoint if has_request_context() else threading.current_thread().name,
+            'statement': statement,
+            'parameters': self._format_parameters(parameters, executemany),
+            'rowcount': cursor.rowcount,
+            'plan': None
+        }
+        if self.explain and not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            entry['plan'] = self._explain(conn, statement, parameters)
+
+        print(f"Slow query ({entry['duration_ms']} ms) in {entry['endpoint']}: {statement[:200]}")
+        if self.redis:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.lpush(self.SLOW_LOG_KEY, json.dumps(entry, default=str))
+                pipe.ltrim(self.SLOW_LOG_KEY, 0, self.log_size - 1)
+                pipe.execute()
+                return
+            except Exception:
+                pass
+        self._slow.appendleft(entry)
+
+    def _format_parameters(self, parameters, executemany):
+        if executemany:
+            return f"<{len(parameters)} parameter sets>"
+
+        def short(value):
+            if not self.log_values:
+                return _describe(value)
+            text = repr(value)
+            return text if len(text) <= self.param_length else text[:self.param_length] + '...'
+
+        if isinstance(parameters, dict):
+            return {key: short(value) for key, value in parameters.items()}
+        return [short(value) for value in parameters or ()]
+
+    def _explain(self, conn, statement, parameters):
+        """Plan lines for a statement, from a fresh cursor on its connection"""
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+        finally:
+            cursor.close()
+
+    def slow_queries(self, limit=50):
+        """Most recent slow queries, newest first"""
+        if self.redis:
+            try:
+                return [json.loads(entry) for entry in self.redis.lrange(self.SLOW_LOG_KEY, 0, limit - 1)]
+            except Exception:
+                pass
+        return list(self._slow)[:limit]
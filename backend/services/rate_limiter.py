@@ -0,0 +1,108 @@
+import time
+import threading
+
+# Token buckets for all KEYS in one round trip. ARGV = now, then
+# (capacity, period) per key. Nothing is consumed unless every bucket has a
+# token, so a request rejected on one key doesn't drain the others.
+TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local retry_after = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = capacity / tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        retry_after = math.max(retry_after, (1 - tokens) / rate)
+    end
+    levels[i] = tokens
+end
+if retry_after > 0 then
+    return {0, tostring(retry_after)}
+end
+for i = 1, #KEYS do
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], math.ceil(tonumber(ARGV[i * 2 + 1])))
+end
+return {1, '0'}
+"""
+
+class RateLimiter:
+    """Token-bucket rate limiter backed by Redis, with in-process fallback"""
+
+    KEY_PREFIX = 'rl:'
+    REDIS_RETRY_INTERVAL = 5  # seconds to stay on local buckets after a Redis error
+    MAX_LOCAL_BUCKETS = 100000
+
+    def __init__(self):
+        self.redis = None
+        self.enabled = True
+        self._script = None
+        self._redis_retry_at = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.redis = getattr(app, 'redis', None)
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        if self.redis:
+            self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+
+    def hit(self, limits):
+        """Consume one token from each (key, capacity, period) bucket
+
+        Returns (allowed, retry_after_seconds).
+        """
+        if not self.enabled or not limits:
+            return True, 0
+
+        now = time.time()
+        if self._script and now >= self._redis_retry_at:
+            try:
+                args = [now]
+                for _, capacity, period in limits:
+                    args.extend([capacity, period])
+                allowed, retry_after = self._script(
+                    keys=[self.KEY_PREFIX + key for key, _, _ in limits],
+                    args=args
+                )
+                return bool(int(allowed)), float(retry_after)
+            except Exception as e:
+                print(f"Rate limiter Redis error, using local buckets: {e}")
+                self._redis_retry_at = now + self.REDIS_RETRY_INTERVAL
+
+        return self._local_hit(limits, now)
+
+    def _local_hit(self, limits, now):
+        """In-process equivalent of TOKEN_BUCKET_LUA (per worker, not shared)"""
+        with self._lock:
+            if len(self._buckets) > self.MAX_LOCAL_BUCKETS:
+                self._prune(now)
+
+            levels = []
+            retry_after = 0
+            for key, capacity, period in limits:
+                rate = capacity / period
+                tokens, ts = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + max(0, now - ts) * rate)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+                levels.append(tokens)
+
+            if retry_after > 0:
+                return False, retry_after
+
+            for (key, _, _), tokens in zip(limits, levels):
+                self._buckets[key] = (tokens - 1, now)
+            return True, 0
+
+    def _prune(self, now):
+        # A bucket idle for a full day has refilled under any sane limit
+        cutoff = now - 24 * 3600
+        for key in [key for key, (_, ts) in self._buckets.items() if ts < cutoff]:
+            del self._buckets[key]
+        if len(self._buckets) > self.MAX_LOCAL_BUCKETS:
+            self._buckets.clear()
@@ -0,0 +1,141 @@
+import time
+from datetime import datetime, timedelta
+from models import db, User, Appointment
+from utils.claims import claim_rows
+from utils.clinic_time import clinic_timezone, to_local
+
+# Appointment reminder per preferred_language; {when} is the appointment time
+REMINDER_TEMPLATES = {
+    'hi': "📅 आरोग्य सहायक: आपकी स्वास्थ्य जांच {when} को है। कृपया समय पर पहुंचें।",
+    'en': "📅 Aarogya Sahayak: You have a health appointment on {when}. Please arrive on time.",
+    'bn': "📅 আরোগ্য সহায়ক: আপনার স্বাস্থ্য পরীক্ষা {when} তারিখে। অনুগ্রহ করে সময়মতো আসুন।",
+    'te': "📅 ఆరోగ్య సహాయక్: మీ ఆరోగ్య పరీక్ష {when}న ఉంది. దయచేసి సమయానికి రండి.",
+    'ta': "📅 ஆரோக்ய சகாயக்: உங்கள் சுகாதார பரிசோதனை {when} அன்று உள்ளது. தயவுசெய்து சரியான நேரத்தில் வாருங்கள்."
+}
+
+class ReminderScheduler:
+    """Sends appointment reminders in claimed batches
+
+    Due appointments are found through the (reminder_sent, appointment_date)
+    index and leased with reminder_locked_until, so several schedulers can run
+    side by side. Each batch is grouped by language and appointment time so a
+    group shares one message and goes out through the bulk send paths; each
+    group's sent appointments are marked in one UPDATE as soon as its send
+    returns. The lease grows with the batch (REMINDER_LEASE_SECONDS plus
+    REMINDER_SEND_SECONDS per message), so it outlasts the sequential sends
+    and another scheduler can't re-claim a batch that is still going out.
+    Failed sends keep their lease until it expires and are retried on a
+    later pass.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.batch_size = 500
+        self.lead_time = timedelta(hours=24)
+        self.lease_seconds = 300
+        self.send_seconds = 2.0
+        self.poll_interval = 30
+        self.channels = ['sms']
+        self.timezone = None
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('REMINDER_BATCH_SIZE', self.batch_size)
+        self.lead_time = timedelta(hours=app.config.get('REMINDER_LEAD_HOURS', 24))
+        self.lease_seconds = app.config.get('REMINDER_LEASE_SECONDS', self.lease_seconds)
+        self.send_seconds = app.config.get('REMINDER_SEND_SECONDS', self.send_seconds)
+        self.poll_interval = app.config.get('REMINDER_POLL_INTERVAL', self.poll_interval)
+        self.channels = app.config.get('REMINDER_CHANNELS', self.channels)
+        self.timezone = clinic_timezone(app)
+
+    def _claimable(self, now):
+        return db.and_(
+            Appointment.reminder_sent.is_(False),
+            Appointment.appointment_date >= now,
+            Appointment.appointment_date <= now + self.lead_time,
+            Appointment.status == 'scheduled',
+            db.or_(Appointment.reminder_locked_until.is_(None), Appointment.reminder_locked_until < now)
+        )
+
+    def claim_batch(self, now):
+        query = db.select(Appointment.id).where(self._claimable(now)).order_by(
+            Appointment.appointment_date
+        ).limit(self.batch_size)
+        lease = {'reminder_locked_until': now + timedelta(seconds=self.lease_for(self.batch_size))}
+
+        ids = claim_rows(Appointment, query, self._claimable(now), lease)
+        db.session.commit()
+        return ids
+
+    def lease_for(self, batch_size):
+        """Seconds a batch stays claimed: every send in it at its worst, plus a margin"""
+        return self.lease_seconds + batch_size * len(self.channels) * self.send_seconds
+
+    def _send_bulk(self, recipients, message):
+        """Send one message to many numbers; returns the numbers that got it"""
+        delivered = None
+        for channel in self.channels:
+            if channel == 'sms' and self.app.sms:
+                results = self.app.sms.send_bulk_sms(recipients, message)
+            elif channel == 'whatsapp' and self.app.whatsapp:
+                results = self.app.whatsapp.send_bulk_message(recipients, message)
+            else:
+                continue
+            ok = {result['phone'] for result in results if result['success']}
+            delivered = ok if delivered is None else delivered | ok
+        return delivered or set()
+
+    def run_once(self):
+        """Claim and remind one batch; returns the number of appointments claimed"""
+        ids = self.claim_batch(datetime.utcnow())
+        if not ids:
+            return 0
+
+        rows = db.session.execute(
+            db.select(
+                Appointment.id,
+                Appointment.appointment_date,
+                User.phone_number,
+                User.preferred_language
+            ).join(User, User.id == Appointment.patient_id).where(Appointment.id.in_(ids))
+        ).all()
+
+        groups = {}
+        for row in rows:
+            language = row.preferred_language if row.preferred_language in REMINDER_TEMPLATES else 'hi'
+            # Stored in UTC; patients read the clinic's wall-clock time
+            when = to_local(row.appointment_date, self.timezone) if self.timezone else row.appointment_date
+            key = (language, when.strftime('%d-%m-%Y %H:%M'))
+            groups.setdefault(key, []).append(row)
+
+        for (language, when), members in groups.items():
+            message = REMINDER_TEMPLATES[language].format(when=when)
+            delivered = self._send_bulk(sorted({row.phone_number for row in members}), message)
+            sent_ids = [row.id for row in members if row.phone_number in delivered]
+
+            # Marked right away, so a crash later in the batch can't resend this group
+            if sent_ids:
+                db.session.execute(
+                    db.update(Appointment).where(Appointment.id.in_(sent_ids)).values(
+                        reminder_sent=True,
+                        reminder_locked_until=None
+                    )
+                )
+                db.session.commit()
+
+        return len(ids)
+
+    def run(self, stop_event=None):
+        """Remind until stop_event is set, sleeping when nothing is due"""
+        while not (stop_event and stop_event.is_set()):
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                print(f"Reminder scheduler error: {e}")
+                db.session.rollback()
+                claimed = 0
+            finally:
+                db.session.remove()
+
+            if not claimed:
+                time.sleep(self.poll_interval)
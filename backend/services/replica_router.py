@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+from flask import request
+from models.database import db, REPLICA_BIND
+
+# Replay lag in seconds; 0 when the replica has applied everything it received
+POSTGRES_LAG_SQL = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+class ReplicaRouter:
+    """Decides per request whether @read_only views may read from the replica
+
+    A request goes to the primary when no replica is configured, when the
+    replica lags more than REPLICA_MAX_LAG_SECONDS (or can't be reached),
+    or when the same user wrote within REPLICA_STICKY_SECONDS, so a client
+    always sees its own recent writes. Stickiness is kept in Redis so it
+    holds across workers; without Redis it is per process.
+
+    Lag is measured on a background thread, so a replica that hangs on
+    connect never holds up a request. Until the first measurement, and
+    whenever the last one is more than two check intervals old, the
+    replica counts as lagging.
+    """
+
+    KEY_PREFIX = 'sticky:'
+
+    def __init__(self):
+        self.app = None
+        self.redis = None
+        self.max_lag = 5.0
+        self.sticky_seconds = 10
+        self.lag_check_interval = 5.0
+        self._lag = 0.0
+        self._lag_checked_at = 0
+        self._sticky = {}  # identity -> expiry (monotonic), without Redis
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.redis = getattr(app, 'redis', None)
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', self.max_lag)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', self.sticky_seconds)
+        self.lag_check_interval = app.config.get('REPLICA_LAG_CHECK_SECONDS', self.lag_check_interval)
+        app.after_request(self._after_request)
+
+    @property
+    def enabled(self):
+        return REPLICA_BIND in db.engines
+
+    def lag(self):
+        """Replica lag in seconds (cached); inf when it can't be measured"""
+        age = time.monotonic() - self._lag_checked_at
+        if age >= self.lag_check_interval:
+            self._check_in_background()
+        if age > 2 * self.lag_check_interval:
+            # Never measured, or the check is stuck on an unreachable replica
+            return float('inf')
+        return self._lag
+
+    def _check_in_background(self):
+        # One check at a time; started again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._check_lag, name='replica-lag', daemon=True)
+            self._thread.start()
+
+    def _check_lag(self):
+        with self.app.app_context():
+            engine = db.engines[REPLICA_BIND]
+            try:
+                with engine.connect() as connection:
+                    if engine.dialect.name == 'postgresql':
+                        lag = float(connection.exec_driver_sql(POSTGRES_LAG_SQL).scalar() or 0)
+                    else:
+                        # No replication status to read (e.g. a copied SQLite file)
+                        connection.exec_driver_sql('SELECT 1')
+                        lag = 0.0
+            except Exception as e:
+                print(f"Replica lag check failed: {e}")
+                lag = float('inf')
+        self._lag = lag
+        self._lag_checked_at = time.monotonic()
+
+    def is_sticky(self, identity):
+        if not identity:
+            return False
+        if self.redis:
+            try:
+                return bool(self.redis.exists(self.KEY_PREFIX + str(identity)))
+            except Exception:
+                pass
+        expiry = self._sticky.get(identity)
+        return bool(expiry and expiry > time.monotonic())
+
+    def mark_sticky(self, identity):
+        if not identity:
+            return
+        if self.redis:
+            try:
+                self.redis.setex(self.KEY_PREFIX + str(identity), self.sticky_seconds, 1)
+                return
+            except Exception:
+                pass
+        with self._lock:
+            now = time.monotonic()
+            self._sticky = {key: expiry for key, expiry in self._sticky.items() if expiry > now}
+            self._sticky[identity] = now + self.sticky_seconds
+
+    def use_replica(self, identity):
+        return self.enabled and not self.is_sticky(identity) and self.lag() <= self.max_lag
+
+    def _after_request(self, response):
+        # Requests that wrote pin their user to the primary for a while
+        if request.environ.get('db.wrote'):
+            self.mark_sticky(request.environ.get('db.identity') or _current_identity())
+        return response
+
+def _current_identity():
+    from flask_jwt_extended import get_jwt_identity
+    try:
+        return get_jwt_identity()
+    except Exception:
+        return None
@@ -0,0 +1,295 @@
+import os
+import json
+import math
+import time
+import atexit
+import threading
+from collections import Counter
+from datetime import timezone
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch with bounded relative error (DDSketch)
+
+    A value v lands in bucket ceil(log_gamma(v)); any quantile is reported
+    within `relative_accuracy` of the true value. Buckets are plain counts,
+    so sketches merge by adding counts, which also lets Redis merge them
+    (HINCRBY) across workers.
+    """
+
+    def __init__(self, relative_accuracy=0.01, buckets=None, zeros=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = Counter(buckets or {})
+        self.zeros = zeros
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.buckets.values())
+
+    def add(self, value, count=1):
+        if value <= 0:
+            self.zeros += count
+        else:
+            self.buckets[math.ceil(math.log(value) / self._log_gamma)] += count
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.zeros += other.zeros
+        return self
+
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_fields(self):
+        """Hash fields for Redis: bucket index -> count, 'z' -> zeros"""
+        fields = {str(index): count for index, count in self.buckets.items()}
+        if self.zeros:
+            fields['z'] = self.zeros
+        return fields
+
+    @classmethod
+    def from_fields(cls, fields, relative_accuracy=0.01):
+        fields = dict(fields or {})
+        zeros = int(fields.pop('z', 0))
+        return cls(relative_accuracy, {int(index): int(count) for index, count in fields.items()}, zeros)
+
+class ResponseSLA:
+    """Streaming time-to-response / time-to-resolution percentiles for alerts
+
+    Every alert state change adds one observation to the sketch for its
+    (metric, district, severity, hour). Observations collect in memory and
+    are merged into Redis hashes every SLA_FLUSH_INTERVAL seconds, so all
+    workers share one set of sketches. Each flush also adds them to a daily
+    sketch per (metric, district, severity, day). A query merges the daily
+    sketches for whole days inside the requested window and the hourly ones
+    for the partial days at its edges, so a 30-day window reads about 75
+    sketches per group rather than 720; it never reads the alerts table.
+    Without Redis each process keeps (and answers from) its own sketches.
+    """
+
+    KEY_PREFIX = 'sla:'
+    DIMENSIONS_KEY = 'sla:dimensions'  # JSON [district, severity] pairs
+    LEGACY_DIMENSIONS_KEY = 'sla:dims'  # 'district|severity', read until its sketches expire
+    METRICS = ('response', 'resolution')
+    QUANTILES = (0.5, 0.9, 0.99)
+    DAY_SECONDS = 24 * 3600
+    DAILY_SINCE_KEY = 'sla:daily_since'  # first day with complete daily sketches
+
+    def __init__(self):
+        self.redis = None
+        self.relative_accuracy = 0.01
+        self.bucket_seconds = 3600
+        self.retention_seconds = 90 * 24 * 3600
+        self.flush_interval = 10.0
+        self._pending = {}  # (metric, district, severity, bucket) -> QuantileSketch
+        self._local = {}  # same keys, kept when there is no Redis
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.redis = getattr(app, 'redis', None)
+        self.relative_accuracy = app.config.get('SLA_RELATIVE_ACCURACY', self.relative_accuracy)
+        self.bucket_seconds = app.config.get('SLA_BUCKET_SECONDS', self.bucket_seconds)
+        self.retention_seconds = app.config.get('SLA_RETENTION_DAYS', 90) * 24 * 3600
+        self.flush_interval = app.config.get('SLA_FLUSH_INTERVAL', self.flush_interval)
+        atexit.register(self.flush)
+
+    def record(self, metric, district, severity, seconds, at):
+        """Add one observation; `at` is when the state change happened (naive UTC)"""
+        epoch = at.replace(tzinfo=timezone.utc).timestamp()
+        key = (metric, district or 'unknown', severity or 'unknown', int(epoch // self.bucket_seconds))
+        with self._lock:
+            sketch = self._pending.get(key)
+            if sketch is None:
+                sketch = self._pending[key] = QuantileSketch(self.relative_accuracy)
+            sketch.add(max(seconds, 0))
+        self._ensure_thread()
+
+    def record_alert(self, alert, district, responded=False, resolved=False):
+        """Record the durations an alert state change just completed"""
+        if responded and alert.response_time:
+            self.record('response', district, alert.severity,
+                        (alert.response_time - alert.created_at).total_seconds(), alert.response_time)
+        if resolved and alert.resolved_at:
+            self.record('resolution', district, alert.severity,
+                        (alert.resolved_at - alert.created_at).total_seconds(), alert.resolved_at)
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='response-sla', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _dims(self, district, severity):
+        # JSON, so any character in a district or severity name round-trips
+        return json.dumps([district, severity], ensure_ascii=False)
+
+    def _key(self, metric, district, severity, bucket, legacy=False):
+        dims = f'{district}:{severity}' if legacy else self._dims(district, severity)
+        return f'{self.KEY_PREFIX}{metric}:{dims}:{bucket}'
+
+    def _day_key(self, metric, district, severity, day, legacy=False):
+        dims = f'{district}:{severity}' if legacy else self._dims(district, severity)
+        return f'{self.KEY_PREFIX}{metric}:{dims}:d{day}'
+
+    def _rolls_up(self):
+        # Daily sketches only line up with hour buckets that tile a day
+        return self.DAY_SECONDS % self.bucket_seconds == 0
+
+    def _day(self, bucket):
+        return bucket * self.bucket_seconds // self.DAY_SECONDS
+
+    def _daily_since(self):
+        """First day the daily sketches are complete for, or None if none are"""
+        if not self._rolls_up():
+            return None
+        if not self.redis:
+            return 0  # local sketches are read per hour either way
+        try:
+            since = self.redis.get(self.DAILY_SINCE_KEY)
+            return int(since) if since is not None else None
+        except Exception:
+            return None
+
+    def flush(self):
+        """Merge pending observations into the shared sketches"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        if self.redis:
+            try:
+                days = {}
+                pipe = self.redis.pipeline(transaction=False)
+                for (metric, district, severity, bucket), sketch in pending.items():
+                    key = self._key(metric, district, severity, bucket)
+                    for field, count in sketch.to_fields().items():
+                        pipe.hincrby(key, field, count)
+                    pipe.expire(key, self.retention_seconds)
+                    pipe.sadd(self.DIMENSIONS_KEY, self._dims(district, severity))
+                    if self._rolls_up():
+                        day_key = self._day_key(metric, district, severity, self._day(bucket))
+                        days.setdefault(day_key, QuantileSketch(self.relative_accuracy)).merge(sketch)
+                for day_key, sketch in days.items():
+                    for field, count in sketch.to_fields().items():
+                        pipe.hincrby(day_key, field, count)
+                    pipe.expire(day_key, self.retention_seconds + self.DAY_SECONDS)
+                if days:
+                    # Earlier days may have hours flushed before daily sketches existed
+                    tomorrow = self._day(int(time.time()) // self.bucket_seconds) + 1
+                    pipe.set(self.DAILY_SINCE_KEY, tomorrow, nx=True)
+                pipe.execute()
+                return len(pending)
+            except Exception as e:
+                print(f"SLA sketch flush failed: {e}")
+
+        oldest = int(time.time() - self.retention_seconds) // self.bucket_seconds
+        with self._lock:
+            for key, sketch in pending.items():
+                if key in self._local:
+                    self._local[key].merge(sketch)
+                else:
+                    self._local[key] = sketch
+            for key in [key for key in self._local if key[3] < oldest]:
+                del self._local[key]
+        return len(pending)
+
+    def _load(self, metric, buckets, days=(), district=None, severity=None):
+        """(district, severity) -> merged sketch over the given hour buckets and days"""
+        merged = {}
+
+        def add(dims, sketch):
+            if dims in merged:
+                merged[dims].merge(sketch)
+            else:
+                merged[dims] = sketch
+
+        if self.redis:
+            try:
+                dimensions = [(tuple(json.loads(value)), False) for value in self.redis.smembers(self.DIMENSIONS_KEY)]
+                dimensions += [(tuple(value.split('|', 1)), True)
+                               for value in self.redis.smembers(self.LEGACY_DIMENSIONS_KEY)]
+                dimensions = [((d, s), legacy) for (d, s), legacy in dimensions
+                              if (district is None or d == district) and (severity is None or s == severity)]
+                pipe = self.redis.pipeline(transaction=False)
+                keys = [(dims, self._key(metric, *dims, bucket, legacy))
+                        for dims, legacy in dimensions for bucket in buckets]
+                keys += [(dims, self._day_key(metric, *dims, day, legacy))
+                         for dims, legacy in dimensions for day in days]
+                for _, key in keys:
+                    pipe.hgetall(key)
+                for (dims, _), fields in zip(keys, pipe.execute()):
+                    if fields:
+                        add(dims, QuantileSketch.from_fields(fields, self.relative_accuracy))
+                return merged
+            except Exception as e:
+                print(f"SLA sketch read failed: {e}")
+
+        per_day = self.DAY_SECONDS // self.bucket_seconds
+        bucket_set = set(buckets)
+        bucket_set.update(bucket for day in days for bucket in range(day * per_day, (day + 1) * per_day))
+        with self._lock:
+            for (m, d, s, bucket), sketch in self._local.items():
+                if m == metric and bucket in bucket_set and (district is None or d == district) \
+                        and (severity is None or s == severity):
+                    add((d, s), QuantileSketch(self.relative_accuracy).merge(sketch))
+        return merged
+
+    def _summary(self, sketch):
+        summary = {'count': sketch.count}
+        for q in self.QUANTILES:
+            value = sketch.quantile(q)
+            summary[f'p{int(q * 100)}_seconds'] = round(value, 1) if value is not None else None
+        return summary
+
+    def report(self, window_seconds, district=None, severity=None):
+        """Percentiles per metric for the trailing window, by district and severity"""
+        self.flush()
+        now_bucket = int(time.time()) // self.bucket_seconds
+        span = max(1, math.ceil(window_seconds / self.bucket_seconds))
+        buckets = list(range(now_bucket - span + 1, now_bucket + 1))
+
+        # Whole days inside the window come from the daily sketches
+        days = []
+        since = self._daily_since()
+        if since is not None:
+            start = buckets[0] * self.bucket_seconds
+            end = (buckets[-1] + 1) * self.bucket_seconds
+            days = list(range(max(since, -(-start // self.DAY_SECONDS)), end // self.DAY_SECONDS))
+            covered = set(days)
+            buckets = [bucket for bucket in buckets if self._day(bucket) not in covered]
+
+        report = {}
+        for metric in self.METRICS:
+            groups = self._load(metric, buckets, days, district, severity)
+            overall = QuantileSketch(self.relative_accuracy)
+            rows = []
+            for (d, s), sketch in sorted(groups.items()):
+                overall.merge(sketch)
+                rows.append(dict(self._summary(sketch), district=d, severity=s))
+            report[metric] = {'overall': self._summary(overall), 'groups': rows}
+        return report
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, User, HealthRecord, VitalsRollup
+from utils.upsert import upsert_insert
+
+GRANULARITIES = ('hour', 'day', 'week')
+AREA_TYPES = ('village', 'district')
+COUNTERS = ('record_count', 'bp_count', 'systolic_sum', 'diastolic_sum',
+            'temperature_count', 'fever_count', 'risk_count', 'high_risk_count')
+
+def bucket_start(moment, granularity, offset_minutes=0):
+    """Start of the local-time bucket holding a naive UTC timestamp"""
+    local = moment + timedelta(minutes=offset_minutes)
+    if granularity == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return day
+    return day - timedelta(days=day.weekday())  # weeks start on Monday
+
+def _counters(record, fever_threshold):
+    has_bp = record.blood_pressure_systolic is not None and record.blood_pressure_diastolic is not None
+    has_risk = record.risk_level in ('low', 'medium', 'high')
+    return {
+        'record_count': 1,
+        'bp_count': int(has_bp),
+        'systolic_sum': record.blood_pressure_systolic if has_bp else 0,
+        'diastolic_sum': record.blood_pressure_diastolic if has_bp else 0,
+        'temperature_count': int(record.temperature is not None),
+        'fever_count': int(record.temperature is not None and record.temperature > fever_threshold),
+        'risk_count': int(has_risk),
+        'high_risk_count': int(record.risk_level == 'high')
+    }
+
+def _bucket_rows(record, areas, config):
+    """One row of counters per (granularity, area) the record belongs to"""
+    counters = _counters(record, config.get('ROLLUP_FEVER_THRESHOLD', 100.4))
+    offset = config.get('ROLLUP_UTC_OFFSET_MINUTES', 0)
+    for granularity in GRANULARITIES:
+        start = bucket_start(record.recorded_at, granularity, offset)
+        for area_type, area in areas.items():
+            if area:
+                yield dict(counters, granularity=granularity, area_type=area_type, area=area, bucket_start=start)
+
+def update_rollups(record, village=None, district=None):
+    """Add a new (flushed) health record to its area rollups
+
+    Runs in the caller's transaction. Buckets come from the record's
+    recorded_at, not the time it reached the server, so records synced late
+    from offline devices land in the bucket they belong to.
+    """
+    rows = list(_bucket_rows(record, {'village': village, 'district': district}, current_app.config))
+    if not rows:
+        return
+
+    insert = upsert_insert()
+    if not insert:
+        return _update_rollups_portable(rows)
+
+    table = VitalsRollup.__table__
+    now = datetime.utcnow()
+    for row in rows:
+        stmt = insert(table).values(**row, updated_at=now)
+        updates = {column: table.c[column] + stmt.excluded[column] for column in COUNTERS}
+        updates['updated_at'] = stmt.excluded.updated_at
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['granularity', 'area_type', 'area', 'bucket_start'],
+            set_=updates
+        ))
+
+def _update_rollups_portable(rows):
+    for row in rows:
+        rollup = VitalsRollup.query.filter_by(
+            granularity=row['granularity'],
+            area_type=row['area_type'],
+            area=row['area'],
+            bucket_start=row['bucket_start']
+        ).with_for_update().first()
+        if not rollup:
+            db.session.add(VitalsRollup(**row))
+            db.session.flush()
+            continue
+        for column in COUNTERS:
+            setattr(rollup, column, getattr(rollup, column) + row[column])
+
+def rebuild_rollups(batch_size=1000):
+    """Recompute every rollup from health_records; returns the row count"""
+    config = current_app.config
+    totals = {}
+    query = db.select(HealthRecord, User.village, User.district).join(
+        User, User.id == HealthRecord.patient_id
+    ).execution_options(yield_per=batch_size)
+
+    for record, village, district in db.session.execute(query):
+        for row in _bucket_rows(record, {'village': village, 'district': district}, config):
+            key = (row['granularity'], row['area_type'], row['area'], row['bucket_start'])
+            if key in totals:
+                for column in COUNTERS:
+                    totals[key][column] += row[column]
+            else:
+                totals[key] = row
+
+    db.session.execute(db.delete(VitalsRollup))
+    rows = list(totals.values())
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(VitalsRollup.__table__.insert(), rows[start:start + batch_size])
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,153 @@
+import bisect
+import threading
+from datetime import datetime, time, timedelta, timezone
+from models import db, Appointment
+from utils.clinic_time import clinic_timezone, to_utc
+
+class ScheduleIndex:
+    """Sorted per-worker, per-day slot index over the appointments table
+
+    Each (asha_worker_id, day) bucket holds (start, end, appointment_id)
+    tuples sorted by start, loaded with one range query on the
+    (asha_worker_id, appointment_date) index. Buckets are versioned with the
+    change tracker, so a booking made by another process invalidates them;
+    without Redis every lookup reloads the (small) buckets it needs.
+    Overlap checks are a bisect per bucket. Buckets serve availability and
+    an early conflict check; a booking is only accepted after
+    find_committed_conflict, under a lock, finds nothing.
+    """
+
+    def __init__(self):
+        self.change_tracker = None
+        self.max_duration = timedelta(hours=8)
+        self.timezone = timezone.utc  # of working hours; slots are stored in UTC
+        self._buckets = {}  # (worker_id, day) -> (version, slots)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.change_tracker = getattr(app, 'change_tracker', None)
+        self.max_duration = timedelta(minutes=app.config.get('APPOINTMENT_MAX_DURATION_MINUTES', 480))
+        self.timezone = clinic_timezone(app)
+
+    def _scope(self, worker_id, day):
+        return f'schedule:{worker_id}:{day.isoformat()}'
+
+    def worker_lock(self, worker_id):
+        """Process-local lock serializing bookings for one worker"""
+        with self._lock:
+            return self._locks.setdefault(worker_id, threading.Lock())
+
+    def _slots(self, worker_id, day):
+        """Sorted (start, end, id) slots starting on the given day"""
+        versions = self.change_tracker.versions(self._scope(worker_id, day)) if self.change_tracker else None
+        version = versions[0] if versions else None
+
+        cached = self._buckets.get((worker_id, day))
+        if cached and version is not None and cached[0] == version:
+            return cached[1]
+
+        day_start = datetime.combine(day, time.min)
+        rows = db.session.execute(
+            db.select(Appointment.id, Appointment.appointment_date, Appointment.duration_minutes).where(
+                Appointment.asha_worker_id == worker_id,
+                Appointment.appointment_date >= day_start,
+                Appointment.appointment_date < day_start + timedelta(days=1),
+                Appointment.status != 'cancelled'
+            ).order_by(Appointment.appointment_date)
+        ).all()
+
+        slots = [
+            (row.appointment_date, row.appointment_date + timedelta(minutes=row.duration_minutes or 30), row.id)
+            for row in rows
+        ]
+        if version is not None:
+            self._buckets[(worker_id, day)] = (version, slots)
+        return slots
+
+    def _days(self, start, end):
+        # An earlier appointment may run into this window, up to max_duration long
+        day = (start - self.max_duration).date()
+        while day <= end.date():
+            yield day
+            day += timedelta(days=1)
+
+    def find_conflict(self, worker_id, start, end, exclude_id=None):
+        """Id of an appointment overlapping [start, end) for the worker, or None"""
+        for day in self._days(start, end):
+            slots = self._slots(worker_id, day)
+            # Only the slot just before `end` and those before it can overlap;
+            # walk back from there while slots could still reach `start`
+            index = bisect.bisect_left(slots, (end,))
+            while index > 0:
+                index -= 1
+                slot_start, slot_end, appointment_id = slots[index]
+                if slot_end > start and appointment_id != exclude_id:
+                    return appointment_id
+                if slot_start + self.max_duration <= start:
+                    break
+        return None
+
+    def find_committed_conflict(self, worker_id, start, end, exclude_id=None):
+        """find_conflict straight from the database, bypassing the buckets
+
+        The booking path runs this while holding the write lock (SQLite) or
+        the worker's row lock: a cached bucket can predate a booking another
+        process committed a moment ago.
+        """
+        rows = db.session.execute(
+            db.select(Appointment.id, Appointment.appointment_date, Appointment.duration_minutes).where(
+                Appointment.asha_worker_id == worker_id,
+                Appointment.appointment_date > start - self.max_duration,
+                Appointment.appointment_date < end,
+                Appointment.status != 'cancelled'
+            ).order_by(Appointment.appointment_date)
+        ).all()
+        for row in rows:
+            if row.appointment_date + timedelta(minutes=row.duration_minutes or 30) > start and row.id != exclude_id:
+                return row.id
+        return None
+
+    def busy(self, worker_id, start, end):
+        """Busy (start, end) intervals overlapping [start, end), merged and sorted"""
+        intervals = []
+        for bucket_day in self._days(start, end - timedelta(microseconds=1)):
+            for slot_start, slot_end, _ in self._slots(worker_id, bucket_day):
+                if slot_end > start and slot_start < end:
+                    intervals.append((slot_start, slot_end))
+
+        merged = []
+        for slot_start, slot_end in sorted(intervals):
+            if merged and slot_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], slot_end))
+            else:
+                merged.append((slot_start, slot_end))
+        return merged
+
+    def free_slots(self, worker_id, day, duration, work_start, work_end):
+        """Start times (naive UTC, like stored appointments) of free slots of
+        `duration` within working hours
+
+        day and the working hours are clinic-local; the window is converted
+        to UTC before it is compared with the stored appointments.
+        """
+        cursor = to_utc(datetime.combine(day, work_start), self.timezone)
+        close = to_utc(datetime.combine(day, work_end), self.timezone)
+
+        slots = []
+        for busy_start, busy_end in self.busy(worker_id, cursor, close) + [(close, close)]:
+            while cursor + duration <= min(busy_start, close):
+                slots.append(cursor)
+                cursor += duration
+            cursor = max(cursor, busy_end)
+        return slots
+
+    def invalidate(self, worker_id, start, end):
+        """Call after committing a booking for the worker over [start, end)"""
+        # Every day the appointment touches, for anything cached per day
+        day = start.date()
+        while day <= (end - timedelta(microseconds=1)).date():
+            self._buckets.pop((worker_id, day), None)
+            if self.change_tracker:
+                self.change_tracker.bump(self._scope(worker_id, day))
+            day += timedelta(days=1)
@@ -1,5 +1,7 @@
 from flask import current_app
 import logging
+from urllib.parse import urlsplit
+from services.provider_health import ProviderClientError
 
 class SMSService:
     """SMS service for health communications using Twilio"""
@@ -7,25 +9,57 @@ class SMSService:
     def __init__(self):
         self.client = None
         self.phone_number = None
+        self.logger = None
+        self.health = None
 
     def init_app(self, app):
+        self.logger = getattr(app, 'communication_logger', None)
+        self.health = getattr(app, 'provider_health', None)
         try:
             from twilio.rest import Client
+            from twilio.http.http_client import TwilioHttpClient
             account_sid = app.config.get('TWILIO_ACCOUNT_SID')
             auth_token = app.config.get('TWILIO_AUTH_TOKEN')
             self.phone_number = app.config.get('TWILIO_PHONE_NUMBER')
 
             if account_sid and auth_token:
-                self.client = Client(account_sid, auth_token)
+                http_client = TwilioHttpClient(timeout=app.config.get('SMS_TIMEOUT', 5))
+                if app.config.get('TWILIO_API_URL'):
+                    _rebase(http_client, app.config['TWILIO_API_URL'])
+                self.client = Client(account_sid, auth_token, http_client=http_client)
         except ImportError:
             print("Twilio not installed - SMS functionality disabled")
 
-    def send_sms(self, phone_number, message):
+    def _log(self, phone_number, message, status, external_id=None, user_id=None):
+        if self.logger:
+            self.logger.record('sms', phone_number, message, status, external_id, user_id)
+
+    def _create(self, phone_number, message):
+        """Create the Twilio message; 4xx rejections are not provider faults"""
+        try:
+            return self.client.messages.create(
+                body=message,
+                from_=self.phone_number,
+                to=phone_number
+            )
+        except Exception as e:
+            status = getattr(e, 'status', None)
+            if status and status < 500 and status != 429:
+                raise ProviderClientError(str(e))
+            raise
+
+    def _call(self, fn, *args):
+        if self.health:
+            return self.health.call('sms', fn, *args)
+        return fn(*args)
+
+    def send_sms(self, phone_number, message, user_id=None):
         """Send SMS message"""
         try:
             if not self.client:
                 print("Twilio SMS not configured - simulating SMS send")
                 print(f"SMS to {phone_number}: {message}")
+                self._log(phone_number, message, 'sent', user_id=user_id)
                 return True
 
             # Format phone number for Indian numbers
@@ -35,17 +69,16 @@ class SMSService:
                 else:
                     phone_number = '+91' + phone_number
 
-            message_instance = self.client.messages.create(
-                body=message,
-                from_=self.phone_number,
-                to=phone_number
-            )
+            # Fails fast with CircuitOpenError while Twilio is down
+            message_instance = self._call(self._create, phone_number, message)
 
             print(f"SMS sent to {phone_number}: {message_instance.sid}")
+            self._log(phone_number, message, 'sent', message_instance.sid, user_id)
             return True
 
         except Exception as e:
             print(f"SMS send error: {e}")
+            self._log(phone_number, message, 'failed', user_id=user_id)
             return False
 
     def send_otp(self, phone_number, otp):
@@ -70,14 +103,25 @@ class SMSService:
             print(f"Health alert SMS error: {e}")
             return False
 
-    def send_bulk_sms(self, recipients, message):
+    def send_bulk_sms(self, recipients, message, user_id=None):
         """Send bulk SMS messages"""
         results = []
         for phone in recipients:
             try:
-                result = self.send_sms(phone, message)
+                result = self.send_sms(phone, message, user_id=user_id)
                 results.append({'phone': phone, 'success': result})
             except Exception as e:
                 results.append({'phone': phone, 'success': False, 'error': str(e)})
 
         return results
+
+def _rebase(http_client, base_url):
+    """Send the Twilio client's API calls to base_url, keeping path and query"""
+    request = http_client.request
+
+    def rebased(method, url, *args, **kwargs):
+        parts = urlsplit(url)
+        url = base_url.rstrip('/') + parts.path + (f'?{parts.query}' if parts.query else '')
+        return request(method, url, *args, **kwargs)
+
+    http_client.request = rebased
@@ -0,0 +1,390 @@
+import os
+import json
+import time
+import atexit
+import random
+import threading
+import contextvars
+from collections import deque
+from functools import wraps
+from flask import request
+
+# Span of the code running now; None outside traced requests and jobs
+_current = contextvars.ContextVar('trace_span', default=None)
+
+class Span:
+    """One timed operation in a trace, exported in Zipkin v2 JSON"""
+
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_id', 'name', 'kind',
+                 'sampled', 'tags', 'timestamp', 'duration', '_started', '_token')
+
+    def __init__(self, tracer, trace_id, parent_id, name, kind, sampled, tags=None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.tags = tags or {}
+        self.timestamp = time.time()
+        self.duration = None
+        self._started = time.perf_counter()
+        self._token = None
+
+    def child(self, name, kind=None, **tags):
+        """Start a span under this one (not made current; call finish())"""
+        return Span(self.tracer, self.trace_id, self.span_id, name, kind, self.sampled, tags)
+
+    def tag(self, key, value):
+        self.tags[key] = value
+
+    def finish(self, error=None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.tags['error'] = str(error) or type(error).__name__
+        if self.sampled:
+            self.tracer.export(self)
+
+    def traceparent(self):
+        """W3C trace context header value continuing this span"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.finish(exc)
+        return False
+
+    def to_zipkin(self):
+        span = {
+            'traceId': self.trace_id,
+            'id': self.span_id,
+            'name': self.name,
+            'timestamp': int(self.timestamp * 1e6),
+            'duration': max(1, int(self.duration * 1e6)),
+            'localEndpoint': {'serviceName': self.tracer.service_name},
+            'tags': {key: str(value) for key, value in self.tags.items()}
+        }
+        if self.parent_id:
+            span['parentId'] = self.parent_id
+        if self.kind:
+            span['kind'] = self.kind
+        return span
+
+class _NoopSpan:
+    """Stands in for a span when the current trace isn't sampled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def tag(self, key, value):
+        pass
+
+NOOP = _NoopSpan()
+
+def current_span():
+    return _current.get()
+
+def span(name, kind=None, **tags):
+    """Context manager timing a block as a child of the current span
+
+    Costs one context variable lookup when there is no sampled trace.
+    """
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return NOOP
+    return parent.child(name, kind, **tags)
+
+def traced(name):
+    """Decorator recording each call of a function as a span"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            with span(name):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def in_current_trace(fn, name):
+    """Wrap fn to run as a child of the current span on another thread"""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return fn
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        with parent.child(name):
+            return fn(*args, **kwargs)
+    return run
+
+def traceparent():
+    """Header value for handing the current trace to a background job"""
+    parent = _current.get()
+    return parent.traceparent() if parent else None
+
+def parse_traceparent(value):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent, or None"""
+    parts = (value or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+class Tracer:
+    """Per-request traces with spans for SQL, Redis, HTTP calls and predictions
+
+    Every request gets a trace id (returned in X-Trace-Id) and a root span;
+    a fraction TRACE_SAMPLE_RATE of traces, plus those an upstream marked
+    sampled in a traceparent header, record child spans. Unsampled traces
+    only carry their ids, so instrumented calls cost a context variable
+    lookup. Jobs queued during a request (outbox messages, writer jobs) carry
+    the trace along and continue it where they run.
+
+    Finished spans are buffered and written by a background thread as Zipkin
+    v2 JSON: one span per line to TRACE_EXPORT_PATH, and/or POSTed in
+    batches to TRACE_EXPORT_URL (Zipkin, Jaeger or an OpenTelemetry
+    collector's zipkin receiver).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.service_name = 'aarogya-sahayak'
+        self.export_path = None
+        self.export_url = None
+        self.export_max_bytes = 50 * 1024 * 1024
+        self.sql_max_length = 500
+        self.flush_interval = 2.0
+        self.max_buffer = 10000
+        self.dropped = 0
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get('TRACING_ENABLED', False)
+        self.sample_rate = app.config.get('TRACE_SAMPLE_RATE', self.sample_rate)
+        self.service_name = app.config.get('TRACE_SERVICE_NAME', self.service_name)
+        self.export_url = app.config.get('TRACE_EXPORT_URL')
+        self.export_path = app.config.get('TRACE_EXPORT_PATH')
+        if not self.export_path and not self.export_url:
+            self.export_path = os.path.join(app.instance_path, 'traces.jsonl')
+        self.export_max_bytes = app.config.get('TRACE_EXPORT_MAX_BYTES', self.export_max_bytes)
+        self.sql_max_length = app.config.get('TRACE_SQL_MAX_LENGTH', self.sql_max_length)
+        self.flush_interval = app.config.get('TRACE_FLUSH_INTERVAL', self.flush_interval)
+        self.max_buffer = app.config.get('TRACE_MAX_BUFFER', self.max_buffer)
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._tag_response)
+        app.teardown_request(self._finish_request)
+        instrument_sqlalchemy()
+        instrument_requests()
+        if getattr(app, 'redis', None):
+            instrument_redis(app.redis)
+        atexit.register(self.flush)
+
+    def start_trace(self, name, kind=None, parent=None, **tags):
+        """Root span of a new trace, or continuing a traceparent value"""
+        context = parse_traceparent(parent) if parent else None
+        if context:
+            trace_id, parent_id, sampled = context
+        else:
+            trace_id, parent_id = '%032x' % random.getrandbits(128), None
+            sampled = random.random() < self.sample_rate
+        return Span(self, trace_id, parent_id, name, kind, sampled, tags)
+
+    def continue_trace(self, parent, name, **tags):
+        """Span for a background job queued under `parent` (a traceparent)
+
+        Jobs without one (queued outside a request) start their own trace.
+        """
+        if not self.enabled:
+            return NOOP
+        return self.start_trace(name, 'CONSUMER', parent=parent, **tags)
+
+    def _start_request(self):
+        rule = request.url_rule.rule if request.url_rule else request.path
+        root = self.start_trace(f"{request.method} {rule}", 'SERVER', parent=request.headers.get('traceparent'),
+                                **{'http.method': request.method, 'http.path': request.path})
+        # Per request; batch sub-requests each get their own environ and span
+        request.environ['trace.span'] = root
+        request.environ['trace.token'] = _current.set(root)
+
+    def _tag_response(self, response):
+        root = request.environ.get('trace.span')
+        if root:
+            root.tag('http.status_code', response.status_code)
+            response.headers['X-Trace-Id'] = root.trace_id
+        return response
+
+    def _finish_request(self, error=None):
+        root = request.environ.pop('trace.span', None)
+        token = request.environ.pop('trace.token', None)
+        if token is not None:
+            _current.reset(token)
+        if root:
+            root.finish(error)
+
+    def export(self, span):
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # The exporter is not keeping up; drop rather than grow
+                self.dropped += 1
+                return
+            self._buffer.append(span.to_zipkin())
+        self._ensure_thread()
+
+    def depth(self):
+        return len(self._buffer)
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, since threads don't survive fork()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='trace-export', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Export all buffered spans; returns the number exported"""
+        with self._lock:
+            spans = list(self._buffer)
+            self._buffer.clear()
+        if not spans:
+            return 0
+
+        try:
+            if self.export_path:
+                self._write_file(spans)
+            if self.export_url:
+                import requests
+                requests.post(self.export_url, json=spans, timeout=5).raise_for_status()
+            return len(spans)
+        except Exception as e:
+            print(f"Trace export failed: {e}")
+            return 0
+
+    def _write_file(self, spans):
+        directory = os.path.dirname(self.export_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Keep one rotated file, so traces use at most twice the cap
+        if os.path.exists(self.export_path) and os.path.getsize(self.export_path) > self.export_max_bytes:
+            os.replace(self.export_path, self.export_path + '.1')
+        with open(self.export_path, 'a', encoding='utf-8') as out:
+            out.writelines(json.dumps(span, ensure_ascii=False) + '\n' for span in spans)
+
+_instrumented = set()
+
+def instrument_sqlalchemy():
+    """Record a span for every statement, on every engine (including binds)"""
+    if 'sqlalchemy' in _instrumented:
+        return
+    _instrumented.add('sqlalchemy')
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if context is not None and parent is not None and parent.sampled:
+            context._trace_span = parent.child(
+                'db.query', 'CLIENT',
+                **{'db.system': conn.dialect.name, 'db.statement': statement[:parent.tracer.sql_max_length]}
+            )
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        child = getattr(context, '_trace_span', None)
+        if child:
+            child.tag('db.rows', cursor.rowcount)
+            child.finish()
+            context._trace_span = None
+
+    @event.listens_for(Engine, 'handle_error')
+    def _error(exception_context):
+        child = getattr(exception_context.execution_context, '_trace_span', None)
+        if child:
+            child.finish(exception_context.original_exception)
+            exception_context.execution_context._trace_span = None
+
+def instrument_requests():
+    """Record a span for every outbound `requests` call (WhatsApp, Twilio)"""
+    import requests
+    if 'requests' in _instrumented:
+        return
+    _instrumented.add('requests')
+    send = requests.Session.send
+
+    def traced_send(session, prepared, **kwargs):
+        parent = _current.get()
+        if parent is None or not parent.sampled:
+            return send(session, prepared, **kwargs)
+        # Drop the query string: provider URLs can carry credentials
+        url = prepared.url.split('?', 1)[0]
+        child = parent.child(f"HTTP {prepared.method}", 'CLIENT', **{'http.method': prepared.method, 'http.url': url})
+        try:
+            response = send(session, prepared, **kwargs)
+        except Exception as e:
+            child.finish(type(e).__name__)  # the message repeats the full URL
+            raise
+        child.tag('http.status_code', response.status_code)
+        child.finish()
+        return response
+
+    requests.Session.send = traced_send
+
+def instrument_redis(client):
+    """Record a span for each command and pipeline sent through this client"""
+    if getattr(client, '_traced', False):
+        return
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    def traced_execute_command(*args, **options):
+        parent = _current.get()
+        if parent is None or not parent.sampled:
+            return execute_command(*args, **options)
+        with parent.child(f"redis {args[0]}", 'CLIENT', **{'db.system': 'redis'}):
+            return execute_command(*args, **options)
+
+    def traced_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def traced_execute(*execute_args, **execute_kwargs):
+            with span('redis pipeline', 'CLIENT', **{'db.system': 'redis', 'redis.commands': len(pipe.command_stack)}):
+                return execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = traced_execute
+        return pipe
+
+    client.execute_command = traced_execute_command
+    client.pipeline = traced_pipeline
+    client._traced = True
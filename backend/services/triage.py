@@ -0,0 +1,173 @@
+import heapq
+import time
+import threading
+from datetime import datetime, timezone
+from models import db, EmergencyAlert
+
+class TriageQueue:
+    """Urgency-ordered queue of unclaimed emergency alerts
+
+    An alert's score is its creation time minus a per-severity head start
+    (TRIAGE_SEVERITY_BOOST), so lower scores are more urgent: a critical
+    alert jumps ahead of older low-severity ones, but anything left waiting
+    long enough still reaches the front. Scores never change, so the queue
+    is a Redis sorted set (ZPOPMIN) or, without Redis, an in-process heap.
+
+    The database stays authoritative. A claim pops the most urgent id and
+    marks the alert with a compare-and-set UPDATE; entries that were already
+    claimed or resolved elsewhere simply fail it and are dropped. Alerts
+    missing from the queue (lost pops, Redis flushes) are added back by a
+    periodic resync from the active alerts in the database.
+    """
+
+    KEY = 'triage:queue'
+    SYNC_KEY = 'triage:synced'
+
+    def __init__(self):
+        self.redis = None
+        self.boost = {'critical': 3600, 'high': 1800, 'medium': 600, 'low': 0}
+        self.resync_interval = 30
+        self._heap = []  # (score, alert_id) when Redis is unavailable
+        self._queued = set()
+        self._next_sync = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.redis = getattr(app, 'redis', None)
+        self.boost = app.config.get('TRIAGE_SEVERITY_BOOST', self.boost)
+        self.resync_interval = app.config.get('TRIAGE_RESYNC_INTERVAL', self.resync_interval)
+
+    def score(self, severity, created_at):
+        # Timestamps are naive UTC; pin the zone so every server scores alike
+        return created_at.replace(tzinfo=timezone.utc).timestamp() - self.boost.get(severity, 0)
+
+    def push(self, alert):
+        """Queue an alert (call after the commit that created it)"""
+        self._add({alert.id: self.score(alert.severity, alert.created_at)})
+
+    def remove(self, alert_id):
+        if self.redis:
+            try:
+                self.redis.zrem(self.KEY, alert_id)
+                return
+            except Exception as e:
+                print(f"Triage queue remove failed: {e}")
+        with self._lock:
+            self._queued.discard(alert_id)  # its heap entry is skipped when popped
+
+    def _add(self, scores):
+        if not scores:
+            return
+        if self.redis:
+            try:
+                self.redis.zadd(self.KEY, scores)
+                return
+            except Exception as e:
+                print(f"Triage queue push failed: {e}")
+        with self._lock:
+            for alert_id, score in scores.items():
+                if alert_id not in self._queued:
+                    self._queued.add(alert_id)
+                    heapq.heappush(self._heap, (score, alert_id))
+
+    def _pop(self):
+        """Remove and return the most urgent (alert_id, score), or None"""
+        if self.redis:
+            try:
+                popped = self.redis.zpopmin(self.KEY)
+                return popped[0] if popped else None
+            except Exception as e:
+                print(f"Triage queue pop failed: {e}")
+        with self._lock:
+            while self._heap:
+                score, alert_id = heapq.heappop(self._heap)
+                if alert_id in self._queued:
+                    self._queued.discard(alert_id)
+                    return alert_id, score
+        return None
+
+    def depth(self):
+        """Unclaimed alerts waiting in the queue"""
+        if self.redis:
+            try:
+                return self.redis.zcard(self.KEY)
+            except Exception:
+                pass
+        return len(self._queued)
+
+    def _due_for_sync(self):
+        if self.redis:
+            try:
+                # One process per interval does the resync
+                return bool(self.redis.set(self.SYNC_KEY, 1, nx=True, ex=self.resync_interval))
+            except Exception:
+                pass
+        now = time.monotonic()
+        if now < self._next_sync:
+            return False
+        self._next_sync = now + self.resync_interval
+        return True
+
+    def sync(self, force=False):
+        """Add active, unclaimed alerts missing from the queue"""
+        if not force and not self._due_for_sync():
+            return
+        rows = db.session.execute(
+            db.select(EmergencyAlert.id, EmergencyAlert.severity, EmergencyAlert.created_at).where(
+                EmergencyAlert.status == 'active',
+                EmergencyAlert.responder_id.is_(None)
+            )
+        ).all()
+        # Re-adding a queued alert keeps its (unchanged) score
+        self._add({row.id: self.score(row.severity, row.created_at) for row in rows})
+
+    def peek(self, limit=20):
+        """Most urgent queued alert ids, without claiming them"""
+        self.sync()
+        if self.redis:
+            try:
+                return self.redis.zrange(self.KEY, 0, limit - 1)
+            except Exception as e:
+                print(f"Triage queue read failed: {e}")
+        with self._lock:
+            ids = []
+            for _, alert_id in sorted(self._heap):
+                if alert_id in self._queued and alert_id not in ids:
+                    ids.append(alert_id)
+                    if len(ids) == limit:
+                        break
+            return ids
+
+    def claim_next(self, responder_id):
+        """Assign the most urgent unclaimed alert to the responder
+
+        Returns the claimed EmergencyAlert, or None when nothing is waiting.
+        """
+        self.sync()
+        while True:
+            popped = self._pop()
+            if not popped:
+                return None
+            alert_id, score = popped
+
+            try:
+                result = db.session.execute(
+                    db.update(EmergencyAlert).where(
+                        EmergencyAlert.id == alert_id,
+                        EmergencyAlert.status == 'active',
+                        EmergencyAlert.responder_id.is_(None)
+                    ).values(
+                        status='responded',
+                        responder_id=responder_id,
+                        response_time=datetime.utcnow()
+                    )
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self._add({alert_id: score})
+                raise
+
+            if result.rowcount == 1:
+                return db.session.get(EmergencyAlert, alert_id)
+            # Claimed or resolved elsewhere; try the next one
@@ -9,18 +9,41 @@ class WhatsAppService:
         self.api_url = None
         self.access_token = None
         self.phone_id = None
+        self.timeout = (3, 5)
+        self.logger = None
+        self.health = None
 
     def init_app(self, app):
+        self.logger = getattr(app, 'communication_logger', None)
+        self.health = getattr(app, 'provider_health', None)
         self.api_url = app.config.get('WHATSAPP_API_URL')
         self.access_token = app.config.get('WHATSAPP_ACCESS_TOKEN')
         self.phone_id = app.config.get('WHATSAPP_PHONE_ID')
+        self.timeout = app.config.get('WHATSAPP_TIMEOUT', self.timeout)
 
-    def send_message(self, phone_number, message, message_type='text'):
+    def _log(self, phone_number, message, status, external_id=None, user_id=None):
+        if self.logger:
+            self.logger.record('whatsapp', phone_number, message, status, external_id, user_id)
+
+    def _post(self, url, headers, data):
+        """POST to the Graph API; provider faults raise so the breaker counts them"""
+        response = requests.post(url, headers=headers, json=data, timeout=self.timeout)
+        if response.status_code >= 500 or response.status_code == 429:
+            raise requests.HTTPError(f"WhatsApp API error: {response.status_code}", response=response)
+        return response
+
+    def _call(self, fn, *args):
+        if self.health:
+            return self.health.call('whatsapp', fn, *args)
+        return fn(*args)
+
+    def send_message(self, phone_number, message, message_type='text', user_id=None):
         """Send WhatsApp message"""
         try:
             if not all([self.api_url, self.access_token, self.phone_id]):
                 print("WhatsApp API not configured - simulating message")
                 print(f"WhatsApp to {phone_number}: {message}")
+                self._log(phone_number, message, 'sent', user_id=user_id)
                 return True
 
             # Format phone number (remove + and country code handling)
@@ -43,22 +66,23 @@ class WhatsAppService:
                 }
             }
 
-            response = requests.post(
-                f"{self.api_url}/{self.phone_id}/messages",
-                headers=headers,
-                json=data,
-                timeout=10
-            )
+            # Fails fast with CircuitOpenError while the Graph API is down
+            response = self._call(self._post, f"{self.api_url}/{self.phone_id}/messages", headers, data)
 
             if response.status_code == 200:
                 print(f"WhatsApp message sent to {phone_number}")
+                # Graph API returns {"messages": [{"id": "wamid..."}]}
+                messages = response.json().get('messages') or [{}]
+                self._log(phone_number, message, 'sent', messages[0].get('id'), user_id)
                 return True
             else:
                 print(f"WhatsApp API error: {response.status_code} - {response.text}")
+                self._log(phone_number, message, 'failed', user_id=user_id)
                 return False
 
         except Exception as e:
             print(f"WhatsApp send error: {e}")
+            self._log(phone_number, message, 'failed', user_id=user_id)
             return False
 
     def send_health_alert(self, phone_number, patient_name, alert_type, severity):
@@ -80,12 +104,12 @@ class WhatsAppService:
             print(f"Health alert error: {e}")
             return False
 
-    def send_bulk_message(self, phone_numbers, message):
+    def send_bulk_message(self, phone_numbers, message, user_id=None):
         """Send bulk messages (for community health campaigns)"""
         results = []
         for phone in phone_numbers:
             try:
-                result = self.send_message(phone, message)
+                result = self.send_message(phone, message, user_id=user_id)
                 results.append({'phone': phone, 'success': result})
                 # Rate limiting
                 import time
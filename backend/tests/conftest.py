@@ -0,0 +1,71 @@
+import os
+import sys
+import importlib.util
+import pytest
+import redis
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+from config import Config
+from models.database import db
+
+def _load_create_app():
+    # The legacy app/ package shadows app.py on a plain import
+    spec = importlib.util.spec_from_file_location('app_main', os.path.join(BACKEND, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.create_app
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Factory for an app on a throwaway SQLite database and a fake Redis
+
+    Keyword arguments override Config attributes for that app.
+    """
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis, 'Redis', lambda *args, **kwargs: fakeredis.FakeRedis(server=server, decode_responses=True))
+    create_app = _load_create_app()
+
+    def make(**config):
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+            'TRACING_ENABLED': False,
+            'PROFILE_DIR': str(tmp_path / 'profiles'),
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            # Tests flush write-behind buffers themselves
+            'LOG_FLUSH_INTERVAL': 3600,
+            'STATUS_FLUSH_INTERVAL': 3600,
+        }
+        settings.update(config)
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value, raising=False)
+        app, _ = create_app()
+        app.testing = True
+        with app.app_context():
+            db.create_all()
+        return app
+
+    return make
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def register(client):
+    """register(phone, role=..., **fields) -> (user id, Authorization headers)"""
+    def register(phone, role='patient', password='password123', **fields):
+        payload = {'phone_number': phone, 'password': password, 'full_name': f'User {phone[-4:]}',
+                   'role': role, 'village': 'Village A', 'district': 'District A'}
+        payload.update(fields)
+        response = client.post('/api/auth/register', json=payload)
+        assert response.status_code == 201, response.get_data(as_text=True)
+        data = response.get_json()
+        return data['user']['id'], {'Authorization': f"Bearer {data['access_token']}"}
+    return register
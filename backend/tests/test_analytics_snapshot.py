@@ -0,0 +1,42 @@
+import threading
+
+def _query(client, headers, **body):
+    return client.post('/api/admin/analytics/query', json=body, headers=headers)
+
+def test_first_query_waits_for_background_snapshot(app, client, register):
+    _, headers = register('9000000301', role='asha')
+
+    response = _query(client, headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+
+    app.analytics._thread.join(5)
+    response = _query(client, headers)
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 0
+
+def test_stale_snapshot_is_served_while_refreshing(app, client, register, monkeypatch):
+    _, headers = register('9000000302', role='asha')
+    snapshot = app.analytics
+    _query(client, headers)
+    snapshot._thread.join(5)
+
+    release = threading.Event()
+    original = snapshot.refresh
+    monkeypatch.setattr(snapshot, 'refresh', lambda: release.wait(5) and original())
+    snapshot._refreshed_at -= snapshot.refresh_seconds
+
+    try:
+        response = _query(client, headers)
+        assert response.status_code == 200
+        assert snapshot._thread.is_alive()
+    finally:
+        release.set()
+        snapshot._thread.join(5)
+
+def test_non_object_filters_are_rejected(client, register):
+    _, headers = register('9000000303', role='asha')
+
+    response = _query(client, headers, filters=['risk_level', 'high'])
+
+    assert response.status_code == 400
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from models.database import db
+from models import Appointment
+
+def _book(client, headers, worker_id, start, minutes=30):
+    return client.post('/api/health/appointments', headers=headers, json={
+        'asha_worker_id': worker_id,
+        'appointment_date': start.isoformat(),
+        'duration_minutes': minutes,
+        'appointment_type': 'checkup'
+    })
+
+def test_booking_committed_elsewhere_is_seen_despite_a_cached_bucket(app, client, register):
+    worker_id, _ = register('9000000031', role='asha')
+    patient_id, headers = register('9000000032')
+    start = datetime(2030, 1, 10, 10, 0)
+
+    with app.app_context():
+        # This process caches the empty day, then another process books the slot
+        assert app.schedule_index.find_conflict(worker_id, start, start + timedelta(minutes=30)) is None
+        other = Appointment(patient_id=patient_id, asha_worker_id=worker_id, appointment_date=start,
+                            duration_minutes=30, appointment_type='checkup')
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+    response = _book(client, headers, worker_id, start + timedelta(minutes=15))
+
+    assert response.status_code == 409
+    assert response.get_json()['conflicting_appointment_id'] == other_id
+
+def test_appointment_across_midnight_blocks_the_next_morning(client, register):
+    worker_id, _ = register('9000000033', role='asha')
+    _, headers = register('9000000034')
+
+    assert _book(client, headers, worker_id, datetime(2030, 1, 10, 23, 30), minutes=60).status_code == 201
+    assert _book(client, headers, worker_id, datetime(2030, 1, 11, 0, 15)).status_code == 409
+    assert _book(client, headers, worker_id, datetime(2030, 1, 11, 0, 30)).status_code == 201
+
+def test_invalid_duration_is_a_bad_request(client, register):
+    _, headers = register('9000000035')
+
+    response = client.post('/api/health/appointments', headers=headers, json={
+        'appointment_date': '2030-01-10T10:00:00', 'duration_minutes': 'half an hour', 'appointment_type': 'checkup'
+    })
+
+    assert response.status_code == 400
+
+def test_availability_uses_clinic_working_hours_in_utc(client, register):
+    worker_id, _ = register('9000000036', role='asha')
+    _, headers = register('9000000037')
+    url = f'/api/health/asha/{worker_id}/availability?date=2030-01-10&duration=30'
+
+    slots = client.get(url, headers=headers).get_json()['free_slots']
+    # 09:00-17:00 in Asia/Kolkata is 03:30-11:30 UTC
+    assert slots[0] == '2030-01-10T03:30:00'
+    assert slots[-1] == '2030-01-10T11:00:00'
+
+    assert _book(client, headers, worker_id, datetime(2030, 1, 10, 3, 30)).status_code == 201
+    assert client.get(url, headers=headers).get_json()['free_slots'][0] == '2030-01-10T04:00:00'
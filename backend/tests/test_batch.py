@@ -0,0 +1,33 @@
+def _login(phone):
+    return {'method': 'POST', 'path': '/api/auth/login',
+            'body': {'phone_number': phone, 'password': 'wrong-password'}}
+
+def test_sub_requests_count_against_caller_ip_limit(make_app):
+    app = make_app(RATE_LIMITS={'login': {'phone': (100, 60), 'ip': (3, 60)}})
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'phone_number': '9000000001', 'password': 'password123', 'full_name': 'Asha',
+        'role': 'asha', 'village': 'Village A', 'district': 'District A'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    response = client.post('/api/batch', headers=headers, json={
+        'requests': [_login(f'98000000{i:02d}') for i in range(5)]
+    })
+
+    statuses = [sub['status'] for sub in response.get_json()['responses']]
+    assert statuses == [401, 401, 401, 429, 429]
+    # The direct call shares the bucket the batch drained
+    assert client.post('/api/auth/login', json=_login('9800000099')['body']).status_code == 429
+
+def test_sub_requests_see_earlier_writes(client, register):
+    _, headers = register('9000000002')
+
+    response = client.post('/api/batch', headers=headers, json={'requests': [
+        {'method': 'POST', 'path': '/api/health/records', 'body': {'heart_rate': 88}},
+        {'method': 'GET', 'path': '/api/health/records'},
+    ]})
+
+    created, listed = response.get_json()['responses']
+    assert created['status'] == 201
+    assert [record['id'] for record in listed['body']['records']] == [created['body']['record']['id']]
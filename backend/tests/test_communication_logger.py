@@ -0,0 +1,26 @@
+from models.database import db
+from models import CommunicationLog
+
+def test_bad_row_is_dropped_without_holding_up_the_batch(app):
+    logger = app.communication_logger
+    logger.record('sms', '9000000001', 'first', 'sent', external_id='SM1')
+    logger.record('sms', None, 'no recipient', 'sent', external_id='SM2')
+    logger.record('sms', '9000000003', 'third', 'sent', external_id='SM3')
+
+    assert logger.flush() == 2
+    assert logger.depth() == 0
+    with app.app_context():
+        assert sorted(db.session.execute(db.select(CommunicationLog.external_id)).scalars()) == ['SM1', 'SM3']
+
+def test_rows_are_kept_while_the_database_is_down(app, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    logger = app.communication_logger
+    for index in range(3):
+        logger.record('sms', f'900000000{index}', 'message', 'sent')
+
+    def unavailable(db, rows):
+        raise OperationalError('INSERT', {}, Exception('database is locked'))
+    monkeypatch.setattr(logger, '_insert', unavailable)
+
+    assert logger.flush() == 0
+    assert logger.depth() == 3
@@ -0,0 +1,23 @@
+class FixedRisk:
+    """Predictor that returns whatever risk level the test sets next"""
+    level = 'low'
+
+    def predict_risk(self, record):
+        return {'risk_score': 0.9 if self.level == 'high' else 0.1, 'risk_level': self.level, 'recommendations': []}
+
+def test_high_risk_counts_records_and_patients_separately(app, client, register):
+    app.health_predictor = predictor = FixedRisk()
+    _, first = register('9000000051')
+    _, second = register('9000000052')
+    _, asha = register('9000000053', role='asha')
+
+    for headers, levels in ((first, ['high', 'high']), (second, ['high', 'low'])):
+        for level in levels:
+            predictor.level = level
+            assert client.post('/api/health/records', headers=headers, json={'heart_rate': 80}).status_code == 201
+
+    stats = client.get('/api/health/dashboard/stats', headers=asha).get_json()
+
+    assert stats['total_records'] == 4
+    assert stats['high_risk_patients'] == 3  # records, like the admin dashboard
+    assert stats['high_risk_patient_count'] == 1  # only the first patient is still high risk
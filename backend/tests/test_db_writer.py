@@ -0,0 +1,39 @@
+import threading
+import pytest
+
+def test_submit_times_out_and_cancels_queued_job(make_app):
+    app = make_app(SQLITE_WRITER_TIMEOUT=0.2)
+    writer = app.db_writer
+    assert writer.enabled
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    ran = []
+    blocking = writer.defer(slow)
+    assert started.wait(5)
+    try:
+        with app.app_context(), pytest.raises(TimeoutError):
+            writer.submit(lambda: ran.append(True))
+    finally:
+        release.set()
+    blocking.result(5)
+    # The writer reached the timed-out job after the caller had gone; it must not run
+    writer.submit(lambda: None)
+    assert ran == []
+
+def test_failed_last_login_write_is_logged(app, client, register, monkeypatch, capsys):
+    register('9000000401', password='password123')
+
+    def fail(user_id, moment):
+        raise RuntimeError('disk I/O error')
+    monkeypatch.setattr('routes.auth._touch_last_login', fail)
+
+    response = client.post('/api/auth/login', json={'phone_number': '9000000401', 'password': 'password123'})
+    assert response.status_code == 200
+
+    app.db_writer.submit(lambda: None)  # the failed job's group has finished
+    assert 'Last login update failed: disk I/O error' in capsys.readouterr().out
@@ -0,0 +1,104 @@
+import json
+from types import SimpleNamespace
+import pytest
+from models.database import db
+from models import CommunicationLog
+from services import delivery_status
+from services.delivery_status import (whatsapp_status_payload, twilio_status_payload,
+                                      whatsapp_signature, twilio_signature)
+
+SECRETS = {'WHATSAPP_APP_SECRET': 'wa-secret', 'TWILIO_AUTH_TOKEN': 'tw-token', 'WHATSAPP_VERIFY_TOKEN': 'verify-me'}
+TWILIO_URL = 'http://localhost/api/webhooks/twilio'
+
+@pytest.fixture
+def app(make_app):
+    return make_app(**SECRETS)
+
+def _post_whatsapp(client, payload):
+    body = json.dumps(payload).encode()
+    return client.post('/api/webhooks/whatsapp', data=body, content_type='application/json',
+                       headers={'X-Hub-Signature-256': whatsapp_signature(SECRETS['WHATSAPP_APP_SECRET'], body)})
+
+def _post_twilio(client, form):
+    return client.post('/api/webhooks/twilio', data=form,
+                       headers={'X-Twilio-Signature': twilio_signature(SECRETS['TWILIO_AUTH_TOKEN'], TWILIO_URL, form)})
+
+def _status(app, external_id):
+    with app.app_context():
+        return db.session.execute(
+            db.select(CommunicationLog.status).where(CommunicationLog.external_id == external_id)
+        ).scalar()
+
+def test_callbacks_update_the_log(app, client):
+    app.communication_logger.record('whatsapp', '9000000001', 'hello', 'sent', external_id='wamid.1')
+    app.communication_logger.record('sms', '9000000002', 'hello', 'sent', external_id='SM1')
+    app.communication_logger.flush()
+
+    assert _post_whatsapp(client, whatsapp_status_payload('wamid.1', 'read')).status_code == 200
+    assert _post_whatsapp(client, whatsapp_status_payload('wamid.1', 'delivered')).status_code == 200
+    assert _post_twilio(client, twilio_status_payload('SM1', 'undelivered')).status_code == 204
+    app.delivery_status.flush()
+
+    assert _status(app, 'wamid.1') == 'read'
+    assert _status(app, 'SM1') == 'failed'
+
+def test_callback_before_its_log_row_waits_for_the_log_flush(app, client, monkeypatch):
+    clock = SimpleNamespace(monotonic=lambda: 1000.0)
+    monkeypatch.setattr(delivery_status, 'time', clock)
+    queue = app.delivery_status
+
+    _post_twilio(client, twilio_status_payload('SM2', 'delivered'))
+    assert queue.flush() == 1
+    # Not retried on the spot, however often the flusher runs
+    assert queue.flush() == 0
+    assert queue.depth() == 1
+
+    app.communication_logger.record('sms', '9000000003', 'hello', 'sent', external_id='SM2')
+    app.communication_logger.flush()
+    clock.monotonic = lambda: 1000.0 + queue.retry_delay
+    assert queue.flush() == 1
+
+    assert queue.depth() == 0
+    assert _status(app, 'SM2') == 'delivered'
+
+def test_unsigned_or_forged_callbacks_are_refused(app, client):
+    payload = whatsapp_status_payload('wamid.2', 'delivered')
+
+    assert client.post('/api/webhooks/whatsapp', json=payload).status_code == 403
+    assert client.post('/api/webhooks/twilio', data=twilio_status_payload('SM3', 'delivered'),
+                       headers={'X-Twilio-Signature': 'forged'}).status_code == 403
+    assert app.delivery_status.depth() == 0
+
+def test_callbacks_are_refused_without_a_configured_secret(make_app):
+    client = make_app(WHATSAPP_APP_SECRET=None, TWILIO_AUTH_TOKEN=None).test_client()
+
+    response = client.post('/api/webhooks/whatsapp', json=whatsapp_status_payload('wamid.3', 'delivered'))
+    assert response.status_code == 403
+    assert 'WHATSAPP_APP_SECRET' in response.get_json()['error']
+    assert client.post('/api/webhooks/twilio', data=twilio_status_payload('SM4', 'delivered')).status_code == 403
+
+def test_subscription_handshake_echoes_only_numeric_challenges(make_app, client):
+    def handshake(client, token, challenge):
+        return client.get('/api/webhooks/whatsapp', query_string={
+            'hub.mode': 'subscribe', 'hub.verify_token': token, 'hub.challenge': challenge})
+
+    response = handshake(client, 'verify-me', '1158201444')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == '1158201444'
+    assert response.mimetype == 'text/plain'
+
+    assert handshake(client, 'verify-me', '<script>alert(1)</script>').status_code == 403
+    assert handshake(client, 'wrong', '1158201444').status_code == 403
+    unconfigured = make_app(WHATSAPP_VERIFY_TOKEN=None).test_client()
+    assert handshake(unconfigured, '', '1158201444').status_code == 403
+
+def test_malformed_timestamps_fall_back_to_now():
+    payload = whatsapp_status_payload('wamid.4', 'delivered')
+    statuses = payload['entry'][0]['changes'][0]['value']['statuses']
+    statuses.append(dict(statuses[0], id='wamid.5', timestamp='soon'))
+    statuses.append(dict(statuses[0], id='wamid.6', timestamp='9' * 30))
+
+    parsed = list(delivery_status.parse_whatsapp_statuses(payload))
+
+    assert [external_id for external_id, _, _ in parsed] == ['wamid.4', 'wamid.5', 'wamid.6']
+    assert all(timestamp.year >= 2024 for _, _, timestamp in parsed)
@@ -0,0 +1,34 @@
+import gzip
+import json
+
+def test_fields_projects_the_response(client, register):
+    _, headers = register('9000000711')
+    client.post('/api/health/records', headers=headers, json={'heart_rate': 72, 'temperature': 36.8})
+
+    response = client.get('/api/health/records?fields=heart_rate', headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['records'] == [{'heart_rate': 72}]
+
+def test_unknown_fields_are_rejected(client, register):
+    _, headers = register('9000000712')
+
+    response = client.get('/api/health/records?fields=heart_rate,password_hash', headers=headers)
+
+    assert response.status_code == 400
+    assert 'password_hash' in response.get_json()['error']
+
+def test_large_json_is_gzipped_for_clients_that_accept_it(make_app):
+    app = make_app(COMPRESS_MIN_SIZE=10)
+    client = app.test_client()
+    body = {'phone_number': '9000000713', 'password': 'password123', 'full_name': 'Compressed User',
+            'role': 'patient'}
+    headers = {'Authorization': f"Bearer {client.post('/api/auth/register', json=body).get_json()['access_token']}"}
+
+    response = client.get('/api/auth/profile', headers=dict(headers, **{'Accept-Encoding': 'gzip'}))
+    plain = client.get('/api/auth/profile', headers=headers)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.get_data())) == plain.get_json()
+    assert 'Content-Encoding' not in plain.headers
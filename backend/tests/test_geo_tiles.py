@@ -0,0 +1,17 @@
+import pytest
+
+@pytest.mark.parametrize('query', ['bbox=77,28,78', 'bbox=77,28,78,29&zoom=abc', 'bbox=77,28,78,29&zoom=8.5'])
+def test_malformed_viewport_is_a_bad_request(client, register, query):
+    _, asha = register('9000000081', role='asha')
+
+    response = client.get(f'/api/admin/geo/tiles?{query}', headers=asha)
+
+    assert response.status_code == 400
+
+def test_viewport_returns_cells(client, register):
+    _, asha = register('9000000082', role='asha')
+
+    response = client.get('/api/admin/geo/tiles?bbox=77,28,78,29&zoom=8', headers=asha)
+
+    assert response.status_code == 200
+    assert response.get_json()['cells'] == []
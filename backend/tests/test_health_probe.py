@@ -0,0 +1,37 @@
+import json
+import socket
+import time
+import redis
+
+def test_readiness_fails_once_checks_stop_completing(app):
+    prober = app.health_prober
+    prober._ensure_thread = lambda: None  # no background checks; this test moves time
+    body, status = prober.readiness()
+    assert status == 200
+
+    prober.report['checked_at_epoch'] -= prober.interval * 3 + 1
+    body, status = prober.readiness()
+    assert status == 200
+    assert json.loads(body)['status'] == 'degraded'
+
+    prober.report['checked_at_epoch'] -= prober.stale_seconds
+    body, status = prober.readiness()
+    assert status == 503
+    assert json.loads(body) == dict(prober.report, status='unavailable', stale=True)
+
+def test_check_gives_up_on_an_unresponsive_dependency(make_app):
+    app = make_app(PROBE_TIMEOUT=0.3)
+    # Accepts connections (the kernel completes the handshake) but never answers
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    try:
+        app.redis = redis.client.Redis(*server.getsockname())
+
+        started = time.monotonic()
+        check = app.health_prober._check_redis()
+
+        assert check['status'] == 'down'
+        assert time.monotonic() - started < 3
+    finally:
+        server.close()
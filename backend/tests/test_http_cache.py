@@ -0,0 +1,26 @@
+def test_matching_if_none_match_gets_304(client, register):
+    _, headers = register('9000000701')
+
+    first = client.get('/api/auth/profile', headers=headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.get('/api/auth/profile', headers=dict(headers, **{'If-None-Match': etag}))
+
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert again.get_data() == b''
+
+def test_write_changes_the_records_etag(client, register):
+    _, headers = register('9000000702')
+
+    first = client.get('/api/health/records', headers=headers)
+    etag = first.headers['ETag']
+    assert client.get('/api/health/records', headers=dict(headers, **{'If-None-Match': etag})).status_code == 304
+
+    assert client.post('/api/health/records', headers=headers, json={'heart_rate': 80}).status_code == 201
+    response = client.get('/api/health/records', headers=dict(headers, **{'If-None-Match': etag}))
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.get_json()['records']) == 1
@@ -0,0 +1,28 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from models import HealthRecord
+from utils.json_provider import _default
+
+def test_default_encodes_decimals_and_sets():
+    assert _default(Decimal('36.6')) == 36.6
+    assert sorted(_default({'sms', 'whatsapp'})) == ['sms', 'whatsapp']
+    with pytest.raises(TypeError):
+        _default(object())
+
+def test_orjson_provider_writes_iso_datetimes(app):
+    pytest.importorskip('orjson')
+    with app.app_context():
+        body = app.json.response({'at': datetime(2030, 1, 10, 9, 30), 'dose': Decimal('2.5')}).get_data()
+
+    assert json.loads(body) == {'at': '2030-01-10T09:30:00', 'dose': 2.5}
+
+def test_list_rows_carry_every_api_field(client, register):
+    _, headers = register('9000000721')
+    client.post('/api/health/records', headers=headers, json={'heart_rate': 72})
+
+    record, = client.get('/api/health/records', headers=headers).get_json()['records']
+
+    assert set(record) == set(HealthRecord.API_FIELDS)
+    assert record['heart_rate'] == 72
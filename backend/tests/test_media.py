@@ -0,0 +1,60 @@
+import io
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+def _png(width=400, height=300, color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def _upload(client, headers, data):
+    response = client.post('/api/auth/upload-photo', headers=headers,
+                           data={'photo': (io.BytesIO(data), 'me.png')}, content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+def test_identical_uploads_share_one_content_addressed_file(client, register):
+    _, first = register('9000000731')
+    _, second = register('9000000732')
+    data = _png()
+
+    assert _upload(client, first, data)['profile_photo'] == _upload(client, second, data)['profile_photo']
+    assert _upload(client, first, _png(color='blue'))['profile_photo'] != _upload(client, second, data)['profile_photo']
+
+def test_original_is_served_immutable_and_revalidates(client, register):
+    _, headers = register('9000000733')
+    data = _png()
+    path = _upload(client, headers, data)['profile_photo']
+
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert response.get_data() == data
+    assert response.cache_control.immutable
+    assert client.get(path, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+def test_thumbnail_variant_is_served_once_generated(app, client, register):
+    _, headers = register('9000000734')
+    upload = _upload(client, headers, _png())
+    app.media_storage.executor.shutdown(wait=True)  # variants are written
+
+    response = client.get(upload['profile_photo_thumb'])
+
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert max(Image.open(io.BytesIO(response.get_data())).size) == app.config['UPLOAD_IMAGE_VARIANTS']['thumb']
+
+def test_missing_variant_falls_back_to_the_original_briefly(client, register):
+    _, headers = register('9000000735')
+    data = _png()
+    path = _upload(client, headers, data)['profile_photo']
+
+    response = client.get(f'{path}?size=poster')
+
+    assert response.get_data() == data
+    assert response.cache_control.max_age == 60
+    assert not response.cache_control.immutable
+
+def test_paths_outside_the_upload_folder_are_not_served(client):
+    assert client.get('/uploads/..%2Fapp.db').status_code == 404
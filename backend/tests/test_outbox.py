@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from models.database import db
+from models import OutboxMessage
+from services.outbox import OutboxDispatcher, enqueue
+
+def _dispatcher(app, **senders):
+    dispatcher = OutboxDispatcher()
+    dispatcher.init_app(app)
+    dispatcher.senders = senders
+    return dispatcher
+
+def test_message_reclaimed_mid_batch_is_not_sent_twice(app):
+    taken_over = datetime.utcnow() + timedelta(hours=1)
+    sent = []
+
+    def slow_send(recipient, message):
+        # Meanwhile the batch lease ran out and another dispatcher took the rest
+        with db.engine.begin() as connection:
+            connection.execute(db.update(OutboxMessage).where(OutboxMessage.recipient == '9000000002')
+                               .values(locked_until=taken_over))
+        sent.append(recipient)
+        return True
+
+    with app.app_context():
+        enqueue('sms', '9000000001', 'first', priority=3)
+        enqueue('sms', '9000000002', 'second', priority=1)
+        db.session.commit()
+
+        processed = _dispatcher(app, sms=slow_send).dispatch_once()
+
+        assert processed == 1
+        assert sent == ['9000000001']
+        other = OutboxMessage.query.filter_by(recipient='9000000002').one()
+        assert (other.status, other.locked_until, other.attempts) == ('processing', taken_over, 0)
+
+def _alert(client, register, severity):
+    _, headers = register('9000000010', emergency_contact='9000000011')
+    response = client.post('/api/emergency/alert', headers=headers, json={'severity': severity})
+    assert response.status_code == 201
+    return response.get_json()['alert']['id']
+
+def test_every_alert_is_queued_on_both_channels(app, client, register):
+    _, headers = register('9000000010', emergency_contact='9000000011')
+
+    for severity in ('critical', 'low'):
+        response = client.post('/api/emergency/alert', headers=headers, json={'severity': severity})
+        with app.app_context():
+            rows = OutboxMessage.query.filter_by(source_id=response.get_json()['alert']['id'])
+            assert sorted(m.channel for m in rows) == ['sms', 'whatsapp']
+
+def test_failed_sms_fails_over_while_the_whatsapp_copy_is_still_queued(app, client, register):
+    alert_id = _alert(client, register, 'critical')
+    sent = []
+
+    def whatsapp(recipient, message):
+        sent.append(recipient)
+        return True
+
+    with app.app_context():
+        _dispatcher(app, sms=lambda *args: False, whatsapp=whatsapp).dispatch_once()
+
+        rows = {m.channel: m.status for m in OutboxMessage.query.filter_by(source_id=alert_id)}
+        assert rows == {'sms': 'sent', 'whatsapp': 'sent'}
+        # Once as the SMS row's failover, once as the WhatsApp row itself
+        assert sent == ['9000000011', '9000000011']
+
+def test_no_failover_once_the_other_channel_delivered(app, client, register):
+    alert_id = _alert(client, register, 'critical')
+
+    with app.app_context():
+        OutboxMessage.query.filter_by(source_id=alert_id, channel='whatsapp').update({'status': 'sent'})
+        db.session.commit()
+        _dispatcher(app, sms=lambda *args: False, whatsapp=lambda *args: True).dispatch_once()
+
+        message = OutboxMessage.query.filter_by(source_id=alert_id, channel='sms').one()
+        assert (message.status, message.attempts) == ('pending', 1)
+
+def test_no_failover_to_a_provider_whose_circuit_is_open(app, client, register):
+    alert_id = _alert(client, register, 'critical')
+    breaker = app.provider_health.breaker('whatsapp')
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(0.1)
+
+    with app.app_context():
+        OutboxMessage.query.filter_by(source_id=alert_id, channel='whatsapp').delete()
+        db.session.commit()
+        dispatcher = _dispatcher(app, sms=lambda *args: False, whatsapp=lambda *args: True)
+        dispatcher.dispatch_once()
+
+        message = OutboxMessage.query.filter_by(source_id=alert_id).one()
+        assert (message.status, message.attempts) == ('pending', 1)
@@ -0,0 +1,52 @@
+import os
+import pstats
+from models.database import db
+from models import User
+
+def _admin(app, register, phone):
+    user_id, headers = register(phone, role='asha')
+    with app.app_context():
+        db.session.get(User, user_id).role = 'admin'  # admins aren't self-registered
+        db.session.commit()
+    return headers
+
+def test_tokens_are_issued_to_admins_only(client, register):
+    _, asha = register('9000000091', role='asha')
+
+    assert client.post('/api/admin/profiles/token', headers=asha).status_code == 403
+
+def test_request_with_a_valid_token_is_profiled(app, client, register):
+    admin = _admin(app, register, '9000000092')
+    token = client.post('/api/admin/profiles/token', headers=admin, json={'ttl_seconds': 60}).get_json()['token']
+
+    client.get('/api/auth/profile', headers=dict(admin, **{'X-Profile': 'not-a-token'}))
+    assert app.profiler.list_profiles() == []
+
+    assert client.get('/api/auth/profile', headers=dict(admin, **{'X-Profile': token})).status_code == 200
+    profile, = app.profiler.list_profiles()
+
+    assert (profile['kind'], profile['endpoint']) == ('request', 'GET /api/auth/profile')
+    stats = pstats.Stats(app.profiler.file_path(profile['files']['cpu']))
+    assert any(name == 'get_profile' for _, _, name in stats.stats)
+    response = client.get(f"/api/admin/profiles/files/{profile['files']['cpu']}", headers=admin)
+    assert response.status_code == 200
+    response.close()
+
+def test_invalid_ttl_is_a_bad_request(app, client, register):
+    admin = _admin(app, register, '9000000093')
+
+    assert client.post('/api/admin/profiles/token', headers=admin, json={'ttl_seconds': 7200}).status_code == 400
+
+def test_oldest_profiles_are_deleted_past_the_size_cap(app):
+    profiler = app.profiler
+    profiler.max_bytes = 1500
+    os.makedirs(profiler.directory, exist_ok=True)
+    for index, name in enumerate(('old.pstats', 'middle.pstats', 'new.pstats')):
+        path = os.path.join(profiler.directory, name)
+        with open(path, 'w') as out:
+            out.write('x' * 700)
+        os.utime(path, (index, index))
+
+    profiler._enforce_cap()
+
+    assert sorted(os.listdir(profiler.directory)) == ['middle.pstats', 'new.pstats']
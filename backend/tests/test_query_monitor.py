@@ -0,0 +1,29 @@
+import json
+import pytest
+from models import db, User
+from services.query_monitor import QueryBudgetExceeded
+from utils.query_budget import query_budget
+
+def test_over_budget_route_raises_under_testing(app):
+    @query_budget(1)
+    def count_users_twice():
+        db.session.execute(db.select(db.func.count(User.id))).scalar()
+        db.session.execute(db.select(db.func.count(User.id))).scalar()
+        return {'ok': True}
+    app.add_url_rule('/api/test/over-budget', view_func=count_users_twice)
+
+    with pytest.raises(QueryBudgetExceeded, match='ran 2 queries'):
+        app.test_client().get('/api/test/over-budget')
+
+def test_slow_query_log_keeps_parameter_types_not_values(make_app):
+    app = make_app(SLOW_QUERY_MS=0)
+    response = app.test_client().post('/api/auth/login', json={'phone_number': '9000000601',
+                                                               'password': 'secret-password'})
+    assert response.status_code == 401
+
+    entries = app.query_monitor.slow_queries(limit=app.query_monitor.log_size)
+
+    logged = json.dumps(entries)
+    assert entries
+    assert '9000000601' not in logged
+    assert '<str len=10>' in logged
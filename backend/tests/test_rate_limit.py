@@ -0,0 +1,45 @@
+def test_login_without_client_address_is_refused(app):
+    client = app.test_client()
+
+    response = client.post('/api/auth/login', json={'phone_number': '9000000001', 'password': 'password123'},
+                           environ_base={'REMOTE_ADDR': ''})
+
+    assert response.status_code == 400
+    assert 'client address' in response.get_json()['error']
+
+def test_login_is_limited_per_address(make_app):
+    app = make_app(RATE_LIMITS={'login': {'phone': (100, 60), 'ip': (2, 60)}})
+    client = app.test_client()
+
+    statuses = [client.post('/api/auth/login', json={'phone_number': f'98000000{i:02d}', 'password': 'x'}).status_code
+                for i in range(3)]
+
+    assert statuses == [401, 401, 429]
+
+def test_phone_variants_share_a_bucket(make_app):
+    app = make_app(RATE_LIMITS={'login': {'phone': (2, 60), 'ip': (100, 60)}})
+    client = app.test_client()
+
+    statuses = [client.post('/api/auth/login', json={'phone_number': phone, 'password': 'x'}).status_code
+                for phone in ('9800000001', '+91 98000 00001', '098000-00001')]
+
+    assert statuses == [401, 401, 429]
+
+def test_otp_checks_are_limited_per_phone(make_app):
+    app = make_app(RATE_LIMITS={'verify_otp': {'phone': (3, 300), 'ip': (100, 300)}})
+    client = app.test_client()
+
+    statuses = [client.post('/api/auth/verify-otp', json={'phone_number': '9800000002', 'otp': f'{n:06d}'}).status_code
+                for n in range(4)]
+
+    assert statuses == [400, 400, 400, 429]
+
+def test_trusted_proxy_address_is_the_forwarded_client(make_app):
+    app = make_app(TRUSTED_PROXY_COUNT=1, RATE_LIMITS={'login': {'phone': (100, 60), 'ip': (1, 60)}})
+    client = app.test_client()
+
+    def login(client_address):
+        return client.post('/api/auth/login', json={'phone_number': '9800000003', 'password': 'x'},
+                           headers={'X-Forwarded-For': client_address}).status_code
+
+    assert [login('203.0.113.1'), login('203.0.113.2'), login('203.0.113.1')] == [401, 401, 429]
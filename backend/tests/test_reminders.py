@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import pytest
+from models.database import db
+from models import Appointment
+from services.reminders import ReminderScheduler, REMINDER_TEMPLATES
+
+class FlakySMS:
+    """Delivers to everyone, then fails on the send after `failures_after` calls"""
+
+    def __init__(self, failures_after):
+        self.calls = 0
+        self.failures_after = failures_after
+
+    def send_bulk_sms(self, recipients, message):
+        self.calls += 1
+        if self.calls > self.failures_after:
+            raise RuntimeError('provider went away')
+        return [{'phone': phone, 'success': True} for phone in recipients]
+
+def _appointment(patient_id, hours):
+    appointment = Appointment(patient_id=patient_id, appointment_type='checkup',
+                              appointment_date=datetime.utcnow() + timedelta(hours=hours))
+    db.session.add(appointment)
+    return appointment
+
+def test_each_group_is_marked_as_soon_as_it_is_sent(app, register):
+    first_id, _ = register('9000000021')
+    second_id, _ = register('9000000022')
+    scheduler = ReminderScheduler()
+    scheduler.init_app(app)
+    app.sms = FlakySMS(failures_after=1)
+
+    with app.app_context():
+        _appointment(first_id, 2)
+        _appointment(second_id, 5)
+        db.session.commit()
+
+        with pytest.raises(RuntimeError):
+            scheduler.run_once()
+        db.session.rollback()
+
+        # The group sent before the failure stays sent; the other waits for its lease
+        states = sorted((a.reminder_sent, a.reminder_locked_until is None) for a in Appointment.query)
+        assert states == [(False, False), (True, True)]
+
+def test_lease_covers_every_send_in_the_batch(app):
+    scheduler = ReminderScheduler()
+    scheduler.init_app(app)
+    scheduler.batch_size, scheduler.channels = 500, ['sms', 'whatsapp']
+
+    assert scheduler.lease_for(scheduler.batch_size) >= 500 * 2 * scheduler.send_seconds
+
+class RecordingSMS:
+    def __init__(self):
+        self.messages = []
+
+    def send_bulk_sms(self, recipients, message):
+        self.messages.append(message)
+        return [{'phone': phone, 'success': True} for phone in recipients]
+
+def test_reminder_shows_the_clinic_local_time(make_app, register):
+    app = make_app(CLINIC_TIMEZONE='Asia/Kolkata')
+    patient_id, _ = register('9000000023', preferred_language='en')
+    scheduler = ReminderScheduler()
+    scheduler.init_app(app)
+    app.sms = RecordingSMS()
+    start = (datetime.utcnow() + timedelta(hours=3)).replace(second=0, microsecond=0)
+
+    with app.app_context():
+        db.session.add(Appointment(patient_id=patient_id, appointment_type='checkup', appointment_date=start))
+        db.session.commit()
+        scheduler.run_once()
+
+    local = start + timedelta(hours=5, minutes=30)  # IST has no daylight saving
+    assert app.sms.messages == [REMINDER_TEMPLATES['en'].format(when=local.strftime('%d-%m-%Y %H:%M'))]
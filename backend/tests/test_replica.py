@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+import pytest
+from models.database import db, REPLICA_BIND
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    """An app whose replica bind is a second SQLite file"""
+    app = make_app(SQLALCHEMY_BINDS={REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"})
+    # Reads stay on the primary until the first lag check has finished
+    app.replica_router.lag()
+    app.replica_router._thread.join(5)
+    yield app
+    # init_app registers metadata per bind on the shared db; later apps have no replica
+    db.metadatas.pop(REPLICA_BIND, None)
+
+def _copy_to_replica(tmp_path):
+    # A snapshot of the primary as it is now; later writes only reach the primary
+    with sqlite3.connect(tmp_path / 'app.db') as primary, sqlite3.connect(tmp_path / 'replica.db') as replica:
+        primary.backup(replica)
+
+def _phones(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {user['phone_number'] for user in response.get_json()['users']}
+
+def test_read_only_views_read_from_replica(client, tmp_path, register):
+    _, headers = register('9000000501', role='asha')
+    _copy_to_replica(tmp_path)
+    register('9000000502')
+
+    phones = _phones(client.get('/api/admin/users', headers=headers))
+
+    assert '9000000501' in phones
+    assert '9000000502' not in phones
+
+def test_batch_writes_do_not_inherit_replica_routing(client, tmp_path, register):
+    _, headers = register('9000000503', role='asha')
+    _copy_to_replica(tmp_path)
+    register('9000000504', password='password123')  # on the primary only
+
+    response = client.post('/api/batch', headers=headers, json={'requests': [
+        {'id': 'users', 'path': '/api/admin/users'},
+        {'id': 'login', 'method': 'POST', 'path': '/api/auth/login',
+         'body': {'phone_number': '9000000504', 'password': 'password123'}},
+    ]})
+
+    assert response.status_code == 200
+    users, login = response.get_json()['responses']
+    assert '9000000504' not in {user['phone_number'] for user in users['body']['users']}
+    assert login['status'] == 200, login['body']
+
+def test_users_read_from_primary_after_writing(client, tmp_path, register):
+    worker_id, headers = register('9000000505', role='asha')
+    _copy_to_replica(tmp_path)
+    register('9000000506')
+
+    response = client.post('/api/health/appointments', headers=headers, json={
+        'asha_worker_id': worker_id, 'appointment_date': '2030-01-10T10:00:00', 'appointment_type': 'checkup'
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+    assert '9000000506' in _phones(client.get('/api/admin/users', headers=headers))
+
+def test_hanging_lag_check_does_not_block_reads(app, client, tmp_path, register, monkeypatch):
+    _, headers = register('9000000507', role='asha')
+    _copy_to_replica(tmp_path)
+    register('9000000508')
+
+    router = app.replica_router
+    release = threading.Event()
+    monkeypatch.setattr(router, '_check_lag', lambda: release.wait(5))
+    router._lag_checked_at -= 3 * router.lag_check_interval
+
+    try:
+        # The check is stuck, so the replica counts as lagging and reads use the primary
+        assert '9000000508' in _phones(client.get('/api/admin/users', headers=headers))
+        assert router._thread.is_alive()
+    finally:
+        release.set()
@@ -0,0 +1,72 @@
+import time
+from datetime import datetime, timedelta
+
+def test_long_window_reads_daily_rollups(app, monkeypatch):
+    sla = app.response_sla
+    now = datetime.utcnow()
+    for days_ago, seconds in ((0.1, 60), (3, 120), (20, 600), (45, 3600)):
+        sla.record('response', 'District A', 'critical', seconds, now - timedelta(days=days_ago))
+    sla.flush()
+    # Backfilled: the daily sketches cover these days completely
+    sla.redis.set(sla.DAILY_SINCE_KEY, 0)
+
+    reads = []
+    for name in ('_key', '_day_key'):
+        original = getattr(sla, name)
+        monkeypatch.setattr(sla, name, lambda *args, original=original: reads.append(args) or original(*args))
+
+    report = sla.report(30 * 24 * 3600, district='District A')
+
+    overall = report['response']['overall']
+    assert overall['count'] == 3
+    assert abs(overall['p50_seconds'] - 120) <= 120 * sla.relative_accuracy + 0.1
+    # Per metric: ~29 daily sketches plus the hours of the two partial days
+    assert len(reads) <= 2 * (30 + 48)
+
+def test_days_before_rollups_read_hourly_sketches(app, monkeypatch):
+    sla = app.response_sla
+    now = datetime.utcnow()
+    # Hours flushed before daily sketches existed
+    monkeypatch.setattr(sla, '_rolls_up', lambda: False)
+    sla.record('response', 'District A', 'critical', 120, now - timedelta(days=3))
+    sla.flush()
+    monkeypatch.undo()
+    sla.record('response', 'District A', 'critical', 60, now - timedelta(hours=1))
+    sla.flush()
+
+    report = sla.report(30 * 24 * 3600, district='District A')
+
+    assert report['response']['overall']['count'] == 2
+
+def test_short_window_uses_hourly_sketches(app):
+    sla = app.response_sla
+    now = datetime.utcnow()
+    sla.record('resolution', 'District A', 'high', 300, now - timedelta(minutes=10))
+    sla.record('resolution', 'District A', 'high', 900, now - timedelta(hours=3))
+
+    # Two buckets: the current (possibly minutes-old) hour and the one before
+    report = sla.report(2 * 3600)
+
+    assert report['resolution']['overall']['count'] == 1
+
+def test_district_names_may_contain_the_old_delimiter(app):
+    sla = app.response_sla
+    now = datetime.utcnow()
+    sla.record('response', 'Rampur|North', 'critical', 60, now)
+    sla.record('response', 'Rampur', 'North|critical', 600, now)
+
+    groups = sla.report(3600)['response']['groups']
+    only = sla.report(3600, district='Rampur|North')['response']
+
+    assert sorted((row['district'], row['severity'], row['count']) for row in groups) == [
+        ('Rampur', 'North|critical', 1), ('Rampur|North', 'critical', 1)]
+    assert only['overall']['count'] == 1
+    assert abs(only['overall']['p50_seconds'] - 60) <= 1
+
+def test_legacy_dimensions_are_still_read(app):
+    sla = app.response_sla
+    bucket = int(time.time()) // sla.bucket_seconds
+    sla.redis.sadd(sla.LEGACY_DIMENSIONS_KEY, 'District A|low')
+    sla.redis.hset(f'{sla.KEY_PREFIX}response:District A:low:{bucket}', mapping={'z': 2})
+
+    assert sla.report(3600, district='District A')['response']['overall']['count'] == 2
@@ -0,0 +1,50 @@
+from datetime import datetime
+from services.rollups import bucket_start, rebuild_rollups
+
+def test_buckets_follow_local_time():
+    late_evening_utc = datetime(2025, 3, 5, 20, 0)  # Wednesday 01:30 on Thursday in IST
+
+    assert bucket_start(late_evening_utc, 'hour', 330) == datetime(2025, 3, 6, 1, 0)
+    assert bucket_start(late_evening_utc, 'day', 330) == datetime(2025, 3, 6)
+    assert bucket_start(late_evening_utc, 'day') == datetime(2025, 3, 5)
+    assert bucket_start(late_evening_utc, 'week', 330) == datetime(2025, 3, 3)
+
+def _trends(client, headers, **params):
+    params = dict({'area_type': 'village', 'area': 'Village A', 'granularity': 'day',
+                   'start': '2025-03-01T00:00:00', 'end': '2025-03-10T00:00:00'}, **params)
+    response = client.get('/api/health/trends', headers=headers, query_string=params)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()['points']
+
+def _records(client, register):
+    _, patient = register('9000000061')
+    _, asha = register('9000000062', role='asha')
+    for recorded_at, systolic, temperature in (('2025-03-05T06:00:00', 120, 98.6),
+                                               ('2025-03-05T08:00:00', 140, 101.2),
+                                               ('2025-03-07T06:00:00', 130, None)):
+        response = client.post('/api/health/records', headers=patient, json={
+            'recorded_at': recorded_at, 'blood_pressure_systolic': systolic,
+            'blood_pressure_diastolic': 80, 'temperature': temperature})
+        assert response.status_code == 201
+    return asha
+
+def test_late_records_land_in_the_bucket_they_were_taken_in(client, register):
+    asha = _records(client, register)
+
+    points = _trends(client, asha)
+
+    assert [(p['bucket_start'], p['record_count'], p['avg_systolic'], p['fever_rate']) for p in points] == [
+        ('2025-03-05T00:00:00', 2, 130.0, 0.5),
+        ('2025-03-07T00:00:00', 1, 130.0, None),
+    ]
+    assert [p['record_count'] for p in _trends(client, asha, area_type='district', area='District A')] == [2, 1]
+
+def test_rebuild_matches_the_incremental_rollups(app, client, register):
+    asha = _records(client, register)
+    before = {granularity: _trends(client, asha, granularity=granularity) for granularity in ('hour', 'day', 'week')}
+
+    with app.app_context():
+        rebuild_rollups(batch_size=2)
+
+    assert {granularity: _trends(client, asha, granularity=granularity) for granularity in before} == before
+    assert len(before['week']) == 1
@@ -0,0 +1,20 @@
+from services.sms_service import _rebase
+
+class RecordingHttpClient:
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, *args, **kwargs):
+        self.calls.append((method, url, args, kwargs))
+        return 'response'
+
+def test_rebase_sends_api_calls_to_the_stub():
+    http_client = RecordingHttpClient()
+    _rebase(http_client, 'http://127.0.0.1:8081/')
+
+    result = http_client.request('POST', 'https://api.twilio.com/2010-04-01/Accounts/AC1/Messages.json?Page=2',
+                                 params=None, data={'To': '9000000001'}, auth=('AC1', 'token'))
+
+    assert result == 'response'
+    assert http_client.calls == [('POST', 'http://127.0.0.1:8081/2010-04-01/Accounts/AC1/Messages.json?Page=2', (),
+                                  {'params': None, 'data': {'To': '9000000001'}, 'auth': ('AC1', 'token')})]
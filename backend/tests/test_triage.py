@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from models.database import db
+from models import EmergencyAlert
+
+def _alert(client, headers, severity):
+    response = client.post('/api/emergency/alert', headers=headers, json={'severity': severity})
+    assert response.status_code == 201
+    return response.get_json()['alert']['id']
+
+def _claim(client, headers):
+    response = client.post('/api/emergency/triage/claim', headers=headers)
+    return response.get_json()['alert']['id'] if response.status_code == 200 else response.status_code
+
+def test_critical_alert_is_claimed_before_an_earlier_low_one(client, register):
+    _, patient = register('9000000041')
+    _, asha = register('9000000042', role='asha')
+    low = _alert(client, patient, 'low')
+    critical = _alert(client, patient, 'critical')
+
+    queue = client.get('/api/emergency/triage', headers=asha).get_json()['alerts']
+    assert [alert['id'] for alert in queue] == [critical, low]
+
+    assert _claim(client, asha) == critical
+    assert _claim(client, asha) == low
+    assert _claim(client, asha) == 404
+    assert client.get('/api/emergency/triage', headers=asha).get_json()['alerts'] == []
+
+def test_long_wait_outranks_a_fresh_critical_alert(app):
+    now = datetime(2030, 1, 10, 12, 0)
+    boost = app.triage.boost['critical']
+
+    assert app.triage.score('critical', now) < app.triage.score('low', now - timedelta(seconds=boost - 1))
+    assert app.triage.score('low', now - timedelta(seconds=boost + 1)) < app.triage.score('critical', now)
+
+def test_alert_claimed_elsewhere_is_skipped(app, client, register):
+    _, patient = register('9000000043')
+    other_id, _ = register('9000000044', role='asha')
+    responder_id, _ = register('9000000045', role='asha')
+    taken = _alert(client, patient, 'critical')
+    waiting = _alert(client, patient, 'low')
+
+    with app.app_context():
+        # Another process claims it without touching this queue
+        db.session.get(EmergencyAlert, taken).responder_id = other_id
+        db.session.commit()
+
+        claimed = app.triage.claim_next(responder_id)
+
+        assert (claimed.id, claimed.responder_id, claimed.status) == (waiting, responder_id, 'responded')
+        assert app.triage.depth() == 0
+
+def test_alerts_missing_from_the_queue_are_resynced(app, client, register):
+    _, patient = register('9000000046')
+    _, asha = register('9000000047', role='asha')
+    alert_id = _alert(client, patient, 'medium')
+
+    app.redis.delete(app.triage.KEY, app.triage.SYNC_KEY)  # e.g. a Redis flush
+
+    assert _claim(client, asha) == alert_id
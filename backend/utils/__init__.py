@@ -0,0 +1,15 @@
+from .http_cache import make_etag, not_modified, tag_response
+from .compression import init_compression
+from .fields import parse_fields, field_columns, select_columns, serialize_rows
+from .json_provider import init_json_provider
+from .rate_limit import rate_limit
+from .claims import claim_rows
+from .upsert import upsert_insert
+from .sqlite import configure_sqlite, init_sqlite_pragmas
+from .replica import read_only
+from .query_budget import query_budget
+
+__all__ = ['make_etag', 'not_modified', 'tag_response', 'init_compression',
+           'parse_fields', 'field_columns', 'select_columns', 'serialize_rows',
+           'init_json_provider', 'rate_limit', 'claim_rows', 'upsert_insert',
+           'configure_sqlite', 'init_sqlite_pragmas', 'read_only', 'query_budget']
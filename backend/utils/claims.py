@@ -0,0 +1,26 @@
+from models import db
+
+def claim_rows(model, candidates, claimable, values):
+    """Atomically lease rows so concurrent workers never process the same one
+
+    candidates is a select of model ids (ordered and limited by the caller),
+    claimable the condition a row must still meet to be taken, and values
+    the columns that mark it as taken. Returns the claimed ids; the caller
+    commits.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        # Row locks keep concurrent workers off each other's batch
+        ids = db.session.execute(candidates.with_for_update(skip_locked=True)).scalars().all()
+        if ids:
+            db.session.execute(db.update(model).where(model.id.in_(ids)).values(**values))
+        return ids
+
+    # Compare-and-set per row; a row another worker took matches 0 rows
+    ids = []
+    for row_id in db.session.execute(candidates).scalars().all():
+        result = db.session.execute(
+            db.update(model).where(model.id == row_id, claimable).values(**values)
+        )
+        if result.rowcount == 1:
+            ids.append(row_id)
+    return ids
@@ -0,0 +1,14 @@
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+def clinic_timezone(app):
+    """Timezone clinic-facing times are shown in and entered as (CLINIC_TIMEZONE)"""
+    return ZoneInfo(app.config.get('CLINIC_TIMEZONE') or 'UTC')
+
+def to_local(moment, tz):
+    """Naive UTC, as stored, to naive clinic-local time"""
+    return moment.replace(tzinfo=timezone.utc).astimezone(tz).replace(tzinfo=None)
+
+def to_utc(moment, tz):
+    """Naive clinic-local time to naive UTC, as stored"""
+    return moment.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
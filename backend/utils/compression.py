@@ -0,0 +1,50 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from flask import request
+
+def _choose_encoding():
+    """Pick the best encoding the client accepts"""
+    accepted = request.accept_encodings
+    if brotli and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def init_compression(app):
+    """Compress JSON responses above COMPRESS_MIN_SIZE with brotli or gzip"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.mimetype != 'application/json'
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        encoding = _choose_encoding()
+        if encoding == 'br':
+            body = brotli.compress(body, quality=brotli_quality)
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=gzip_level)
+        else:
+            return response
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return app
@@ -0,0 +1,46 @@
+from flask import request
+
+def parse_fields(model):
+    """Parse ?fields=a,b into a list of API field names
+
+    Returns (fields, error); fields is None when the client wants everything.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None, None
+
+    fields = []
+    for name in raw.split(','):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+
+    unknown = [name for name in fields if name not in model.API_FIELDS]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}"
+    if not fields:
+        return None, None
+
+    return fields, None
+
+def field_columns(model, fields):
+    """Column names needed to serialize the given fields"""
+    names = ['id']
+    for field in fields or model.API_FIELDS:
+        for column in model.API_FIELDS[field][0]:
+            if column not in names:
+                names.append(column)
+    return names
+
+def select_columns(model, fields):
+    """Column attributes to select for the requested fields"""
+    return [getattr(model, name) for name in field_columns(model, fields)]
+
+def serialize_rows(model, rows, fields):
+    """Serialize column rows with the model's API field getters
+
+    Rows come from select(*select_columns(...)), so no ORM objects are built;
+    the getters only use attribute access, which rows support as well.
+    """
+    getters = [(name, model.API_FIELDS[name][1]) for name in fields or model.API_FIELDS]
+    return [{name: getter(row) for name, getter in getters} for row in rows]
@@ -0,0 +1,35 @@
+import hashlib
+from flask import request, make_response
+
+def make_etag(resource, *parts):
+    """Build a weak ETag from a resource name and its version parts"""
+    raw = ':'.join([resource] + [str(part) for part in parts])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+def not_modified(etag=None, last_modified=None):
+    """Return a 304 response if the client's cached copy is still fresh"""
+    if etag and request.if_none_match:
+        if not request.if_none_match.contains_weak(etag):
+            return None
+    elif last_modified and request.if_modified_since:
+        # HTTP dates have second precision
+        if last_modified.replace(microsecond=0) > request.if_modified_since.replace(tzinfo=None):
+            return None
+    else:
+        return None
+
+    response = make_response('', 304)
+    return tag_response(response, etag, last_modified)
+
+def tag_response(response, etag=None, last_modified=None):
+    """Attach validators so the client can revalidate with a conditional request"""
+    # Change-counter ETags are current, but a body read from a lagging replica
+    # may not be; tagging it would let clients revalidate a stale copy
+    if etag and (response.status_code == 304 or not request.environ.get('db.replica')):
+        response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    # Responses are per-user, so only the client itself may cache them
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+    return response
@@ -0,0 +1,42 @@
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj):
+    """Fallback for types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson
+
+    orjson encodes datetimes natively as ISO 8601, matching the format the
+    models' to_dict() methods produce, and writes bytes straight into the
+    response without an intermediate str.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json_provider(app):
+    """Use orjson for request/response JSON when it is installed"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    else:
+        print("orjson not installed - using the default JSON provider")
+    return app
@@ -0,0 +1,11 @@
+def query_budget(limit):
+    """Declare how many SQL statements a view may run per request
+
+    Checked by services.query_monitor after each request; views without one
+    get QUERY_BUDGET_DEFAULT. The attribute survives @wraps-based decorators,
+    so this can go anywhere below the route decorator.
+    """
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
@@ -0,0 +1,70 @@
+import re
+import math
+from functools import wraps
+from flask import request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+
+# What each key kind is read from, for error messages
+KEY_DESCRIPTIONS = {
+    'ip': 'client address',
+    'user': 'user identity',
+    'phone': 'phone_number',
+    'recipient': 'recipient',
+}
+
+def normalize_phone(value):
+    """Ten-digit national number, so +91, 0 and spacing variants share a bucket"""
+    digits = re.sub(r'\D', '', str(value))
+    if len(digits) == 12 and digits.startswith('91'):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith('0'):
+        return digits[1:]
+    return digits
+
+def _key_value(kind):
+    """Value a limit is keyed by, or None if the request doesn't carry it"""
+    if kind == 'ip':
+        return request.remote_addr
+    if kind == 'user':
+        return get_jwt_identity()
+
+    data = request.get_json(silent=True) or {}
+    if kind == 'phone':
+        value = data.get('phone_number')
+    elif kind == 'recipient':
+        value = data.get('recipient')
+    else:
+        return None
+    return normalize_phone(value) if value else None
+
+def rate_limit(name):
+    """Apply the RATE_LIMITS[name] buckets to a view
+
+    RATE_LIMITS maps an endpoint name to {key kind: (requests, seconds)};
+    key kinds are ip, user, phone (phone_number field) and recipient, the
+    last two keyed by the normalized number. The client address is only as
+    good as TRUSTED_PROXY_COUNT: behind a proxy that isn't counted, every
+    client shares the proxy's bucket.
+    A request that lacks one of its endpoint's keys is refused with a 400.
+    Put it below @jwt_required() when limiting by user.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limits = []
+            for kind, (capacity, period) in current_app.config['RATE_LIMITS'].get(name, {}).items():
+                value = _key_value(kind)
+                if not value:
+                    # Skipping the bucket would let such requests through unlimited
+                    return jsonify({'error': f'Request is missing its {KEY_DESCRIPTIONS.get(kind, kind)}'}), 400
+                limits.append((f"{name}:{kind}:{value}", capacity, period))
+
+            allowed, retry_after = current_app.rate_limiter.hit(limits)
+            if not allowed:
+                response = jsonify({'error': 'Too many requests, please try again later'})
+                response.headers['Retry-After'] = str(math.ceil(retry_after))
+                return response, 429
+
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
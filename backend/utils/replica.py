@@ -0,0 +1,21 @@
+from functools import wraps
+from flask import request, current_app
+from flask_jwt_extended import get_jwt_identity
+
+def read_only(f):
+    """Let a view's queries go to the read replica when it is safe to
+
+    The view must not write; if it does anyway, the session switches back to
+    the primary for the rest of the request. Put it below @jwt_required() so
+    read-your-writes stickiness can key on the user.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            identity = get_jwt_identity()
+        except RuntimeError:
+            identity = None
+        request.environ['db.identity'] = identity
+        request.environ['db.replica'] = current_app.replica_router.use_replica(identity)
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,46 @@
+from sqlalchemy import event
+from models import db
+
+def is_sqlite_file(uri):
+    """True for an on-disk SQLite URI (WAL does not apply to :memory:)"""
+    return uri.startswith('sqlite') and uri not in ('sqlite://', 'sqlite:///:memory:')
+
+def configure_sqlite(app):
+    """Production settings for on-disk SQLite; call before db.init_app()
+
+    Longer lock waits, and connections usable from the writer thread. The
+    pragmas are applied on every new connection by init_sqlite_pragmas().
+    """
+    if not app.config.get('SQLITE_PRODUCTION') or not is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']):
+        return False
+
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    connect_args = dict(options.get('connect_args') or {})
+    connect_args.setdefault('timeout', app.config.get('SQLITE_BUSY_TIMEOUT', 15))
+    connect_args.setdefault('check_same_thread', False)
+    options['connect_args'] = connect_args
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return True
+
+def init_sqlite_pragmas(app):
+    """Enable WAL and tuned pragmas on each connection; call after db.init_app()"""
+    if not app.config.get('SQLITE_PRODUCTION') or not is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+
+    pragmas = {
+        'journal_mode': 'WAL',  # readers don't block the writer or each other
+        'synchronous': app.config.get('SQLITE_SYNCHRONOUS', 'FULL'),
+        'busy_timeout': int(app.config.get('SQLITE_BUSY_TIMEOUT', 15) * 1000),
+        'cache_size': -app.config.get('SQLITE_CACHE_KB', 20000),
+        'temp_store': 'MEMORY',
+        'mmap_size': app.config.get('SQLITE_MMAP_BYTES', 256 * 1024 * 1024),
+    }
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', set_pragmas)
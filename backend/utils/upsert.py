@@ -0,0 +1,16 @@
+from models import db
+
+def upsert_insert():
+    """Dialect insert() with on_conflict_do_update, or None if unsupported
+
+    PostgreSQL and SQLite both support INSERT ... ON CONFLICT; callers fall
+    back to a locked read-modify-write on other databases.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
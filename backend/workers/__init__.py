@@ -0,0 +1,51 @@
+"""
+Background worker processes for the Aarogya Sahayak backend.
+
+Each worker runs as its own process, e.g. ``python -m workers.outbox_dispatcher``,
+on a minimal app: configuration, database, Redis and provider clients, without
+HTTP blueprints.
+"""
+
+from flask import Flask
+import redis
+
+from models.database import db
+from config import Config
+from utils.sqlite import configure_sqlite, init_sqlite_pragmas
+
+def create_worker_app():
+    """Build the minimal Flask app background workers run under"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    configure_sqlite(app)
+    db.init_app(app)
+    init_sqlite_pragmas(app)
+
+    try:
+        app.redis = redis.Redis(
+            host=app.config['REDIS_HOST'],
+            port=app.config['REDIS_PORT'],
+            decode_responses=True
+        )
+    except Exception as e:
+        print(f"Redis connection failed: {e}")
+        app.redis = None
+
+    from services.tracing import Tracer
+    app.tracer = Tracer()
+    app.tracer.init_app(app)
+
+    from services.communication_logger import CommunicationLogger
+    from services.whatsapp_service import WhatsAppService
+    from services.sms_service import SMSService
+    from services.provider_health import ProviderHealth
+    app.communication_logger = CommunicationLogger()
+    app.communication_logger.init_app(app)
+    app.provider_health = ProviderHealth()
+    app.provider_health.init_app(app)
+    app.whatsapp = WhatsAppService()
+    app.whatsapp.init_app(app)
+    app.sms = SMSService()
+    app.sms.init_app(app)
+
+    return app
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Analytics snapshot refresher: keeps the shared columnar copy of health
+records in ANALYTICS_SNAPSHOT_DIR up to date for the web workers.
+
+    python -m workers.analytics_snapshot
+"""
+
+import time
+from workers import create_worker_app
+from models import db
+from services.analytics_snapshot import AnalyticsSnapshot
+
+def main():
+    app = create_worker_app()
+    if not app.config.get('ANALYTICS_SNAPSHOT_DIR'):
+        raise SystemExit("ANALYTICS_SNAPSHOT_DIR is not set")
+
+    with app.app_context():
+        db.create_all()
+
+        snapshot = AnalyticsSnapshot()
+        snapshot.init_app(app)
+        snapshot.load()  # continue from the last saved version
+
+        print("Analytics snapshot refresher started")
+        try:
+            while True:
+                try:
+                    added = snapshot.refresh()
+                    if added or not snapshot.version:
+                        snapshot.save()
+                        print(f"Analytics snapshot: {snapshot.row_count} rows (+{added})")
+                except Exception as e:
+                    print(f"Analytics snapshot refresh error: {e}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                time.sleep(snapshot.refresh_seconds)
+        except KeyboardInterrupt:
+            print("Analytics snapshot refresher stopped")
+
+if __name__ == '__main__':
+    main()
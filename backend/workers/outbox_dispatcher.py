@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Outbox dispatcher: delivers notifications staged in outbox_messages.
+
+    python -m workers.outbox_dispatcher
+"""
+
+from workers import create_worker_app
+from models import db
+from services.outbox import OutboxDispatcher
+
+def main():
+    app = create_worker_app()
+
+    with app.app_context():
+        db.create_all()
+
+        dispatcher = OutboxDispatcher()
+        dispatcher.init_app(app)
+
+        print("Outbox dispatcher started")
+        try:
+            dispatcher.run()
+        except KeyboardInterrupt:
+            print("Outbox dispatcher stopped")
+
+if __name__ == '__main__':
+    main()
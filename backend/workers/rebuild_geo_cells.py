@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Rebuild the geo_cells heatmap tiles from health records and alerts (one-off backfill).
+
+    python -m workers.rebuild_geo_cells
+"""
+
+from workers import create_worker_app
+from models import db
+from services.geo_tiles import rebuild_cells
+
+def main():
+    app = create_worker_app()
+
+    with app.app_context():
+        db.create_all()
+        count = rebuild_cells()
+        print(f"Rebuilt {count} map cells")
+
+if __name__ == '__main__':
+    main()
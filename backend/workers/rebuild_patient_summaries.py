@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Rebuild the patient_summary table from health_records (one-off backfill).
+
+    python -m workers.rebuild_patient_summaries
+"""
+
+from workers import create_worker_app
+from models import db
+from services.patient_summary import rebuild_summaries
+
+def main():
+    app = create_worker_app()
+
+    with app.app_context():
+        db.create_all()
+        count = rebuild_summaries()
+        print(f"Rebuilt summaries for {count} patients")
+
+if __name__ == '__main__':
+    main()
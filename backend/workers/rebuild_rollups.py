@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Rebuild the vitals_rollups table from health_records (one-off backfill).
+
+    python -m workers.rebuild_rollups
+"""
+
+from workers import create_worker_app
+from models import db
+from services.rollups import rebuild_rollups
+
+def main():
+    app = create_worker_app()
+
+    with app.app_context():
+        db.create_all()
+        count = rebuild_rollups()
+        print(f"Rebuilt {count} rollup buckets")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Appointment reminder scheduler: reminds patients of upcoming appointments.
+
+    python -m workers.reminder_scheduler
+"""
+
+from workers import create_worker_app
+from models import db
+from services.reminders import ReminderScheduler
+
+def main():
+    app = create_worker_app()
+
+    with app.app_context():
+        db.create_all()
+
+        scheduler = ReminderScheduler()
+        scheduler.init_app(app)
+
+        print("Reminder scheduler started")
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            print("Reminder scheduler stopped")
+
+if __name__ == '__main__':
+    main()